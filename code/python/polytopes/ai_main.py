@@ -4,9 +4,11 @@ import time
 
 from aistats.aistats import AiStatsRmpSolver
 from aistats.enumerator.naive_enumerator import Enumerator2D, NaiveEnumerator
+from aistats.oracle.fo2_caller import Fo2WfomcCaller
 from aistats.oracle.forclift_callers import ForcliftClientCaller, ForcliftV1
 from clauses.cnf import WeightedFormula, MLN
 from cnf_parser import CnfParser
+import tracing
 
 
 if __name__ == "__main__":
@@ -14,17 +16,28 @@ if __name__ == "__main__":
     a_pars.add_argument("input_file", help="Path to input CNF file.")
     a_pars.add_argument("domain_size", help="Domain size of MLN.", type=int)
     a_pars.add_argument("-f", "--forclift_path", help="Path to forclift (for standard Oracle)")
-    a_pars.add_argument("-p", "--port", help="Port - for server-like WFOMC Oracle (must run on localhost)")
-    a_pars.add_argument("-ot", "--oracle_type", help="Oracle caller type (server or standard)",
-                        choices=["server", "standard"], default="server")
+    a_pars.add_argument("-p", "--port", help="Port - for server-like WFOMC Oracle (must run on localhost)",
+                        type=int, default=-1)
+    a_pars.add_argument("-ot", "--oracle_type", help="Oracle caller type (server, standard or fo2 - in-process "
+                                                     "for two-variable fragment, Forclift path as fallback)",
+                        choices=["server", "standard", "fo2"], default="server")
+    a_pars.add_argument("-m", "--merge", help="Merge equivalent formulas (their weights are summed)",
+                        action="store_true")
+    a_pars.add_argument("-t", "--trace", help="Write Chrome trace of solver phases to this path and print a "
+                                              "summary of phases")
 
     args = a_pars.parse_args()
     parser = CnfParser()
-    cnf = parser.read_file(args.input_file)
-    mln = MLN(cnf.formulas)
+    parser.read_file(args.input_file)
+    mln = MLN(parser.formulas)
+    if args.merge:
+        mln = mln.merge_equivalent()
     domain_size = args.domain_size
     print(f"DOMAIN SIZE: {domain_size}")
-    if args.ot == "standard":
+    if args.oracle_type == "fo2":
+        print("Use in-process FO2 caller")
+        ocaller = Fo2WfomcCaller(fallback=ForcliftV1(args.forclift_path) if args.forclift_path else None)
+    elif args.oracle_type == "standard":
         print("Use standard Forclift caller (new process for each call)")
         ocaller = ForcliftV1(args.forclift_path)
     else:
@@ -36,10 +49,15 @@ if __name__ == "__main__":
             ocaller = ForcliftClientCaller(wrapper_path = args.forclift_path)
 
     a_solver = AiStatsRmpSolver(mln, domain_size, tolerance=1E-2, enumerator_cls=NaiveEnumerator,
-                                oracle_caller=ForcliftClientCaller(port=1567))
+                                oracle_caller=ocaller)
+    if args.trace:
+        tracing.enable()
     ntime = time.time()
     a_solver.solve()
     etime = time.time()
     print(f"Took {etime - ntime: 0.3f} s")
+    if args.trace:
+        print(tracing.TRACER.summary())
+        tracing.TRACER.write_chrome_trace(args.trace)
     print(a_solver.rmp)
     a_solver.plot_rmp()
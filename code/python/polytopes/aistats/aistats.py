@@ -3,13 +3,17 @@ import numpy as np
 import polytope
 import re
 
-from typing import List
+from scipy.spatial import ConvexHull, HalfspaceIntersection, QhullError
+
+from typing import List, Optional
 from functools import reduce
 
 import aistats.utils as aiu
+import tracing
 
 from aistats.enumerator.naive_enumerator import NaiveEnumerator
 from aistats.enumerator.point_enumerator import PointEnumerator
+from aistats.normal_store import NormalStore
 from aistats.oracle.forclift_callers import ForcliftV1
 from aistats.oracle.oracle_caller import OracleCaller
 from clauses.cnf import MLN, WeightedFormula
@@ -29,6 +33,8 @@ class AiStatsRmpSolver:
         self.predicates = self.get_predicates()
         self.rmp = polytope.box2poly([[0, lim] for lim in self.limits])
         self.tolerance = tolerance
+        self.oracle_calls = 0
+        self.constraints = []
 
     def calculate_limits(self) -> List[int]:
         wfs = self.mln.weighted_formulas
@@ -41,30 +47,39 @@ class AiStatsRmpSolver:
             out = out.union(pset)
         return out
 
-    def solve(self) -> None:
-        normals = set()
+    def solve(self, adaptive: bool = False, seed_normals=None, max_oracle_calls: int = None) -> None:
+        """
+        Calculates the RMP as an intersection of half-spaces given by the oracle.
+        :param adaptive: query only normals which can still cut the current outer approximation instead of all
+        normals of the enumerator
+        :param seed_normals: normals to be queried first (e.g. facets of RMP for a similar MLN)
+        :param max_oracle_calls: stop querying normals of the enumerator after this number of oracle calls, the RMP
+        is then an outer approximation (best with MagnitudeEnumerator, which generates small normals first)
+        """
+        if adaptive:
+            if len(self.limits) == 2 and seed_normals is None:
+                self._solve_adaptive_2d()
+            else:
+                self._solve_adaptive(seed_normals)
+            return
+        normals = NormalStore(aiu.normal_bounds(self.limits))
         irmp_constraints = []
-        for normal in self.generate_normals():
-            n_tuple = tuple(normal)
-            if n_tuple in normals:
-                continue
-            normals.add(n_tuple)
-            normals.add(tuple(-normal))
-            for c_normal in [normal, -normal]:
-                try:
-                    z_log = self.forclift_for_normal(c_normal)
-                except (ValueError, TypeError) as e:
-                    # log
-                    print(e)
-                    continue
-                # b = math.ceil(0.5 * z_log / self.omega_size_log - 0.5)
-                if math.isnan(z_log) or math.isinf(z_log):
-                    continue
-                b = 0.5 * z_log / self.omega_size_log - 0.5
-                if self.tolerance == 0.0 or b - math.floor(b) > self.tolerance:
-                    irmp_constraints.append((c_normal, math.ceil(b)))
-                else:
-                    irmp_constraints.append((c_normal, math.floor(b)))
+        if seed_normals is not None:
+            # both signs of a seed are queried, the enumerator then skips the normal as seen
+            signed = [c_normal for normal in seed_normals for c_normal in (np.asarray(normal), -np.asarray(normal))
+                      if normals.add(c_normal)]
+            for normal, bound in zip(signed, self.support_bounds(signed)):
+                if bound is not None:
+                    irmp_constraints.append((normal, bound))
+        for normal in self.generate_normals(normals):
+            if max_oracle_calls is not None and self.oracle_calls >= max_oracle_calls:
+                break
+            c_normals = [normal, -normal] if normals.add(-normal) else [normal]
+            if max_oracle_calls is not None:
+                c_normals = c_normals[:max_oracle_calls - self.oracle_calls]
+            for c_normal, bound in zip(c_normals, self.support_bounds(c_normals)):
+                if bound is not None:
+                    irmp_constraints.append((c_normal, bound))
 
             if len(irmp_constraints) > 10:
                 self.find_min_set(irmp_constraints)
@@ -72,10 +87,162 @@ class AiStatsRmpSolver:
                 irmp_constraints = []
         self.find_min_set(irmp_constraints)
 
-    def generate_normals(self):
-        for points in self.enumerator.generate_points():
-            normal = aiu.calculate_normal(points)
-            yield aiu.normalize_vector(normal)
+    def support_bound(self, normal) -> Optional[int]:
+        """
+        Asks the oracle for the right-hand side of the half-space normal * x <= b containing the RMP.
+        :param normal: integer normal vector
+        :return: b or None if the oracle failed
+        """
+        return self.support_bounds([normal])[0]
+
+    def support_bounds(self, normals) -> List[Optional[int]]:
+        """
+        Asks the oracle for the right-hand sides of half-spaces for several normals at once.
+        :param normals: integer normal vectors
+        :return: list of b values, None where the oracle failed
+        """
+        try:
+            z_logs = self.forclift_for_normals(normals)
+        except (ValueError, TypeError) as e:
+            # log
+            print(e)
+            return [None for _ in normals]
+        out = []
+        for z_log in z_logs:
+            # b = math.ceil(0.5 * z_log / self.omega_size_log - 0.5)
+            if math.isnan(z_log) or math.isinf(z_log):
+                out.append(None)
+                continue
+            b = 0.5 * z_log / self.omega_size_log - 0.5
+            if self.tolerance == 0.0 or b - math.floor(b) > self.tolerance:
+                out.append(math.ceil(b))
+            else:
+                out.append(math.floor(b))
+        return out
+
+    def _solve_adaptive_2d(self) -> None:
+        # Stern-Brocot refinement - mediant of two adjacent normals lies between them, all primitive normals
+        # within the bounds are reachable this way
+        bounds = aiu.normal_bounds(self.limits)
+        box = [np.array(n) for n in [(1, 0), (0, 1), (-1, 0), (0, -1)]]
+        box_bounds = [self.limits[0], self.limits[1], 0, 0]
+        constraints = []
+        for normal, box_bound, bound in zip(box, box_bounds, self.support_bounds(box)):
+            constraints.append((normal, box_bound if bound is None else min(bound, box_bound)))
+        stack = [(constraints[ix], constraints[(ix + 1) % 4]) for ix in range(4)]
+        while stack:
+            (n_1, b_1), (n_2, b_2) = stack.pop()
+            mediant = n_1 + n_2
+            if (np.abs(mediant) > bounds).any():
+                continue
+            vertex = np.linalg.solve(np.array([n_1, n_2], dtype=np.float64), np.array([b_1, b_2], dtype=np.float64))
+            bound = self.support_bound(mediant)
+            if bound is None or bound >= np.dot(mediant, vertex) - 1E-9:
+                continue
+            constraints.append((mediant, bound))
+            stack.append(((mediant, bound), (n_2, b_2)))
+            stack.append(((n_1, b_1), (mediant, bound)))
+        self.find_min_set(constraints)
+
+    def _solve_adaptive(self, seed_normals=None) -> None:
+        # A vertex of the outer approximation is certified by a normal from the interior of its normal cone,
+        # otherwise the normal gives a new facet cutting the vertex off. Facets of the hull of certified vertices
+        # (adjacent to the parts of the RMP found so far) are queried too, the search ends when no new normal
+        # can be asked.
+        bounds = aiu.normal_bounds(self.limits)
+        constraints = []
+        queried = {}
+        certified = set()
+        directions = {}
+        normals = {tuple(n): n for n in np.row_stack((np.eye(len(self.limits), dtype=np.int64),
+                                                      -np.eye(len(self.limits), dtype=np.int64)))}
+        if seed_normals is not None:
+            normals.update((tuple(n), n) for n in seed_normals)
+        while normals:
+            n_constraints = []
+            for (n_tuple, normal), bound in zip(normals.items(), self.support_bounds(list(normals.values()))):
+                queried[n_tuple] = bound
+                if bound is not None:
+                    n_constraints.append((normal, bound))
+            constraints.extend(n_constraints)
+            self.find_min_set(n_constraints)
+            normals = {}
+            vertices = self.rmp_vertices()
+            for vertex in vertices:
+                # normal cone of a vertex only grows with new facets, so its first direction stays in its interior
+                v_tuple = tuple(vertex.round(6))
+                if v_tuple not in directions:
+                    active = [n / np.linalg.norm(n) for n, b in constraints if abs(np.dot(n, vertex) - b) < 1E-6]
+                    # no queried facet through the vertex (e.g. the oracle failed) - direction from the centroid
+                    direction = np.sum(active, axis=0) if active else vertex - vertices.mean(axis=0)
+                    directions[v_tuple] = self._cone_direction(vertex, vertices, direction, bounds)
+                normal = directions[v_tuple]
+                if normal is None:
+                    continue
+                n_tuple = tuple(normal)
+                if n_tuple not in queried:
+                    normals[n_tuple] = normal
+                elif queried[n_tuple] is not None and queried[n_tuple] >= np.dot(normal, vertex) - 1E-6:
+                    certified.add(tuple(vertex.round().astype(np.int64)))
+            for normal in self._hull_normals(certified):
+                n_tuple = tuple(normal)
+                if n_tuple not in queried and (np.abs(normal) <= bounds).all():
+                    normals[n_tuple] = normal
+
+    @staticmethod
+    def _cone_direction(vertex, vertices, direction, bounds) -> Optional[np.ndarray]:
+        """
+        Finds a small integer vector from the interior of the normal cone of the vertex, i.e. a normal for which
+        the vertex is the only maximizer among all vertices.
+        :param vertex: vertex of the polytope
+        :param vertices: all vertices of the polytope
+        :param direction: a (real) vector from the interior of the normal cone
+        :param bounds: bounds on coefficients of the normal
+        :return: primitive integer normal or None if there is none within bounds (or the direction is zero)
+        """
+        if np.abs(direction).max() < 1E-9:
+            return None
+        others = vertices[np.abs(vertices - vertex).max(axis=1) > 1E-6]
+        direction = direction / np.abs(direction).max()
+        for scale in range(1, bounds.max() + 1):
+            normal = np.rint(direction * scale).astype(np.int64)
+            if (np.abs(normal) > bounds).any():
+                return None
+            if normal.any() and (others @ normal < np.dot(normal, vertex) - 1E-6).all():
+                return normal // np.gcd.reduce(normal)
+        return None
+
+    def _hull_normals(self, points):
+        """
+        Integer outer normals of facets of convex hull of given points.
+        :param points: set of integer point tuples
+        :return: list of primitive integer normals
+        """
+        if len(points) <= len(self.limits):
+            return []
+        points = np.array(sorted(points))
+        try:
+            hull = ConvexHull(points)
+        except QhullError:
+            return []
+        out = []
+        for simplex, equation in zip(hull.simplices, hull.equations):
+            facet = points[simplex]
+            normal = aiu.normalize_vector(aiu.calculate_normal(facet[1:] - facet[0]))
+            if np.dot(normal, equation[:-1]) < 0:
+                normal = -normal
+            out.append(normal)
+        return out
+
+    def generate_normals(self, store: NormalStore = None):
+        """
+        :param store: normals seen so far, normals of the enumerator are added to it (a new store by default)
+        :return: generator of normals of the enumerator which were not in the store
+        """
+        store = NormalStore(aiu.normal_bounds(self.limits)) if store is None else store
+        for normal in self.enumerator.generate_normals():
+            if store.add(normal):
+                yield normal
 
     def forclift_for_normal(self, normal):
         """
@@ -87,15 +254,52 @@ class AiStatsRmpSolver:
             WeightedFormula(2 * w * self.omega_size_log, f.formula) for w, f in zip(normal, self.mln.weighted_formulas)
         ]
         print("Call oracle")
-        return self.oracle_caller.call_oracle(self.domain_size, self.predicates, n_formulas)
+        self.oracle_calls += 1
+        tracing.count("oracle calls")
+        with tracing.span("oracle call"):
+            return self.oracle_caller.call_oracle(self.domain_size, self.predicates, n_formulas)
+
+    def forclift_for_normals(self, normals) -> np.ndarray:
+        """
+
+        :param normals: sequence of normals
+        :return: natural logarithms of the partition function for each normal
+        """
+        weights = 2 * np.array(normals, dtype=np.float64) * self.omega_size_log
+        formulas = [wf.formula for wf in self.mln.weighted_formulas]
+        self.oracle_calls += len(weights)
+        tracing.count("oracle calls", len(weights))
+        with tracing.span("oracle call", normals=len(weights)):
+            return self.oracle_caller.call_oracle_many(self.domain_size, self.predicates, formulas, weights)
 
     def find_min_set(self, irmp_constraints):
         A_rmp = np.empty((len(irmp_constraints), len(self.limits)))
         for ix in range(len(irmp_constraints)):
             A_rmp[ix, :] = irmp_constraints[ix][0]
         b_rmp = np.array([val[1] for val in irmp_constraints])
+        self.constraints.extend(irmp_constraints)
         A_stack, b_stack = np.row_stack((self.rmp.A, A_rmp)), np.concatenate((self.rmp.b, b_rmp))
-        self.rmp = polytope.reduce(polytope.Polytope(A_stack, b_stack))
+        with tracing.span("polytope reduce", constraints=len(b_stack)):
+            self.rmp = polytope.reduce(polytope.Polytope(A_stack, b_stack))
+
+    def facet_normals(self) -> np.ndarray:
+        """
+        :return: integer normals of the facets of the RMP (one per row)
+        """
+        out = {}
+        for normal, bound in self.constraints:
+            norm = np.linalg.norm(normal)
+            unit = normal / norm
+            if (np.abs(self.rmp.A @ unit - 1) < 1E-9)[np.abs(self.rmp.b - bound / norm) < 1E-9].any():
+                out[tuple(normal)] = normal
+        return np.array(list(out.values()), dtype=np.int64).reshape(-1, len(self.limits))
+
+    def rmp_vertices(self) -> np.ndarray:
+        if self.rmp.chebR <= 1E-9:
+            return polytope.extreme(self.rmp)
+        halfspaces = np.column_stack((self.rmp.A, -self.rmp.b))
+        vertices = HalfspaceIntersection(halfspaces, self.rmp.chebXc).intersections
+        return np.unique(vertices.round(9), axis=0)
 
     def plot_rmp(self):
         if self.rmp.dim != 2:
@@ -0,0 +1,116 @@
+import numpy as np
+
+from itertools import product
+from numpy.linalg import matrix_rank
+from typing import List, Optional
+
+import aistats.utils as aiu
+
+from aistats.enumerator.point_enumerator import PointEnumerator
+
+
+class MagnitudeEnumerator(PointEnumerator):
+    """
+    Generates the normals of point sets of the box (the normals NaiveEnumerator finds) in nondecreasing L1 or
+    L-infinity norm, so that small normals (large facets) are queried first. Candidates are primitive vectors within
+    normal_bounds of limits (first non-zero coefficient positive) generated level by level of the norm, coefficient
+    by coefficient, so only one candidate is kept in memory. A candidate is kept if the lattice points of the box on
+    one of its hyperplanes have dimensions - 1 independent differences - these are its point set.
+    """
+
+    def __init__(self, limits: List[int], norm: str = "l1"):
+        super().__init__(limits)
+        if norm not in ("l1", "linf"):
+            raise ValueError(f"Unsupported norm {norm}, must be l1 or linf")
+        self.norm = norm
+        self.bounds = aiu.normal_bounds(limits)
+        self.box = self.unrank_combinations(np.arange(int(np.prod(np.array(limits, dtype=np.int64) + 1))))
+
+    def generate_points(self):
+        for normal in self._candidates():
+            points = self.facet_points(normal)
+            if points is not None:
+                yield points
+
+    def generate_normals(self):
+        for normal in self._candidates():
+            if self.facet_points(normal) is not None:
+                yield normal
+
+    def facet_points(self, normal: np.ndarray) -> Optional[np.ndarray]:
+        """
+        :param normal: integer vector
+        :return: (dimensions - 1) x dimensions matrix of independent differences of lattice points of the box lying
+        on one hyperplane orthogonal to the normal, None if there are no such points
+        """
+        _, inverse, counts = np.unique(self.box @ normal, return_inverse=True, return_counts=True)
+        # larger groups of points are more likely to span a facet
+        for group in np.argsort(-counts, kind="stable"):
+            if counts[group] < self.dimensions:
+                return None
+            points = self.box[inverse.ravel() == group]
+            differences = points[1:] - points[0]
+            if matrix_rank(differences) == self.dimensions - 1:
+                return self._independent_rows(differences).astype(np.float64)
+        return None
+
+    def _independent_rows(self, differences: np.ndarray) -> np.ndarray:
+        rows = []
+        for row in differences:
+            if matrix_rank(np.array(rows + [row])) == len(rows) + 1:
+                rows.append(row)
+                if len(rows) == self.dimensions - 1:
+                    break
+        return np.array(rows)
+
+    def _candidates(self):
+        bounds = [int(b) for b in self.bounds]
+        for level in range(1, (sum(bounds) if self.norm == "l1" else max(bounds)) + 1):
+            levels = self._l1_level(level, bounds) if self.norm == "l1" else self._linf_level(level, bounds)
+            for magnitudes in levels:
+                if np.gcd.reduce(magnitudes) == 1:
+                    yield from self._signed(np.array(magnitudes, dtype=np.int64))
+
+    @staticmethod
+    def _l1_level(level: int, bounds: List[int]):
+        # magnitude vectors with the sum equal to level
+        rest = np.cumsum(bounds[::-1])[::-1].tolist() + [0]
+        vector = [0] * len(bounds)
+
+        def fill(dim, remaining):
+            if dim == len(bounds):
+                if remaining == 0:
+                    yield tuple(vector)
+                return
+            for value in range(max(0, remaining - rest[dim + 1]), min(bounds[dim], remaining) + 1):
+                vector[dim] = value
+                yield from fill(dim + 1, remaining - value)
+
+        yield from fill(0, level)
+
+    @staticmethod
+    def _linf_level(level: int, bounds: List[int]):
+        # magnitude vectors with the greatest coefficient equal to level
+        reachable = [any(b >= level for b in bounds[dim:]) for dim in range(len(bounds))] + [False]
+        vector = [0] * len(bounds)
+
+        def fill(dim, reached):
+            if dim == len(bounds):
+                if reached:
+                    yield tuple(vector)
+                return
+            if not reached and not reachable[dim]:
+                return
+            for value in range(min(bounds[dim], level) + 1):
+                vector[dim] = value
+                yield from fill(dim + 1, reached or value == level)
+
+        yield from fill(0, False)
+
+    @staticmethod
+    def _signed(magnitudes: np.ndarray):
+        non_zero = np.flatnonzero(magnitudes)
+        for signs in product([1, -1], repeat=len(non_zero) - 1):
+            out = magnitudes.copy()
+            out[non_zero[1:]] *= np.array(signs, dtype=np.int64)
+            yield out
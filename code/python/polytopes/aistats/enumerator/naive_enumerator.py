@@ -2,11 +2,12 @@ from typing import List
 
 import numpy as np
 
-from itertools import combinations, permutations, product
+from itertools import chain, combinations, islice, permutations, product
 from functools import reduce
 from numpy.linalg import matrix_rank
 
 from aistats.enumerator.point_enumerator import PointEnumerator
+from aistats.utils import integer_normals
 
 
 class NaiveEnumerator(PointEnumerator):
@@ -22,12 +23,48 @@ class NaiveEnumerator(PointEnumerator):
             if independent:
                 yield out
 
+    def generate_point_batches(self, batch_size: int = 4096):
+        """
+        Unranks blocks of combinations at once and keeps only independent ones.
+        :param batch_size: number of combinations processed at once
+        :return: generator of arrays (point sets x (dimensions - 1) x dimensions)
+        """
+        pool, size = self.combination_space()
+        indices = combinations(range(pool), size)
+        while True:
+            flat = np.fromiter(chain.from_iterable(islice(indices, batch_size)), dtype=np.int64)
+            if len(flat) == 0:
+                return
+            out = self.combination_points(flat.reshape(-1, size))
+            if len(out):
+                yield out
+
+    def combination_space(self) -> (int, int):
+        """
+        :return: (number of items, size of combination) - point sets are combinations of points of the box
+        """
+        return reduce(lambda x, y: x * y, (x + 1 for x in self.limits)), self.dimensions
+
+    def combination_points(self, combinations_: np.ndarray) -> np.ndarray:
+        """
+        :param combinations_: matrix of combinations (one per row) of indices of points
+        :return: independent point sets (differences from their first points) of given combinations
+        """
+        points = self.unrank_combinations(combinations_)
+        out = (points[:, 1:, :] - points[:, :1, :]).astype(np.float64)
+        return out[self._check_independence_batch(out)]
+
     def _check_independence(self, matrix: np.array) -> (np.array, bool):
         first_line = matrix[0, :]
         out = matrix[1:, :] - first_line
         m_rank = matrix_rank(out)
         return out, m_rank == self.dimensions - 1
 
+    @staticmethod
+    def _check_independence_batch(differences: np.ndarray) -> np.ndarray:
+        # (n-1) rows of an integer matrix are independent iff their exact normal (cofactor vector) is non-zero
+        return integer_normals(differences).any(axis=1)
+
 
 class IterEnumerator(PointEnumerator):
 
@@ -110,34 +147,34 @@ class Enumerator2D(PointEnumerator):
 
 if __name__ == "__main__":
     import aistats.utils as aiu
+    from aistats.normal_store import NormalStore
     dims = [1,1,1,1,1]
     en = IterEnumerator(dims)  #NaiveEnumerator([10, 4, 3])
-    dist_normals, points = set(), 0  # 12150, 278k
+    dist_normals, points = NormalStore(aiu.normal_bounds(dims)), 0  # 12150, 278k
     for point in en.generate_points():
         points += 1
         if points % 10000 == 0:
             print(f"Point n-tuples: {points}\nDist_points: {len(dist_normals)}")
         normal = aiu.calculate_normal(point)
         nmlzd = aiu.normalize_vector(normal)
-        dist_normals.add(tuple(nmlzd))
-        dist_normals.add(tuple(-nmlzd))
+        dist_normals.add_many(np.array([nmlzd, -nmlzd]))
     #print(dist_normals)
     print(f"Point n-tuples: {points}\nDist_points: {len(dist_normals)}")
 
     print("NAIVE")
     en = NaiveEnumerator(dims)  # NaiveEnumerator([10, 4, 3])
-    dist_normals2, points2 = set(), 0  # 12150, 278k
+    dist_normals2, points2 = NormalStore(aiu.normal_bounds(dims)), 0  # 12150, 278k
     for point in en.generate_points():
         points2 += 1
         if points2 % 10000 == 0:
             print(f"Point n-tuples: {points2}\nDist_normals: {len(dist_normals2)}")
         normal = aiu.calculate_normal(point)
         nmlzd = aiu.normalize_vector(normal)
-        dist_normals2.add(tuple(nmlzd))
-        dist_normals2.add(tuple(-nmlzd))
+        dist_normals2.add_many(np.array([nmlzd, -nmlzd]))
     #print(dist_normals2)
+    naive_normals, center_normals = dist_normals2.normals(), dist_normals.normals()
     print("In naive, not in center")
-    print(dist_normals2 - dist_normals)
+    print(naive_normals[~dist_normals.contains_many(naive_normals)])
     print("In center, not in naive")
-    print(dist_normals - dist_normals2)
+    print(center_normals[~dist_normals2.contains_many(center_normals)])
     print(f"Point n-tuples: {points2}\nDist_normals: {len(dist_normals2)}")
@@ -1,8 +1,13 @@
 import abc
+import itertools
+
+import numpy as np
 
 from typing import List
 from numpy import empty, array
 
+from aistats.utils import integer_normals
+
 
 class PointEnumerator(abc.ABC):
 
@@ -15,6 +20,30 @@ class PointEnumerator(abc.ABC):
     def generate_points(self):
         pass
 
+    def generate_point_batches(self, batch_size: int = 4096):
+        """
+        Groups generated point sets into 3-D arrays.
+        :param batch_size: maximal number of point sets in one batch
+        :return: generator of arrays (point sets x points x dimensions)
+        """
+        points = iter(self.generate_points())
+        while True:
+            batch = list(itertools.islice(points, batch_size))
+            if not batch:
+                return
+            yield np.array(batch)
+
+    def generate_normals(self):
+        """
+        :return: generator of primitive normals (first non-zero coefficient positive) of point sets, a normal is
+        repeated for every point set it belongs to (AiStatsRmpSolver keeps distinct normals in a NormalStore)
+        """
+        for points in self.generate_point_batches():
+            # enumerators in 2D may yield single points instead of 1 x 2 matrices
+            points = points.reshape(len(points), self.dimensions - 1, self.dimensions)
+            normals = integer_normals(points)
+            yield from normals[normals.any(axis=1)]
+
     def unrank_combination(self, index: int) -> array:
         out = empty(self.dimensions)
         for dim, dim_div in enumerate(self.divisors):
@@ -22,6 +51,16 @@ class PointEnumerator(abc.ABC):
             index %= dim_div
         return out
 
+    def unrank_combinations(self, indices: np.ndarray) -> np.ndarray:
+        """
+        Vectorized unrank_combination.
+        :param indices: integer array of any shape
+        :return: array of shape indices.shape + (dimensions, )
+        """
+        bases = np.array(self.divisors[::-1], dtype=np.int64)
+        radices = np.array(self.limits, dtype=np.int64) + 1
+        return (np.asarray(indices, dtype=np.int64)[..., None] // bases) % radices
+
     def _calculate_divisors(self) -> List[int]:
         out = [1]
         for i in range(len(self.limits) - 1):
@@ -0,0 +1,143 @@
+import json
+import math
+import os
+
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, islice
+from typing import List, Tuple
+
+from aistats.enumerator.naive_enumerator import NaiveEnumerator
+from aistats.utils import integer_normals
+
+
+def unrank_lex_combination(rank: int, pool: int, size: int) -> Tuple[int, ...]:
+    """
+    :param rank: index of the combination in lexicographic order (as generated by itertools.combinations)
+    :param pool: number of items
+    :param size: size of combination
+    :return: combination (sorted tuple of item indices)
+    """
+    out = []
+    item = 0
+    for position in range(size):
+        while True:
+            count = math.comb(pool - item - 1, size - position - 1)
+            if rank < count:
+                break
+            rank -= count
+            item += 1
+        out.append(item)
+        item += 1
+    return tuple(out)
+
+
+def combination_blocks(pool: int, size: int, start: int, stop: int, batch_size: int):
+    """
+    Generates combinations with ranks start, ..., stop - 1 in lexicographic order without iterating over the
+    preceding ones.
+    :param pool: number of items
+    :param size: size of combination
+    :param start: rank of the first combination
+    :param stop: rank after the last combination
+    :param batch_size: maximal number of rows in one yielded matrix
+    :return: generator of matrices (combinations x size)
+    """
+    remaining = stop - start
+    if remaining <= 0:
+        return
+    first = unrank_lex_combination(start, pool, size)
+    # combinations following the first one share its prefix of length position and differ in the next item
+    for position in range(size - 1, -1, -1):
+        rest = size - position - 1
+        begin = first[position] if rest == 0 else first[position] + 1
+        for item in range(begin, pool - rest):
+            prefix = np.array(first[:position] + (item,), dtype=np.int64)
+            suffixes = combinations(range(item + 1, pool), rest)
+            while remaining > 0:
+                rows = list(islice(suffixes, min(batch_size, remaining)))
+                if not rows:
+                    break
+                block = np.array(rows, dtype=np.int64).reshape(len(rows), rest)
+                yield np.column_stack((np.tile(prefix, (len(rows), 1)), block))
+                remaining -= len(rows)
+            if remaining <= 0:
+                return
+
+
+def _run_shard(enumerator_cls, limits: List[int], shard: int, start: int, stop: int, directory: str,
+               batch_size: int, checkpoint_every: int, max_batches: int = None) -> np.ndarray:
+    """
+    Enumerates normals of one range of ranks, continues from the stored cursor if there is one.
+    :return: matrix of distinct normals of the shard
+    """
+    enumerator = enumerator_cls(limits)
+    pool, size = enumerator.combination_space()
+    cursor_path = os.path.join(directory, f"shard-{shard:04d}.json")
+    normals_path = os.path.join(directory, f"shard-{shard:04d}.npy")
+    position, normals = start, set()
+    if os.path.exists(cursor_path):
+        with open(cursor_path) as f:
+            cursor = json.load(f)
+        if (cursor["start"], cursor["stop"], cursor["limits"]) != (start, stop, list(limits)):
+            raise ValueError(f"Cursor {cursor_path} belongs to a different enumeration.")
+        position = cursor["position"]
+        normals = {tuple(n) for n in np.load(normals_path)}
+
+    def save():
+        n_array = np.array(sorted(normals), dtype=np.int64).reshape(-1, len(limits))
+        np.save(normals_path + ".tmp.npy", n_array)
+        os.replace(normals_path + ".tmp.npy", normals_path)
+        with open(cursor_path + ".tmp", "w") as f:
+            json.dump({"start": start, "stop": stop, "limits": list(limits), "position": position,
+                       "done": position >= stop}, f)
+        os.replace(cursor_path + ".tmp", cursor_path)
+
+    for batches, block in enumerate(combination_blocks(pool, size, position, stop, batch_size), start=1):
+        points = enumerator.combination_points(block)
+        if len(points):
+            normals.update(tuple(n) for n in integer_normals(points))
+        position += len(block)
+        if batches % checkpoint_every == 0:
+            save()
+        if max_batches is not None and batches >= max_batches:
+            break
+    save()
+    return np.array(sorted(normals), dtype=np.int64).reshape(-1, len(limits))
+
+
+class ShardedEnumeration:
+    """
+    Splits the rank space of combinations of an enumerator into shards enumerated in a process pool. Each shard
+    stores its distinct normals and the rank of the next combination to a directory, so an interrupted
+    enumeration continues where it stopped.
+    """
+
+    def __init__(self, limits: List[int], directory: str, shards: int = None, enumerator_cls=NaiveEnumerator,
+                 batch_size: int = 4096, checkpoint_every: int = 64):
+        self.limits = list(limits)
+        self.directory = directory
+        self.shards = shards or os.cpu_count() or 1
+        self.enumerator_cls = enumerator_cls
+        self.batch_size = batch_size
+        self.checkpoint_every = checkpoint_every
+        pool, size = enumerator_cls(self.limits).combination_space()
+        self.total = math.comb(pool, size)
+
+    def ranges(self) -> List[Tuple[int, int]]:
+        bounds = [self.total * ix // self.shards for ix in range(self.shards + 1)]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def run(self, processes: int = None) -> np.ndarray:
+        """
+        :param processes: number of worker processes (None - number of CPUs)
+        :return: distinct normals (first non-zero coefficient positive) of all shards
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(_run_shard, self.enumerator_cls, self.limits, shard, start, stop,
+                                       self.directory, self.batch_size, self.checkpoint_every)
+                       for shard, (start, stop) in enumerate(self.ranges())]
+            results = [future.result() for future in futures]
+        return np.unique(np.concatenate(results), axis=0)
@@ -0,0 +1,77 @@
+from typing import List
+
+import numpy as np
+
+from itertools import chain, combinations, islice, product
+
+from aistats.enumerator.point_enumerator import PointEnumerator
+from aistats.utils import integer_normals
+
+
+class SymmetricEnumerator(PointEnumerator):
+    """
+    Enumerates point sets up to symmetries which do not change their normal - the first point is fixed to the
+    origin (translation), only primitive difference vectors with positive first non-zero coordinate are used
+    (scaling and reflection) and the vectors of a set are in lexicographic order (reordering). A set is kept if
+    its vectors are independent and some choice of their signs fits the box given by limits, so every normal of
+    NaiveEnumerator is still produced.
+    """
+
+    def __init__(self, limits: List[int]):
+        super().__init__(limits)
+        self.vectors = self._canonical_vectors()
+        # sign patterns with the first vector positive (flipping all of them does not change the fit)
+        signs = np.array(list(product([1, -1], repeat=self.dimensions - 1)), dtype=np.int64)
+        self.signs = signs[:len(signs) // 2]
+
+    def _canonical_vectors(self) -> np.ndarray:
+        grid = np.array(list(product(*(range(-lim, lim + 1) for lim in self.limits))), dtype=np.int64)
+        nzi = (grid != 0).argmax(axis=1)
+        positive = grid[np.arange(len(grid)), nzi] > 0
+        primitive = np.gcd.reduce(grid, axis=1) == 1
+        return grid[positive & primitive]
+
+    def generate_points(self):
+        for batch in self.generate_point_batches():
+            yield from batch
+
+    def generate_point_batches(self, batch_size: int = 4096):
+        """
+        :param batch_size: number of combinations of vectors processed at once
+        :return: generator of arrays (point sets x (dimensions - 1) x dimensions)
+        """
+        pool, size = self.combination_space()
+        indices = combinations(range(pool), size)
+        while True:
+            flat = np.fromiter(chain.from_iterable(islice(indices, batch_size)), dtype=np.int64)
+            if len(flat) == 0:
+                return
+            out = self.combination_points(flat.reshape(-1, size))
+            if len(out):
+                yield out
+
+    def combination_space(self) -> (int, int):
+        """
+        :return: (number of items, size of combination) - point sets are combinations of canonical vectors
+        """
+        return len(self.vectors), self.dimensions - 1
+
+    def combination_points(self, combinations_: np.ndarray) -> np.ndarray:
+        """
+        :param combinations_: matrix of combinations (one per row) of indices of canonical vectors
+        :return: independent point sets fitting the box
+        """
+        out = self.vectors[combinations_]
+        keep = self._fits_box(out)
+        # exact check - the vectors are independent iff their normal is non-zero
+        keep[keep] = integer_normals(out[keep]).any(axis=1)
+        return out[keep].astype(np.float64)
+
+    def _fits_box(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        :param vectors: array (sets x (dimensions - 1) x dimensions)
+        :return: boolean array - True if the origin and vectors with some signs can be translated into the box
+        """
+        signed = self.signs[None, :, :, None] * vectors[:, None, :, :]  # sets x signs x vectors x dimensions
+        spread = np.maximum(signed.max(axis=2), 0) - np.minimum(signed.min(axis=2), 0)
+        return (spread <= np.array(self.limits)).all(axis=2).any(axis=1)
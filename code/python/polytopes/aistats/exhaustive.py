@@ -0,0 +1,107 @@
+import numpy as np
+import polytope
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from scipy.spatial import ConvexHull, QhullError
+
+from typing import Optional
+
+from clauses.cnf import MLN
+from clauses.grounding import Grounding
+from clauses.world_evaluator import WorldEvaluator
+
+
+def _count_worlds(evaluator: WorldEvaluator, atoms: np.ndarray, bounds: (int, int)) -> np.ndarray:
+    """
+    :param evaluator: evaluator of the MLN
+    :param atoms: flat index (in the worlds of evaluator) of the atom of each bit
+    :param bounds: range of worlds - the bits of a world are the bits of its number
+    :return: distinct count vectors of the worlds
+    """
+    codes = np.arange(bounds[0], bounds[1], dtype=np.int64)
+    bits = np.zeros((len(codes), evaluator.atom_number), dtype=np.bool_)
+    bits[:, atoms] = (codes[:, None] >> np.arange(len(atoms), dtype=np.int64)) & 1
+    return np.unique(evaluator.evaluate_many(evaluator.split(bits)), axis=0)
+
+
+class ExhaustiveRmp:
+    """
+    Exact set of realizable count vectors of an MLN for a small domain - all 2^atoms worlds over the ground atoms
+    appearing in groundings are enumerated in chunks of consecutive world numbers, counted by WorldEvaluator and
+    deduplicated per chunk. Chunks can be processed in parallel processes. The convex hull of the set is the RMP
+    which HeuristicSolver and AiStatsRmpSolver approximate.
+    """
+
+    def __init__(self, mln: MLN, domain_size: int, reflexive: bool = True, chunk_size: int = 1 << 14,
+                 processes: int = 1, max_atoms: int = 32):
+        """
+        :param mln: MLN
+        :param domain_size: domain size
+        :param chunk_size: number of worlds evaluated at once
+        :param processes: number of worker processes, 1 - evaluate in this process
+        :param max_atoms: greatest number of ground atoms accepted
+        """
+        self.mln = mln
+        self.domain_size = domain_size
+        self.evaluator = WorldEvaluator.from_mln(mln, domain_size, reflexive)
+        compiled = self.evaluator.compiled
+        grounding = Grounding(compiled.formulas, reflexive, compiled).ground(domain_size)
+        atoms = []
+        for predicate, args in grounding.atoms:
+            pid = compiled.predicate_ids[predicate]
+            index = [domain_size - arg - 1 if arg < 0 else arg for arg in args]
+            offset = np.ravel_multi_index(index, self.evaluator.shapes[pid]) if index else 0
+            atoms.append(self.evaluator.atom_offsets[pid] + offset)
+        self.atoms = np.array(atoms, dtype=np.int64)
+        if len(self.atoms) > max_atoms:
+            raise ValueError(f"{len(self.atoms)} ground atoms, at most {max_atoms} can be enumerated.")
+        self.chunk_size = chunk_size
+        self.processes = processes
+        self._points = None
+
+    @property
+    def world_number(self) -> int:
+        return 1 << len(self.atoms)
+
+    def points(self) -> np.ndarray:
+        """
+        :return: realizable count vectors (one per row, sorted lexicographically)
+        """
+        if self._points is None:
+            chunks = [(start, min(start + self.chunk_size, self.world_number))
+                      for start in range(0, self.world_number, self.chunk_size)]
+            count = partial(_count_worlds, self.evaluator, self.atoms)
+            points = np.empty((0, self.evaluator.compiled.formula_number), dtype=np.int64)
+            if self.processes > 1 and len(chunks) > 1:
+                with ProcessPoolExecutor(self.processes) as executor:
+                    for found in executor.map(count, chunks):
+                        points = np.unique(np.concatenate((points, found)), axis=0)
+            else:
+                for found in map(count, chunks):
+                    points = np.unique(np.concatenate((points, found)), axis=0)
+            self._points = points
+        return self._points
+
+    def hull(self) -> Optional[ConvexHull]:
+        """
+        :return: convex hull of realizable count vectors, None if they are not full-dimensional
+        """
+        try:
+            return ConvexHull(self.points().astype(np.float64))
+        except QhullError as e:
+            print(e)
+            return None
+
+    def vertices(self) -> np.ndarray:
+        """
+        :return: realizable count vectors which are vertices of the RMP
+        """
+        hull = self.hull()
+        return self.points() if hull is None else self.points()[hull.vertices]
+
+    def polytope(self) -> polytope.Polytope:
+        """
+        :return: RMP in the representation of AiStatsRmpSolver.rmp (empty if not full-dimensional)
+        """
+        return polytope.qhull(self.points().astype(np.float64))
@@ -8,12 +8,16 @@ import random
 import pypoman
 import numpy as np
 import gurobipy as g
+import tracing
 
+from scipy.optimize import linprog
 from scipy.spatial.qhull import ConvexHull
 
+from aistats.local_search import LocalSearchSampler
 from aistats.oracle.oracle_caller import OracleCaller
 from aistats.rmp import Rmp, Vertex
 from clauses.cnf import MLN, Constant
+from clauses.compiled import CompiledMLN
 from possible_world import PossibleWorld
 
 
@@ -33,6 +37,10 @@ class HeuristicSolver:
         self.tolerance = tolerance
         self.domain_constants = [Constant(f"Cons_{i}") for i in range(self.domain_size)]
         self.vertices = {}
+        self.samples = set()
+        self.compiled = CompiledMLN.from_mln(mln)
+        self.outer_normals = None
+        self.outer_bounds = None
 
     def calculate_limits(self) -> List[int]:
         wfs = self.mln.weighted_formulas
@@ -51,12 +59,23 @@ class HeuristicSolver:
             out = out.union(pset)
         return out
 
-    def solve(self, method: str = 'ilp', relaxation: float = -1.0):
+    def solve(self, method: str = 'ilp', relaxation: float = -1.0, seeds: int = 16, lp_directions: int = 0,
+              seed: int = None):
+        """
+        :param method: 'ilp' - cuts by exact ILP, 'qhull' - convex hull grown by points furthest from its facets
+        :param relaxation: fraction of skipped cuts of the ILP method
+        :param seeds: number of random directions of local search seeding the convex hull (qhull method)
+        :param lp_directions: number of random directions of the LP outer approximation (qhull method), facets
+        where it meets the convex hull are not searched by the ILP; 0 - no outer approximation
+        :param seed: seed of the random directions and of local search (qhull method)
+        """
+        if method == 'qhull':
+            self.seed_vertices(seeds, seed=seed)
         # 1] check feasibility of all vertices as standard SAT
         not_a_corners = {}
         for k, v in self.rmp.vertices.items():
             print(k, v)
-            feas = self.calculate_ilp_vtx(k)
+            feas = k in self.vertices or k in self.samples or self.calculate_ilp_vtx(k)
             print(f"FEASIBLE: {feas}")
             if not feas:
                 not_a_corners[k] = v
@@ -69,7 +88,10 @@ class HeuristicSolver:
         elif method == 'qhull':
             print("QHULL")
             self.get_initial_qhull()
-            pw = PossibleWorld(self.domain_constants, self.mln.weighted_formulas, [], self.reflexive)
+            pw = PossibleWorld(self.domain_constants, self.mln.weighted_formulas, [], self.reflexive,
+                               compiled=self.compiled)
+            if lp_directions > 0:
+                self.lp_outer_approximation(pw, lp_directions, seed)
             ix = 0
             from collections import deque
             facets_ix = deque()
@@ -79,24 +101,76 @@ class HeuristicSolver:
             while len(facets_ix) > 0:
                 eq = facets_ix.popleft()
                 print("FACET: ", eq)
-                feasible, n_vertex, dstnc = pw.furthest_from_hull(self.convex_hull, self.limits, eq,
-                                                                  write=True, write_file=f"lps/qhull/lp-{ix}.lp")
+                if self.outer_normals is not None and self.facet_is_tight(pw, eq):
+                    print("Facet is tight in the LP outer approximation")
+                    tracing.count("skipped facets")
+                    continue
+                with tracing.span("facet"):
+                    feasible, n_vertex, dstnc = pw.furthest_from_hull(self.convex_hull, self.limits, eq,
+                                                                      write=True, write_file=f"lps/qhull/lp-{ix}.lp")
                 print(feasible, n_vertex, dstnc)
                 if feasible and dstnc > 1E-6:
-                    self.convex_hull.add_points(np.array([n_vertex]))
+                    with tracing.span("hull update"):
+                        self.convex_hull.add_points(np.array([n_vertex]))
                     print(self.convex_hull.equations)
                     for nix in range(-dims, 0):
                         facets_ix.append(self.convex_hull.equations[nix])
                     print(f"Found new vertex with distance {dstnc}, coordinates {n_vertex}")
+            if self.convex_hull is not None:
+                for point in self.convex_hull.points[self.convex_hull.vertices]:
+                    position = tuple(int(round(x)) for x in point)
+                    if position not in self.vertices:
+                        self.vertices[position] = Vertex(position)
 
         for k, v in not_a_corners.items():
             print(f"NOT A CORNER: {k}, {v}")
             for nei in v.neighbours:
                 pass
 
+    def seed_vertices(self, seeds: int, restarts: int = 5, seed: int = None) -> None:
+        """
+        Adds count vectors of worlds found by local search towards the unit directions and the given number
+        of random directions to samples (realizable points, not necessarily vertices), so the initial convex hull
+        rarely needs the exact ILP.
+        """
+        with tracing.span("local search", seeds=seeds):
+            sampler = LocalSearchSampler(self.compiled, self.domain_size, self.reflexive, seed)
+            self.samples.update(sampler.extreme_points(sampler.directions(seeds), restarts))
+        print(f"Local search found {len(self.samples)} points")
+
+    def lp_outer_approximation(self, pw: PossibleWorld, directions: int, seed: int = None) -> None:
+        """
+        Bounds the RMP by LP relaxations of the counts along unit and random directions.
+        """
+        units = np.eye(len(self.limits))
+        normals = np.row_stack((units, -units, np.random.default_rng(seed).normal(size=(directions, len(units)))))
+        with tracing.span("lp outer approximation", directions=len(normals)):
+            self.outer_normals, self.outer_bounds = normals, pw.relaxed_bounds(normals)
+
+    def facet_is_tight(self, pw: PossibleWorld, facet_eq, tolerance: float = 1E-6) -> bool:
+        """
+        Checks whether no point of the outer approximation lies beyond a facet of the convex hull. The facet normal
+        is maximized over the outer approximation first, the LP relaxation along the normal (added to the outer
+        approximation) decides only if that is not enough.
+        :param facet_eq: facet in the qhull form a x + c <= 0
+        :return: True if no realizable point is further than tolerance from the facet
+        """
+        normal, offset = np.asarray(facet_eq[:-1]), facet_eq[-1]
+        finite = np.isfinite(self.outer_bounds)
+        res = linprog(-normal, A_ub=self.outer_normals[finite], b_ub=self.outer_bounds[finite],
+                      bounds=[(0, lim) for lim in self.limits], method="highs")
+        if res.status == 0 and -res.fun + offset <= tolerance:
+            return True
+        with tracing.span("lp bound"):
+            bound = pw.relaxed_bounds(normal)[0]
+        self.outer_normals = np.row_stack((self.outer_normals, normal))
+        self.outer_bounds = np.append(self.outer_bounds, bound)
+        return bound + offset <= tolerance
+
     def get_initial_qhull(self):
         try:
-            self.convex_hull = ConvexHull(np.array([v for v in self.vertices]), incremental=True)
+            self.convex_hull = ConvexHull(np.array([v for v in self.samples.union(self.vertices)]),
+                                          incremental=True)
         except Exception as e:
             print(e)
         if self.convex_hull is None:
@@ -104,7 +178,8 @@ class HeuristicSolver:
                 self.vertices[vtx.position] = vtx
                 if len(self.vertices) >= len(self.limits) + 1:
                     try:
-                        self.convex_hull = ConvexHull(np.array([v for v in self.vertices]), incremental=True)
+                        self.convex_hull = ConvexHull(np.array([v for v in self.samples.union(self.vertices)]),
+                                                      incremental=True)
                     except Exception as e:
                         print(e)
                     # run exact ILP sorver until all points are found
@@ -117,7 +192,8 @@ class HeuristicSolver:
         ord_lims = [(ix, lim) for ix, lim in enumerate(self.limits)]
         ord_lims.sort(key=lambda x: x[1])
         # for each coordinate except the last one call ILP with weights
-        pw = PossibleWorld(self.domain_constants, self.mln.weighted_formulas, [], self.reflexive)
+        pw = PossibleWorld(self.domain_constants, self.mln.weighted_formulas, [], self.reflexive,
+                           compiled=self.compiled)
         trailing_idx = ord_lims[-1][0]
         print(ord_lims)
         for cut in itertools.product(
@@ -129,7 +205,8 @@ class HeuristicSolver:
             sat_cstrs = self.satisfiable_constraints(cut, ord_lims, trailing_idx, 0, 'ge')
             print(sat_cstrs)
             # get minimal value for last idx if feasible
-            satisfiable, lim = pw.satisfiable(sat_cstrs, opt_var_idx=trailing_idx, sense=g.GRB.MINIMIZE)
+            with tracing.span("cut", cut=list(cut), sense="min"):
+                satisfiable, lim = pw.satisfiable(sat_cstrs, opt_var_idx=trailing_idx, sense=g.GRB.MINIMIZE)
             if not satisfiable:
                 continue
             zcoord = lim[trailing_idx]
@@ -138,7 +215,8 @@ class HeuristicSolver:
             if tup not in self.vertices:
                 yield vtx
             # and then get maximal value
-            satisfiable2, lim2 = pw.satisfiable(sat_cstrs, opt_var_idx=trailing_idx, sense=g.GRB.MAXIMIZE)
+            with tracing.span("cut", cut=list(cut), sense="max"):
+                satisfiable2, lim2 = pw.satisfiable(sat_cstrs, opt_var_idx=trailing_idx, sense=g.GRB.MAXIMIZE)
             if satisfiable2:
                 zcoord = lim2[trailing_idx]
                 tup, vtx = self.build_a_vertex(cut, ord_lims, zcoord, trailing_idx)
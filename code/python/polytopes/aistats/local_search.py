@@ -0,0 +1,125 @@
+import numpy as np
+
+from typing import List, Set, Tuple
+
+from clauses.compiled import CompiledMLN
+from clauses.grounding import Grounding
+
+
+class LocalSearchSampler:
+    """
+    Stochastic local search for worlds with extreme satisfaction counts - for a direction w, ground atoms are
+    flipped while w . counts increases, local optima are perturbed by random flips (iterated local search). The
+    change of the counts after a flip is evaluated only on the groundings containing the flipped atom (per-atom
+    index of groundings). Count vectors of visited local optima are realizable, so their convex hull is an inner
+    approximation of the RMP.
+    """
+
+    def __init__(self, compiled: CompiledMLN, domain_size: int, reflexive: bool = True, seed: int = None):
+        grounding = Grounding(compiled.formulas, reflexive, compiled).ground(domain_size)
+        self.atom_number = grounding.atom_number(domain_size)
+        self.formula_number = compiled.formula_number
+        self.groundings = []  # type: List[Tuple[Tuple[int, ...], ...]]
+        self.formula_of = []  # type: List[int]
+        self.atom_groundings = [[] for _ in range(self.atom_number)]  # type: List[List[int]]
+        for ix in range(self.formula_number):
+            for ground in grounding.formula_groundings(ix, domain_size):
+                gid = len(self.groundings)
+                self.groundings.append(ground)
+                self.formula_of.append(ix)
+                for atom in {abs(lit) - 1 for clause in ground for lit in clause}:
+                    self.atom_groundings[atom].append(gid)
+        self.rng = np.random.default_rng(seed)
+        self.values = [False] * self.atom_number
+        self.satisfied = [False] * len(self.groundings)
+        self.counts = np.zeros(self.formula_number, dtype=np.int64)
+        self.reset()
+
+    def reset(self, values=None) -> None:
+        """
+        :param values: truth value of each ground atom (default: random world)
+        """
+        if values is None:
+            values = self.rng.random(self.atom_number) < 0.5
+        self.values = [bool(v) for v in values]
+        self.satisfied = [self._satisfied(gid) for gid in range(len(self.groundings))]
+        self.counts = np.bincount(self.formula_of, weights=self.satisfied, minlength=self.formula_number) \
+            .astype(np.int64)
+
+    def _satisfied(self, gid: int) -> bool:
+        values = self.values
+        return all(any(values[lit - 1] if lit > 0 else not values[-lit - 1] for lit in clause)
+                   for clause in self.groundings[gid])
+
+    def flip_delta(self, atom: int) -> np.ndarray:
+        """
+        :return: change of counts of formulas if the atom was flipped
+        """
+        out = np.zeros(self.formula_number, dtype=np.int64)
+        self.values[atom] = not self.values[atom]
+        for gid in self.atom_groundings[atom]:
+            out[self.formula_of[gid]] += self._satisfied(gid) - self.satisfied[gid]
+        self.values[atom] = not self.values[atom]
+        return out
+
+    def flip(self, atom: int) -> None:
+        self.values[atom] = not self.values[atom]
+        for gid in self.atom_groundings[atom]:
+            satisfied = self._satisfied(gid)
+            self.counts[self.formula_of[gid]] += satisfied - self.satisfied[gid]
+            self.satisfied[gid] = satisfied
+
+    def climb(self, direction: np.ndarray, max_passes: int = 100) -> None:
+        """
+        Flips atoms in random order while some flip increases direction . counts.
+        """
+        for _ in range(max_passes):
+            improved = False
+            for atom in self.rng.permutation(self.atom_number):
+                if direction @ self.flip_delta(atom) > 1E-9:
+                    self.flip(atom)
+                    improved = True
+            if not improved:
+                return
+
+    def maximize(self, direction, restarts: int = 5, perturbation: float = 0.2) -> (np.ndarray, Set[tuple]):
+        """
+        :param direction: weights of formulas
+        :param restarts: number of perturbations of the best local optimum
+        :param perturbation: fraction of atoms flipped by a perturbation
+        :return: (counts of the best world found, counts of all local optima)
+        """
+        direction = np.asarray(direction, dtype=np.float64)
+        self.reset()
+        self.climb(direction)
+        best_values, best_counts = list(self.values), self.counts.copy()
+        visited = {tuple(best_counts.tolist())}
+        flips = min(self.atom_number, max(1, int(perturbation * self.atom_number)))
+        for _ in range(restarts):
+            for atom in self.rng.choice(self.atom_number, flips, replace=False):
+                self.flip(atom)
+            self.climb(direction)
+            visited.add(tuple(self.counts.tolist()))
+            if direction @ self.counts > direction @ best_counts:
+                best_values, best_counts = list(self.values), self.counts.copy()
+            else:
+                self.reset(best_values)
+        return best_counts, visited
+
+    def directions(self, number: int) -> np.ndarray:
+        """
+        :return: positive and negative unit vectors followed by number random directions
+        """
+        units = np.eye(self.formula_number)
+        return np.row_stack((units, -units, self.rng.normal(size=(number, self.formula_number))))
+
+    def extreme_points(self, directions, restarts: int = 5) -> Set[tuple]:
+        """
+        :param directions: matrix of directions (one per row)
+        :return: count vectors of local optima found for the directions
+        """
+        out = set()
+        for direction in directions:
+            _, visited = self.maximize(direction, restarts)
+            out.update(visited)
+        return out
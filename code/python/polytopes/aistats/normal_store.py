@@ -0,0 +1,157 @@
+import os
+
+import numpy as np
+
+EMPTY = -1
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+class NormalStore:
+    """
+    Set of integer normals with coefficients bounded by bounds. A normal is packed into one int64 key (mixed radix
+    2 * bound + 1 per coefficient) kept in an open-addressing table with linear probing, which can be placed in
+    a memory-mapped file. Normals outside of the bounds, or all normals if the keys do not fit into int64, are kept
+    as bytes in a Python set.
+    """
+
+    def __init__(self, bounds, capacity: int = 1024, path: str = None):
+        self.bounds = np.array(bounds, dtype=np.int64)
+        self.path = path
+        radices = [2 * int(b) + 1 for b in self.bounds]
+        total = 1
+        for radix in radices:
+            total *= radix
+        self.packed = total < 2 ** 63
+        self.weights = np.cumprod([1] + radices[:-1]).astype(np.int64) if self.packed else None
+        self.overflow = set()
+        self.size = 0
+        capacity = 1 << max(4, int(capacity - 1).bit_length())
+        self.table = self._allocate(capacity, self.path)
+
+    def __len__(self) -> int:
+        return self.size + len(self.overflow)
+
+    def __contains__(self, normal) -> bool:
+        return bool(self.contains_many(np.asarray(normal)[None, :])[0])
+
+    def add(self, normal) -> bool:
+        """
+        :param normal: integer vector
+        :return: True if the normal was not in the store
+        """
+        return bool(self.add_many(np.asarray(normal)[None, :])[0])
+
+    def contains_many(self, normals: np.ndarray) -> np.ndarray:
+        """
+        :param normals: matrix of integer normals (one per row)
+        :return: boolean array
+        """
+        normals = np.asarray(normals, dtype=np.int64).reshape(len(normals), len(self.bounds))
+        packable = self._packable(normals)
+        result = np.zeros(len(normals), dtype=np.bool_)
+        for ix in np.flatnonzero(~packable):
+            result[ix] = normals[ix].tobytes() in self.overflow
+        if packable.any():
+            result[packable] = self._find(self._keys(normals[packable]))
+        return result
+
+    def add_many(self, normals: np.ndarray) -> np.ndarray:
+        """
+        :param normals: matrix of integer normals (one per row)
+        :return: boolean array, True for normals that were not in the store (only the first of repeated rows)
+        """
+        normals = np.asarray(normals, dtype=np.int64).reshape(len(normals), len(self.bounds))
+        out = np.zeros(len(normals), dtype=np.bool_)
+        packable = self._packable(normals)
+        for ix in np.flatnonzero(~packable):
+            key = normals[ix].tobytes()
+            if key not in self.overflow:
+                self.overflow.add(key)
+                out[ix] = True
+        if packable.any():
+            rows = np.flatnonzero(packable)
+            keys, first = np.unique(self._keys(normals[rows]), return_index=True)
+            while (self.size + len(keys)) * 2 > len(self.table):
+                self._grow()
+            out[rows[first]] = self._insert(keys)
+        return out
+
+    def normals(self) -> np.ndarray:
+        """
+        :return: matrix of all stored normals
+        """
+        out = [np.frombuffer(key, dtype=np.int64) for key in self.overflow]
+        keys = np.asarray(self.table[self.table != EMPTY])
+        if len(keys):
+            digits = (keys[:, None] // self.weights) % (2 * self.bounds + 1)
+            out.extend(digits - self.bounds)
+        return np.array(out, dtype=np.int64).reshape(-1, len(self.bounds))
+
+    def _packable(self, normals: np.ndarray) -> np.ndarray:
+        if not self.packed:
+            return np.zeros(len(normals), dtype=np.bool_)
+        return (np.abs(normals) <= self.bounds).all(axis=1)
+
+    def _keys(self, normals: np.ndarray) -> np.ndarray:
+        return (normals + self.bounds) @ self.weights
+
+    def _slots(self, keys: np.ndarray, capacity: int) -> np.ndarray:
+        # Fibonacci hashing - top bits of the key multiplied by the golden ratio
+        shift = np.uint64(64 - (capacity.bit_length() - 1))
+        with np.errstate(over='ignore'):
+            return ((keys.astype(np.uint64) * _GOLDEN) >> shift).astype(np.int64)
+
+    def _find(self, keys: np.ndarray) -> np.ndarray:
+        mask = len(self.table) - 1
+        slots = self._slots(keys, len(self.table))
+        found = np.zeros(len(keys), dtype=np.bool_)
+        active = np.arange(len(keys))
+        while len(active):
+            values = self.table[slots[active]]
+            found[active[values == keys[active]]] = True
+            active = active[(values != keys[active]) & (values != EMPTY)]
+            slots[active] = (slots[active] + 1) & mask
+        return found
+
+    def _insert(self, keys: np.ndarray) -> np.ndarray:
+        """
+        :param keys: distinct keys
+        :return: boolean array, True for inserted keys
+        """
+        mask = len(self.table) - 1
+        slots = self._slots(keys, len(self.table))
+        inserted = np.zeros(len(keys), dtype=np.bool_)
+        active = np.arange(len(keys))
+        while len(active):
+            values = self.table[slots[active]]
+            present = values == keys[active]
+            empty = values == EMPTY
+            # several keys may claim the same empty slot, only one of them wins
+            self.table[slots[active[empty]]] = keys[active[empty]]
+            won = empty & (self.table[slots[active]] == keys[active])
+            inserted[active[won]] = True
+            active = active[~(present | won)]
+            slots[active] = (slots[active] + 1) & mask
+        self.size += int(inserted.sum())
+        return inserted
+
+    def _grow(self) -> None:
+        keys = np.array(self.table[self.table != EMPTY])
+        capacity = 2 * len(self.table)
+        new_path = None if self.path is None else self.path + ".grow.npy"
+        self.table = self._allocate(capacity, new_path)
+        self.size = 0
+        self._insert(keys)
+        if self.path is not None:
+            self.table.flush()
+            del self.table
+            os.replace(new_path, self.path)
+            self.table = np.lib.format.open_memmap(self.path, mode="r+")
+
+    @staticmethod
+    def _allocate(capacity: int, path: str):
+        if path is None:
+            return np.full(capacity, EMPTY, dtype=np.int64)
+        table = np.lib.format.open_memmap(path, mode="w+", dtype=np.int64, shape=(capacity,))
+        table[:] = EMPTY
+        return table
@@ -0,0 +1,217 @@
+import hashlib
+import os
+
+import numpy as np
+
+from typing import Dict, Iterable, List, Tuple
+
+from aistats.oracle.ground_caller import LOG_2, branching_atom, components, condition, ground_factors
+from aistats.oracle.oracle_caller import OracleCaller
+from clauses.cnf import Formula, Predicate, WeightedFormula
+from clauses.grounding import Grounding
+
+SUM, LOG_SUM_EXP = 0, 1
+
+
+class Circuit:
+    """
+    Decision-DNNF circuit of a ground MLN in flat arrays. Value of a node is the (natural) logarithm of the sum of
+    weights of its models. Every edge adds a linear function of formula weights (number of groundings of each
+    formula satisfied on the edge) and a constant to the value of its child; SUM nodes (decompositions into
+    independent components) add these up, LOG_SUM_EXP nodes (decisions on an atom) log-sum-exp them. Node 0 is the
+    leaf with value 0, nodes are stored in topological order.
+    """
+
+    def __init__(self, node_kind: np.ndarray, edge_parent: np.ndarray, edge_child: np.ndarray,
+                 edge_counts: np.ndarray, edge_const: np.ndarray, root: int):
+        self.node_kind = node_kind
+        self.edge_parent = edge_parent
+        self.edge_child = edge_child
+        self.edge_counts = edge_counts
+        self.edge_const = edge_const
+        self.root = root
+        self.schedule = self._schedule()
+
+    @property
+    def node_number(self) -> int:
+        return len(self.node_kind)
+
+    def _schedule(self) -> List[Tuple[int, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Groups edges by the level of their parent (longest path to the leaf) and the kind of the parent, so all
+        nodes of a group can be evaluated at once.
+        :return: list of (kind, parent nodes, start of each parent's edges, edges sorted by parent)
+        """
+        levels = np.zeros(self.node_number, dtype=np.int64)
+        order = np.argsort(self.edge_parent, kind='stable')
+        parents, starts = np.unique(self.edge_parent[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        for parent, start, end in zip(parents, starts, ends):
+            levels[parent] = levels[self.edge_child[order[start:end]]].max() + 1
+        out = []
+        edge_key = levels[self.edge_parent] * 2 + self.node_kind[self.edge_parent]
+        for key in np.unique(edge_key):
+            edges = np.flatnonzero(edge_key == key)
+            edges = edges[np.argsort(self.edge_parent[edges], kind='stable')]
+            g_parents, g_starts = np.unique(self.edge_parent[edges], return_index=True)
+            out.append((int(key % 2), g_parents, g_starts, edges))
+        return out
+
+    def evaluate(self, weights: np.ndarray, chunk: int = 1 << 22) -> np.ndarray:
+        """
+        :param weights: matrix (number of weight vectors x number of formulas)
+        :param chunk: maximal number of (weight vector, edge) pairs evaluated at once
+        :return: natural logarithm of the partition function for each row of weights
+        """
+        weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+        rows = max(1, chunk // max(1, len(self.edge_parent)))
+        return np.concatenate([self._evaluate(weights[ix:ix + rows]) for ix in range(0, len(weights), rows)])
+
+    def _evaluate(self, weights: np.ndarray) -> np.ndarray:
+        values = np.zeros((len(weights), self.node_number))
+        edge_terms = weights @ self.edge_counts.T + self.edge_const
+        for kind, parents, starts, edges in self.schedule:
+            contrib = values[:, self.edge_child[edges]] + edge_terms[:, edges]
+            if kind == SUM:
+                values[:, parents] = np.add.reduceat(contrib, starts, axis=1)
+            else:
+                top = np.maximum.reduceat(contrib, starts, axis=1)
+                spread = np.repeat(top, np.diff(np.append(starts, len(edges))), axis=1)
+                values[:, parents] = top + np.log(np.add.reduceat(np.exp(contrib - spread), starts, axis=1))
+        return values[:, self.root]
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(path, node_kind=self.node_kind, edge_parent=self.edge_parent, edge_child=self.edge_child,
+                            edge_counts=self.edge_counts, edge_const=self.edge_const, root=self.root)
+
+    @staticmethod
+    def load(path: str) -> "Circuit":
+        data = np.load(path)
+        return Circuit(data["node_kind"], data["edge_parent"], data["edge_child"], data["edge_counts"],
+                       data["edge_const"], int(data["root"]))
+
+
+class CircuitCompiler:
+    """
+    Records the search of ComponentCounter (which does not depend on weights) as a circuit, components are
+    shared by the cache.
+    """
+
+    def __init__(self, formula_number: int, max_nodes: int = 1 << 20):
+        """
+        :param max_nodes: greatest number of nodes compiled, ValueError is raised above it
+        """
+        self.formula_number = formula_number
+        self.max_nodes = max_nodes
+        self.node_kind = [SUM]  # leaf
+        self.edges = []  # type: List[Tuple[int, int, np.ndarray, float]]
+        self.cache = {}  # type: Dict[Tuple, int]
+
+    def compile(self, factors, counts: np.ndarray = None, const: float = 0.0) -> Circuit:
+        """
+        :param factors: tuple of factors (formula index, tuple of clauses)
+        :param counts: numbers of always satisfied groundings of formulas added to the root
+        :param const: constant added to the root
+        :return: circuit
+        """
+        counts = np.zeros(self.formula_number, dtype=np.int64) if counts is None else counts
+        root = self._node(SUM, [(self._decompose(factors), counts, const)])
+        edges = self.edges
+        return Circuit(np.array(self.node_kind, dtype=np.int64),
+                       np.array([e[0] for e in edges], dtype=np.int64),
+                       np.array([e[1] for e in edges], dtype=np.int64),
+                       np.array([e[2] for e in edges], dtype=np.int64).reshape(len(edges), self.formula_number),
+                       np.array([e[3] for e in edges], dtype=np.float64), root)
+
+    def _node(self, kind: int, children) -> int:
+        node = len(self.node_kind)
+        if node >= self.max_nodes:
+            raise ValueError(f"Circuit exceeds {self.max_nodes} nodes.")
+        self.node_kind.append(kind)
+        for child, counts, const in children:
+            self.edges.append((node, child, counts, const))
+        return node
+
+    def _decompose(self, factors) -> int:
+        if not factors:
+            return 0
+        parts = [self._component(component) for component in components(factors)]
+        if len(parts) == 1:
+            return parts[0]
+        zeros = np.zeros(self.formula_number, dtype=np.int64)
+        return self._node(SUM, [(part, zeros, 0.0) for part in parts])
+
+    def _component(self, factors) -> int:
+        if factors in self.cache:
+            return self.cache[factors]
+        atom = branching_atom(factors)
+        atoms = {abs(lit) for _, clauses in factors for clause in clauses for lit in clause}
+        children = []
+        for literal in (atom, -atom):
+            rest, satisfied, rest_atoms = condition(factors, literal)
+            counts = np.bincount(np.array(satisfied, dtype=np.int64), minlength=self.formula_number)
+            children.append((self._decompose(rest), counts, (len(atoms) - len(rest_atoms) - 1) * LOG_2))
+        node = self._node(LOG_SUM_EXP, children)
+        self.cache[factors] = node
+        return node
+
+
+class CircuitCaller(OracleCaller):
+    """
+    Compiles the ground MLN once per structure and domain size and evaluates the circuit for whole matrices of
+    weights. Compiled circuits can be stored in a directory and reused by later runs.
+
+    The circuit is a ground decision-DNNF (the search of ComponentCounter), not a lifted circuit as compiled by
+    Forclift - its size grows exponentially with the domain size for MLNs which are not decomposed into small
+    components (e.g. binary predicates shared by several formulas). It is meant for small domains (a few elements,
+    tens of ground atoms) as a fallback of Fo2WfomcCaller; compilation stops with ValueError (NaN results) above
+    max_nodes nodes.
+    """
+
+    def __init__(self, cache_dir: str = None, reflexive: bool = True, max_nodes: int = 1 << 20):
+        """
+        :param cache_dir: directory of compiled circuits, None - circuits are not stored
+        :param max_nodes: greatest number of nodes of a compiled circuit
+        """
+        super().__init__()
+        self.cache_dir = cache_dir
+        self.reflexive = reflexive
+        self.max_nodes = max_nodes
+        self.groundings = {}  # type: Dict[Tuple[str, ...], Grounding]
+        self.circuits = {}  # type: Dict[Tuple, Circuit]
+
+    def call_oracle(self, domain_size: int, atoms: Iterable[Predicate], cnfs: List[WeightedFormula]) -> float:
+        weights = np.array([[cnf.weight for cnf in cnfs]], dtype=np.float64)
+        return float(self.call_oracle_many(domain_size, atoms, [cnf.formula for cnf in cnfs], weights)[0])
+
+    def call_oracle_many(self, domain_size: int, atoms: Iterable[Predicate], formulas: List[Formula],
+                         weights: np.ndarray) -> np.ndarray:
+        try:
+            circuit = self.circuit(domain_size, atoms, formulas)
+        except ValueError as e:
+            print(e)
+            return np.full(len(np.atleast_2d(weights)), np.nan)
+        return circuit.evaluate(weights)
+
+    def circuit(self, domain_size: int, atoms: Iterable[Predicate], formulas: List[Formula]) -> Circuit:
+        f_key = tuple(f.structural_hash() for f in formulas)
+        key = (f_key, tuple(sorted(str(p) for p in atoms)), domain_size, self.reflexive)
+        if key in self.circuits:
+            return self.circuits[key]
+        path = None
+        if self.cache_dir is not None:
+            digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+            path = os.path.join(self.cache_dir, f"circuit-{digest}.npz")
+            if os.path.exists(path):
+                self.circuits[key] = Circuit.load(path)
+                return self.circuits[key]
+        if f_key not in self.groundings:
+            self.groundings[f_key] = Grounding(formulas, self.reflexive)
+        factors, tautologies, free = ground_factors(self.groundings[f_key].ground(domain_size), domain_size, atoms)
+        compiler = CircuitCompiler(len(formulas), self.max_nodes)
+        circuit = compiler.compile(factors, np.array(tautologies, dtype=np.int64), free * LOG_2)
+        if path is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            circuit.save(path)
+        self.circuits[key] = circuit
+        return circuit
@@ -0,0 +1,196 @@
+import itertools
+import math
+
+import numpy as np
+
+from scipy.special import gammaln, logsumexp
+from typing import Dict, Iterable, List, Tuple
+
+from aistats.oracle.oracle_caller import OracleCaller
+from clauses.cnf import Formula, Predicate, WeightedFormula
+
+
+def in_fo2(formulas: List[Formula]) -> bool:
+    """
+    Checks that formulas are function and constant free with at most two logical variables and unary or binary
+    predicates, i.e. that they can be counted by the cell algorithm.
+    :param formulas:
+    :return: True if formulas belong to the two-variable fragment
+    """
+    for formula in formulas:
+        if len(formula.get_distinct_vars()) > 2:
+            return False
+        for clause in formula.clauses:
+            for literal in clause.literals:
+                if literal.atom.predicate.arity not in (1, 2) or literal.atom.distinct_const > 0:
+                    return False
+    return True
+
+
+class Fo2Structure:
+    """
+    Weight independent part of lifted weighted model counting in the two-variable fragment. Each domain element
+    belongs to a cell (1-type - values of unary atoms and binary atoms on the diagonal), each pair of distinct
+    elements is weighted by the values of binary atoms between them. Groundings of a formula satisfied in a cell
+    and in a pair are counted here, the weights are applied later in log-space.
+    """
+
+    def __init__(self, formulas: List[Formula]):
+        self.formulas = formulas
+        predicates = set()
+        for formula in formulas:
+            predicates = predicates.union(formula.get_distinct_predicates())
+        self.unary = sorted(p for p in predicates if p.arity == 1)
+        self.binary = sorted(p for p in predicates if p.arity == 2)
+        self.cell_index = {p: ix for ix, p in enumerate(self.unary + self.binary)}
+        self.pair_index = {p: ix for ix, p in enumerate(self.binary)}
+        # cells x (unary + diagonal binary atoms), pair configurations x (binary atoms a->b + binary atoms b->a)
+        self.cells = np.array(list(itertools.product([False, True], repeat=len(self.cell_index))), dtype=np.bool_)
+        self.configurations = np.array(list(itertools.product([False, True], repeat=2 * len(self.binary))),
+                                       dtype=np.bool_)
+        self.cell_counts = self._count_cells()
+        self.patterns, self.multiplicities = self._count_pairs()
+
+    @property
+    def cell_number(self) -> int:
+        return len(self.cells)
+
+    def _count_cells(self) -> np.ndarray:
+        out = np.zeros((len(self.formulas), self.cell_number), dtype=np.int64)
+        for ix, formula in enumerate(self.formulas):
+            roles = {v: 0 for v in formula.get_distinct_vars()}
+            out[ix, :] = self._evaluate(formula, roles, pair=False)
+        return out
+
+    def _count_pairs(self) -> (np.ndarray, np.ndarray):
+        k, s = self.cell_number, len(self.configurations)
+        counts = np.zeros((k, k, s, len(self.formulas)), dtype=np.int8)
+        for ix, formula in enumerate(self.formulas):
+            variables = formula.get_distinct_vars()
+            if len(variables) != 2:
+                continue
+            for roles in [{variables[0]: 0, variables[1]: 1}, {variables[0]: 1, variables[1]: 0}]:
+                counts[:, :, :, ix] += np.broadcast_to(self._evaluate(formula, roles, pair=True), (k, k, s))
+        # configurations with the same counts share the weight, keep only their number for each pair of cells
+        patterns, inverse = np.unique(counts.reshape(-1, len(self.formulas)), axis=0, return_inverse=True)
+        cell_pairs = np.repeat(np.arange(k * k), s)
+        multiplicities = np.bincount(cell_pairs * len(patterns) + inverse.ravel(), minlength=k * k * len(patterns))
+        return patterns, multiplicities.reshape(k, k, len(patterns))
+
+    def _evaluate(self, formula: Formula, roles: Dict[str, int], pair: bool) -> np.ndarray:
+        """
+        Evaluates formula for all cells (or pairs of cells and their configurations).
+        :param formula:
+        :param roles: maps variables to the first (0) or second (1) element of a pair
+        :param pair: if True, output has shape (cells, cells, configurations), else (cells, )
+        :return: boolean array
+        """
+        out = True
+        for clause in formula.clauses:
+            c_value = False
+            for literal in clause.literals:
+                value = self._atom_value(literal.atom, roles, pair)
+                c_value = c_value | (value if literal.positive else ~value)
+            out = out & c_value
+        return out
+
+    def _atom_value(self, atom, roles, pair) -> np.ndarray:
+        atom_roles = [roles[v.name] for v in atom.variables]
+        if atom.predicate.arity == 1 or atom_roles[0] == atom_roles[1]:
+            column = self.cells[:, self.cell_index[atom.predicate]]
+            if not pair:
+                return column
+            return column[:, None, None] if atom_roles[0] == 0 else column[None, :, None]
+        offset = 0 if atom_roles[0] == 0 else len(self.binary)
+        return self.configurations[None, None, :, offset + self.pair_index[atom.predicate]]
+
+    def log_partition(self, domain_size: int, weights: np.ndarray, chunk: int = 1 << 15) -> np.ndarray:
+        """
+        Sums weights of all possible worlds by counting elements in each cell.
+        :param domain_size:
+        :param weights: matrix (number of weight vectors x number of formulas)
+        :param chunk: number of cell count vectors processed at once
+        :return: natural logarithms of the partition function for each row of weights
+        """
+        k = self.cell_number
+        log_cells = weights @ self.cell_counts
+        with np.errstate(divide='ignore'):
+            log_mult = np.log(self.multiplicities)
+        log_pairs = logsumexp(log_mult[None, :, :, :] + (weights @ self.patterns.T)[:, None, None, :], axis=-1)
+        rows, cols = np.triu_indices(k)
+        log_pairs = log_pairs[:, rows, cols]
+        diagonal = rows == cols
+        partial = []
+        for counts in compositions(domain_size, k, chunk):
+            pair_counts = counts[:, rows] * counts[:, cols]
+            pair_counts[:, diagonal] = counts * (counts - 1) // 2
+            log_multinomial = gammaln(domain_size + 1) - gammaln(counts + 1).sum(axis=1)
+            terms = log_multinomial[:, None] + counts @ log_cells.T + pair_counts @ log_pairs.T
+            partial.append(logsumexp(terms, axis=0))
+        return logsumexp(np.array(partial), axis=0)
+
+
+def compositions(total: int, parts: int, chunk: int):
+    """
+    Generates all vectors of non-negative integers of given length summing to total (stars and bars).
+    :param total:
+    :param parts:
+    :param chunk: maximal number of rows in one yielded matrix
+    :return: generator of matrices (rows x parts)
+    """
+    if parts == 1:
+        yield np.array([[total]], dtype=np.int64)
+        return
+    bars = itertools.combinations(range(total + parts - 1), parts - 1)
+    while True:
+        flat = np.fromiter(itertools.chain.from_iterable(itertools.islice(bars, chunk)), dtype=np.int64)
+        if len(flat) == 0:
+            return
+        block = flat.reshape(-1, parts - 1)
+        edges = np.column_stack((np.full(len(block), -1), block, np.full(len(block), total + parts - 1)))
+        yield np.diff(edges, axis=1) - 1
+
+
+class Fo2WfomcCaller(OracleCaller):
+    """
+    In-process oracle for MLNs from the two-variable fragment, formulas outside of it are passed to the fallback
+    caller (e.g. Forclift).
+    """
+
+    def __init__(self, fallback: OracleCaller = None, max_compositions: int = 10 ** 7):
+        super().__init__()
+        self.fallback = fallback
+        self.max_compositions = max_compositions
+        self.structures = {}  # type: Dict[Tuple[str, ...], Fo2Structure]
+
+    def call_oracle(self, domain_size: int, atoms: Iterable[Predicate], cnfs: List[WeightedFormula]) -> float:
+        weights = np.array([[cnf.weight for cnf in cnfs]], dtype=np.float64)
+        formulas = [cnf.formula for cnf in cnfs]
+        if not self._supported(domain_size, formulas):
+            if self.fallback is None:
+                raise ValueError("Formulas are outside of the two-variable fragment.")
+            return self.fallback.call_oracle(domain_size, atoms, cnfs)
+        return float(self._log_partition(domain_size, atoms, formulas, weights)[0])
+
+    def call_oracle_many(self, domain_size: int, atoms: Iterable[Predicate], formulas: List[Formula],
+                         weights: np.ndarray) -> np.ndarray:
+        if not self._supported(domain_size, formulas):
+            if self.fallback is None:
+                raise ValueError("Formulas are outside of the two-variable fragment.")
+            return self.fallback.call_oracle_many(domain_size, atoms, formulas, weights)
+        return self._log_partition(domain_size, atoms, formulas, np.asarray(weights, dtype=np.float64))
+
+    def _supported(self, domain_size: int, formulas: List[Formula]) -> bool:
+        key = tuple(f.structural_hash() for f in formulas)
+        if key not in self.structures:
+            if not in_fo2(formulas):
+                return False
+            self.structures[key] = Fo2Structure(formulas)
+        k = self.structures[key].cell_number
+        return math.comb(domain_size + k - 1, k - 1) <= self.max_compositions
+
+    def _log_partition(self, domain_size, atoms, formulas, weights) -> np.ndarray:
+        structure = self.structures[tuple(f.structural_hash() for f in formulas)]
+        # predicates not present in formulas can be set arbitrarily
+        free = sum(domain_size ** p.arity for p in atoms if p not in structure.cell_index)
+        return structure.log_partition(domain_size, weights) + free * math.log(2)
@@ -1,4 +1,5 @@
 import os
+import queue
 import random
 import re
 import select
@@ -9,6 +10,7 @@ import tempfile
 from typing import Iterable, List
 
 from aistats.oracle.oracle_caller import OracleCaller
+from aistats.oracle.serializer import ForcliftSerializer
 from clauses.cnf import Predicate, WeightedFormula
 
 
@@ -16,9 +18,10 @@ class ForcliftV1(OracleCaller):
 
     OUTPUT_PATTERN = re.compile(r"Z\s*=\s*exp\((.*?)\)")
 
-    def __init__(self, path):
+    def __init__(self, path: str = None, precision: int = None):
         super().__init__()
         self.path = path
+        self.serializer = ForcliftSerializer(precision)
 
     def call_oracle(self, domain_size: int, atoms: Iterable[Predicate], cnfs: List[WeightedFormula],) -> float:
         with tempfile.TemporaryDirectory() as td:
@@ -35,12 +38,10 @@ class ForcliftV1(OracleCaller):
         return float(f_z_match.group(1))
 
     def write_file(self, domain_size: int, atoms: Iterable[Predicate], cnfs: List[WeightedFormula], f_name: str):
-        domain_name = "dom"
-        domain = f"{domain_name} = {{ 1, ..., {domain_size} }}\n"
-        with open(f_name, "w") as file:
-            file.write(domain)
-            file.writelines(f"{p.with_domain(domain_name)}\n" for p in atoms)
-            file.writelines(f"{cnf.weight} {cnf.formula}\n" for cnf in cnfs)
+        content = self.serializer.serialize(domain_size, atoms, [cnf.formula for cnf in cnfs],
+                                            [cnf.weight for cnf in cnfs])
+        with open(f_name, "wb") as file:
+            file.write(content)
 
 
 class ForcliftClientCaller(ForcliftV1):
@@ -54,6 +55,10 @@ class ForcliftClientCaller(ForcliftV1):
         self.port = port if port > 0 else random.randint(7300, 7400)
         self.server = self.start_server(wrapper_path) if start_new else None
         self.sockets = self._prepare_sockets(sockets)
+        # each call borrows one socket, so the caller can be used from several threads
+        self.idle_sockets = queue.Queue()
+        for sock in self.sockets:
+            self.idle_sockets.put(sock)
 
     def __del__(self):
         self.shutdown()
@@ -87,12 +92,17 @@ class ForcliftClientCaller(ForcliftV1):
         return z_value
 
     def send_input(self, file_name) -> float:
+        use_sock = self.idle_sockets.get()
+        try:
+            return self._send_input(use_sock, file_name)
+        finally:
+            self.idle_sockets.put(use_sock)
+
+    def _send_input(self, use_sock, file_name) -> float:
         rcvb = []
-        r, w, e = select.select(self.sockets, self.sockets, [], 5)
-        use_sock = w[0]
         use_sock.send(bytes(f"{file_name}\n", encoding='utf-8'))
         while True:
-            r, w, e = select.select([use_sock], [use_sock], [], 5)
+            r, w, e = select.select([use_sock], [], [], 5)
             if len(r) > 0:
                 data = r[0].recv(1024)
                 if not data:
@@ -134,7 +144,7 @@ class ForcliftClientCaller(ForcliftV1):
                             no_break = False
 
     def shutdown(self):
-        if self.server is not None:
+        if getattr(self, "server", None) is not None:
             try:
                 self.send_shutdown()
             except Exception as e:
@@ -143,5 +153,5 @@ class ForcliftClientCaller(ForcliftV1):
                 import os
                 import signal
                 os.kill(self.server.pid, signal.SIGKILL)
-        for sock in self.sockets:
+        for sock in getattr(self, "sockets", []):
             sock.close()
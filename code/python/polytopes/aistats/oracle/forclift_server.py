@@ -0,0 +1,161 @@
+import random
+import re
+import socketserver
+import threading
+
+import time
+
+from typing import List
+
+from aistats.oracle.circuit import CircuitCaller
+from aistats.oracle.fo2_caller import Fo2WfomcCaller
+from aistats.oracle.oracle_caller import OracleCaller
+from clauses.cnf import Atom, Clause, Formula, Literal, Predicate, Variable, WeightedFormula
+
+DOMAIN_RE = re.compile(r"^\s*(\w+)\s*=\s*\{\s*1\s*,\s*\.\.\.\s*,\s*(\d+)\s*\}\s*$")
+DECLARATION_RE = re.compile(r"^\s*(\w+)\(([\w\s,]*)\)\s*$")
+LITERAL_RE = re.compile(r"(!?)\s*(\w+)\(([\w\s,]*)\)")
+
+
+def parse_forclift_input(text: str) -> (int, List[Predicate], List[WeightedFormula]):
+    """
+    Parses Forclift input files as written by ForcliftSerializer - a domain line, predicate declarations and
+    weighted formulas (clauses in parentheses joined by ^, literals joined by v, negation !).
+    :return: (domain size, declared predicates, weighted formulas)
+    """
+    domain_size, predicates, formulas = None, {}, []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        domain = DOMAIN_RE.match(line)
+        declaration = DECLARATION_RE.match(line)
+        if domain is not None:
+            domain_size = int(domain.group(2))
+        elif declaration is not None:
+            arity = len(declaration.group(2).split(","))
+            predicates[declaration.group(1)] = Predicate(declaration.group(1), arity)
+        else:
+            weight, _, body = line.strip().partition(" ")
+            try:
+                formulas.append(WeightedFormula(float(weight), _parse_formula(body, predicates)))
+            except ValueError as e:
+                raise ValueError(f"Line {line_number}: {e} in '{line.strip()}'")
+    if domain_size is None:
+        raise ValueError("Missing domain declaration.")
+    return domain_size, list(predicates.values()), formulas
+
+
+def _parse_formula(body: str, predicates) -> Formula:
+    clauses = []
+    for clause in body.split("^"):
+        literals = []
+        for negation, name, args in LITERAL_RE.findall(clause):
+            if name not in predicates:
+                raise ValueError(f"undeclared predicate {name}")
+            variables = [Variable(arg.strip().upper()) for arg in args.split(",")]
+            if len(variables) != predicates[name].arity:
+                raise ValueError(f"wrong number of arguments of {name}")
+            literals.append(Literal(Atom(predicates[name], variables), not negation))
+        if not literals:
+            raise ValueError("empty clause")
+        clauses.append(Clause(literals))
+    return Formula(clauses)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        server = self.server  # type: ForcliftStandInServer
+        for line in self.rfile:
+            message = line.decode("utf-8").strip()
+            if not message:
+                self._reply("NO_FILE_GIVEN")
+            elif message.upper() == "CLOSE":
+                self._reply("CLOSED")
+                return
+            elif message.upper() == "SHUTDOWN":
+                self._reply("SHUTTING_DOWN")
+                threading.Thread(target=server.shutdown, daemon=True).start()
+                return
+            else:
+                self._reply(server.answer(message))
+
+    def _reply(self, message: str) -> None:
+        self.wfile.write(f"{message}\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+class ForcliftStandInServer(socketserver.ThreadingTCPServer):
+    """
+    Python implementation of the line protocol of ForcliftServer (forclift-rmp-wrapper) - a line with a path
+    of an input file is answered by the natural logarithm of the partition function, CALC_ERR if the file cannot
+    be read or evaluated, ERR on an unexpected error; CLOSE closes the connection and SHUTDOWN stops the server.
+    The partition function is computed by a local oracle caller. Latency of each answer and failures can be
+    injected for load testing.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int = 0, counter: OracleCaller = None, latency: float = 0.0, jitter: float = 0.0,
+                 failure_rate: float = 0.0, seed: int = None):
+        """
+        :param port: port on localhost, 0 - any free port
+        :param counter: oracle caller computing the answers (default: FO2 cells with circuits as fallback)
+        :param latency: seconds added to each answer
+        :param jitter: maximal random seconds added to the latency
+        :param failure_rate: probability of answering CALC_ERR regardless of the input
+        :param seed: seed of latency and failure injection
+        """
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.counter = counter or Fo2WfomcCaller(fallback=CircuitCaller())
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "ForcliftStandInServer":
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def answer(self, path: str) -> str:
+        with self.lock:
+            self.requests += 1
+            delay = self.latency + self.random.uniform(0.0, self.jitter)
+            failed = self.random.random() < self.failure_rate
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            return "CALC_ERR"
+        try:
+            with open(path) as f:
+                domain_size, atoms, cnfs = parse_forclift_input(f.read())
+            # the oracle callers keep caches which are not safe to fill concurrently
+            with self.lock:
+                return repr(float(self.counter.call_oracle(domain_size, atoms, cnfs)))
+        except (OSError, ValueError) as e:
+            print(e)
+            return "CALC_ERR"
+        except Exception as e:
+            print(e)
+            return "ERR"
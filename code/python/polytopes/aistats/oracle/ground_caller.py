@@ -0,0 +1,160 @@
+import math
+
+import numpy as np
+
+from typing import Dict, Iterable, List, Tuple
+
+from aistats.oracle.oracle_caller import OracleCaller
+from clauses.cnf import Formula, Predicate, WeightedFormula
+from clauses.grounding import Grounding
+
+LOG_2 = math.log(2)
+
+
+def condition(factors, literal: int) -> (Tuple, List, set):
+    """
+    Sets the literal to true in all factors (weighted ground formulas).
+    :param factors: tuple of factors (formula index, tuple of clauses)
+    :param literal: atom index + 1, negative for false
+    :return: (remaining factors, indices of formulas that became satisfied, atoms of remaining factors)
+    """
+    rest, satisfied, atoms = [], [], set()
+    for ix, clauses in factors:
+        n_clauses = []
+        falsified = False
+        for clause in clauses:
+            if literal in clause:
+                continue
+            if -literal in clause:
+                clause = tuple(lit for lit in clause if lit != -literal)
+                if not clause:
+                    falsified = True
+                    break
+            n_clauses.append(clause)
+        if falsified:
+            continue
+        if not n_clauses:
+            satisfied.append(ix)
+            continue
+        rest.append((ix, tuple(n_clauses)))
+        atoms.update(abs(lit) for clause in n_clauses for lit in clause)
+    return tuple(rest), satisfied, atoms
+
+
+def components(factors) -> List[Tuple]:
+    """
+    Splits factors into groups not sharing any atom.
+    :param factors: tuple of factors
+    :return: list of factor tuples
+    """
+    parent = {}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for _, clauses in factors:
+        atoms = [abs(lit) for clause in clauses for lit in clause]
+        for atom in atoms:
+            parent.setdefault(atom, atom)
+        root = find(atoms[0])
+        for atom in atoms[1:]:
+            parent[find(atom)] = root
+    groups = {}
+    for factor in factors:
+        groups.setdefault(find(abs(factor[1][0][0])), []).append(factor)
+    return [tuple(sorted(group)) for group in groups.values()]
+
+
+def branching_atom(factors) -> int:
+    occurrences = {}
+    for _, clauses in factors:
+        for clause in clauses:
+            for lit in clause:
+                occurrences[abs(lit)] = occurrences.get(abs(lit), 0) + 1
+    return max(occurrences, key=occurrences.get)
+
+
+def ground_factors(grounding: Grounding, domain_size: int, atoms: Iterable[Predicate]) -> (Tuple, List[int], int):
+    """
+    Collects ground formulas as factors for counting.
+    :param grounding:
+    :param domain_size:
+    :param atoms: all predicates of the MLN
+    :return: (sorted tuple of factors, number of always satisfied groundings of each formula, number of atoms
+    not present in any factor)
+    """
+    factors = []
+    tautologies = [0 for _ in grounding.formulas]
+    for ix in range(len(grounding.formulas)):
+        for clauses in grounding.formula_groundings(ix, domain_size):
+            if clauses:
+                factors.append((ix, clauses))
+            else:
+                tautologies[ix] += 1
+    used = {abs(lit) for _, clauses in factors for clause in clauses for lit in clause}
+    free = sum(domain_size ** p.arity for p in atoms) - len(used)
+    return tuple(sorted(factors)), tautologies, free
+
+
+class ComponentCounter:
+    """
+    DPLL-style weighted model counting of weighted ground formulas with decomposition into independent components
+    and caching of component counts.
+    """
+
+    def __init__(self, weights: List[float]):
+        self.weights = weights
+        self.cache = {}  # type: Dict[Tuple, float]
+        self.cache_hits = 0
+
+    def count(self, factors) -> float:
+        """
+        :param factors: tuple of factors (formula index, tuple of clauses), no factor is decided yet
+        :return: natural logarithm of the sum of weights of all assignments to atoms of factors
+        """
+        return sum(self._count_component(component) for component in components(factors))
+
+    def _count_component(self, factors) -> float:
+        if factors in self.cache:
+            self.cache_hits += 1
+            return self.cache[factors]
+        atom = branching_atom(factors)
+        atoms = {abs(lit) for _, clauses in factors for clause in clauses for lit in clause}
+        branches = []
+        for literal in (atom, -atom):
+            rest, satisfied, rest_atoms = condition(factors, literal)
+            value = sum(self.weights[ix] for ix in satisfied) + (len(atoms) - len(rest_atoms) - 1) * LOG_2
+            if rest:
+                value += self.count(rest)
+            branches.append(value)
+        out = np.logaddexp(*branches)
+        self.cache[factors] = out
+        return out
+
+
+class GroundWmcCaller(OracleCaller):
+    """
+    Exact oracle for small domains - grounds the formulas and counts the models of the ground theory.
+    """
+
+    def __init__(self, reflexive: bool = True):
+        super().__init__()
+        self.reflexive = reflexive
+        self.groundings = {}  # type: Dict[Tuple[str, ...], Grounding]
+
+    def call_oracle(self, domain_size: int, atoms: Iterable[Predicate], cnfs: List[WeightedFormula]) -> float:
+        formulas = [cnf.formula for cnf in cnfs]
+        weights = [cnf.weight for cnf in cnfs]
+        grounding = self.grounding(formulas).ground(domain_size)
+        factors, tautologies, free = ground_factors(grounding, domain_size, atoms)
+        log_z = sum(w * t for w, t in zip(weights, tautologies)) + free * LOG_2
+        return log_z + ComponentCounter(weights).count(factors)
+
+    def grounding(self, formulas: List[Formula]) -> Grounding:
+        key = tuple(f.structural_hash() for f in formulas)
+        if key not in self.groundings:
+            self.groundings[key] = Grounding(formulas, self.reflexive)
+        return self.groundings[key]
@@ -1,8 +1,10 @@
 import abc
 
+import numpy as np
+
 from typing import Iterable, List
 
-from clauses.cnf import Atom, WeightedFormula
+from clauses.cnf import Atom, Formula, WeightedFormula
 
 
 class OracleCaller(abc.ABC):
@@ -20,3 +22,23 @@ class OracleCaller(abc.ABC):
         :return: natural logarithm of MLN's partition function
         """
         pass
+
+    def call_oracle_many(self, domain_size: int, atoms: Iterable[Atom], formulas: List[Formula],
+                         weights: np.ndarray) -> np.ndarray:
+        """
+        Evaluates the partition function of the same formulas for several weight vectors.
+        :param domain_size:
+        :param atoms:
+        :param formulas: formulas of the MLN (without weights)
+        :param weights: matrix, one row of formula weights per evaluation
+        :return: natural logarithms of MLN's partition function for each row of weights, NaN if the call failed
+        """
+        out = np.empty(len(weights))
+        for ix, row in enumerate(weights):
+            cnfs = [WeightedFormula(w, f) for w, f in zip(row, formulas)]
+            try:
+                out[ix] = self.call_oracle(domain_size, atoms, cnfs)
+            except (ValueError, TypeError) as e:
+                print(e)
+                out[ix] = np.nan
+        return out
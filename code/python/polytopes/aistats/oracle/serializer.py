@@ -0,0 +1,66 @@
+import math
+
+import numpy as np
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from clauses.cnf import Formula, Predicate
+
+
+def format_weights(weights: Sequence[float], precision: int = None) -> List[bytes]:
+    """
+    :param weights: formula weights
+    :param precision: number of significant digits, None - shortest representation which reads back to the same float
+    :return: weights as ASCII bytes
+    """
+    weights = [float(w) for w in weights]
+    if not all(math.isfinite(w) for w in weights):
+        raise ValueError(f"Cannot serialize non-finite weights {weights}.")
+    if precision is None:
+        return [repr(w).encode("ascii") for w in weights]
+    return [b"%.*g" % (precision, w) for w in weights]
+
+
+class ForcliftSerializer:
+    """
+    Renders Forclift input files. The domain line, predicate declarations and formulas are rendered once per
+    (formulas, atoms, domain size) into a template, only weights are formatted on each call.
+    """
+
+    DOMAIN_NAME = "dom"
+
+    def __init__(self, precision: int = None):
+        self.precision = precision
+        self.templates = {}  # type: Dict[Tuple, Tuple[bytes, List[bytes]]]
+
+    def template(self, domain_size: int, atoms: Iterable[Predicate], formulas: List[Formula]) \
+            -> (bytes, List[bytes]):
+        """
+        :return: (header with the domain and predicates, formula lines without the leading weight)
+        """
+        atoms = tuple(atoms)
+        # formulas are the keys themselves, so their ids cannot be reused while the template exists
+        key = (tuple(formulas), atoms, domain_size)
+        if key not in self.templates:
+            header = f"{self.DOMAIN_NAME} = {{ 1, ..., {domain_size} }}\n" + \
+                     "".join(f"{p.with_domain(self.DOMAIN_NAME)}\n" for p in atoms)
+            self.templates[key] = (header.encode("utf-8"), [f" {f}\n".encode("utf-8") for f in formulas])
+        return self.templates[key]
+
+    def serialize(self, domain_size: int, atoms: Iterable[Predicate], formulas: List[Formula],
+                  weights: Sequence[float]) -> bytes:
+        """
+        :return: content of Forclift input file
+        """
+        header, lines = self.template(domain_size, atoms, formulas)
+        return header + b"".join(w + line for w, line in zip(format_weights(weights, self.precision), lines))
+
+    def serialize_many(self, domain_size: int, atoms: Iterable[Predicate], formulas: List[Formula],
+                       weights: np.ndarray) -> List[bytes]:
+        """
+        :param weights: matrix, one row of formula weights per input
+        :return: content of Forclift input file for each row of weights
+        """
+        header, lines = self.template(domain_size, atoms, formulas)
+        return [header + b"".join(w + line for w, line in zip(format_weights(row, self.precision), lines))
+                for row in weights]
@@ -0,0 +1,135 @@
+import gurobipy as g
+import numpy as np
+
+from typing import Dict, Tuple
+
+from clauses.cnf import MLN, Constant
+from possible_world import PossibleWorld
+
+
+class RmpQuery:
+    """
+    Answers containment of count vectors in a computed RMP given by its H-representation A x <= b. Batches of
+    points are tested at once against all half-spaces; only integer points just outside (within margin, where the
+    rounded oracle bounds and numerical errors decide) are checked by the ILP of PossibleWorld. Integer
+    realizability (a possible world with exactly the given counts exists) always needs the ILP for points inside,
+    its results are cached.
+    """
+
+    def __init__(self, A: np.ndarray, b: np.ndarray, mln: MLN, domain_size: int, reflexive: bool = True,
+                 margin: float = 1E-6, chunk_size: int = 65536):
+        """
+        :param A: normals of half-spaces (one per row)
+        :param b: right-hand sides of half-spaces
+        :param mln: MLN of the RMP
+        :param domain_size: domain size of the RMP
+        :param margin: distance from the boundary within which the ILP decides
+        :param chunk_size: number of points tested against the half-spaces at once
+        """
+        A = np.asarray(A, dtype=np.float64)
+        norms = np.linalg.norm(A, axis=1)
+        norms[norms == 0] = 1.0
+        # unit normals - slack is the (signed) distance from the half-space
+        self.A = A / norms[:, None]
+        self.b = np.asarray(b, dtype=np.float64) / norms
+        self.mln = mln
+        self.domain_size = domain_size
+        self.reflexive = reflexive
+        self.margin = margin
+        self.chunk_size = chunk_size
+        self.ilp_calls = 0
+        self.cache = {}  # type: Dict[Tuple[int, ...], bool]
+        self._model = None
+        self._count_constraints = None
+
+    @classmethod
+    def from_aistats(cls, solver, **kwargs) -> "RmpQuery":
+        """
+        :param solver: AiStatsRmpSolver after solve
+        """
+        return cls(solver.rmp.A, solver.rmp.b, solver.mln, solver.domain_size, **kwargs)
+
+    @classmethod
+    def from_heuristic(cls, solver, **kwargs) -> "RmpQuery":
+        """
+        :param solver: HeuristicSolver after solve with the qhull method
+        """
+        # qhull uses A x + c <= 0
+        equations = solver.convex_hull.equations
+        return cls(equations[:, :-1], -equations[:, -1], solver.mln, solver.domain_size, **kwargs)
+
+    def slack(self, points: np.ndarray) -> np.ndarray:
+        """
+        :param points: count vectors (one per row)
+        :return: greatest signed distance of each point from the half-spaces (<= 0 inside)
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, self.A.shape[1])
+        out = np.empty(len(points))
+        for start in range(0, len(points), self.chunk_size):
+            chunk = points[start:start + self.chunk_size]
+            out[start:start + len(chunk)] = (chunk @ self.A.T - self.b).max(axis=1, initial=-np.inf)
+        return out
+
+    def contains(self, point) -> bool:
+        return bool(self.contains_many(np.asarray(point)[None, :])[0])
+
+    def contains_many(self, points: np.ndarray) -> np.ndarray:
+        """
+        Points inside the half-spaces (up to numerical errors) are contained. Integer points outside by at most margin are contained if they
+        are realizable (the rounded oracle bounds may leave realizable points just outside), other points outside
+        are not. Realizability of points inside is answered by realizable_many.
+        :param points: count vectors (one per row)
+        :return: boolean array - the point lies in the RMP
+        """
+        slack = self.slack(points)
+        result = slack <= 1E-9
+        points = np.asarray(points, dtype=np.float64).reshape(len(slack), -1)
+        for ix in np.flatnonzero(~result & (slack <= self.margin)):
+            if self._is_integer(points[ix]):
+                result[ix] = self._realizable(points[ix])
+        return result
+
+    def realizable(self, point) -> bool:
+        return bool(self.realizable_many(np.asarray(point)[None, :])[0])
+
+    def realizable_many(self, points: np.ndarray) -> np.ndarray:
+        """
+        :param points: count vectors (one per row)
+        :return: boolean array - a possible world with exactly these satisfaction counts exists
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, self.A.shape[1])
+        result = np.zeros(len(points), dtype=np.bool_)
+        candidates = (self.slack(points) <= self.margin) & \
+            (np.abs(points - np.rint(points)) <= 1E-9).all(axis=1)
+        for ix in np.flatnonzero(candidates):
+            result[ix] = self._realizable(points[ix])
+        return result
+
+    @staticmethod
+    def _is_integer(point: np.ndarray) -> bool:
+        return bool((np.abs(point - np.rint(point)) <= 1E-9).all())
+
+    def _realizable(self, point: np.ndarray) -> bool:
+        key = tuple(int(x) for x in np.rint(point))
+        if key not in self.cache:
+            self.cache[key] = self._solve(key)
+        return self.cache[key]
+
+    def _solve(self, counts: Tuple[int, ...]) -> bool:
+        # one model is kept, only the right-hand sides of the count constraints change between queries
+        if self._model is None:
+            pw = PossibleWorld([Constant(f"d_{i}") for i in range(self.domain_size)], self.mln.weighted_formulas,
+                               [], self.reflexive)
+            self._model, _ = pw.satisfiable_model({ix: (0, 'eq') for ix in range(len(counts))})
+            self._count_constraints = [self._model.getConstrByName(f"count_{ix}") for ix in range(len(counts))]
+        for constr, count in zip(self._count_constraints, counts):
+            constr.RHS = count
+        self.ilp_calls += 1
+        PossibleWorld._optimize(self._model)
+        return self._model.status == g.GRB.OPTIMAL
+
+    def dispose(self) -> None:
+        if self._model is not None:
+            self._model.dispose()
+            self._model = None
+            self._count_constraints = None
@@ -0,0 +1,60 @@
+import numpy as np
+
+from typing import Dict, List
+
+import aistats.utils as aiu
+
+from aistats.aistats import AiStatsRmpSolver
+from aistats.enumerator.naive_enumerator import NaiveEnumerator
+from aistats.oracle.circuit import CircuitCaller
+from aistats.oracle.fo2_caller import Fo2WfomcCaller
+from aistats.oracle.oracle_caller import OracleCaller
+from clauses.cnf import MLN
+
+
+class DomainSweep:
+    """
+    Calculates RMPs of one MLN for a sequence of domain sizes. All sizes share the oracle caller, so its compiled
+    structures (FO2 cells, groundings extended domain by domain, circuits) are built only once, and facets of
+    the RMP for the previous size, scaled to the new limits, are queried first for the next size.
+    """
+
+    def __init__(self, mln: MLN, domain_sizes: List[int], oracle_caller: OracleCaller = None,
+                 enumerator_cls=NaiveEnumerator, tolerance: float = 0.0, adaptive: bool = True):
+        self.mln = mln
+        self.domain_sizes = sorted(domain_sizes)
+        self.oracle_caller = oracle_caller or Fo2WfomcCaller(fallback=CircuitCaller())
+        self.enumerator_cls = enumerator_cls
+        self.tolerance = tolerance
+        self.adaptive = adaptive
+        self.solvers = {}  # type: Dict[int, AiStatsRmpSolver]
+
+    def run(self) -> Dict[int, AiStatsRmpSolver]:
+        """
+        :return: solved RMP solver for each domain size
+        """
+        previous = None
+        for domain_size in self.domain_sizes:
+            solver = AiStatsRmpSolver(self.mln, domain_size, enumerator_cls=self.enumerator_cls,
+                                      oracle_caller=self.oracle_caller, tolerance=self.tolerance)
+            solver.solve(adaptive=self.adaptive, seed_normals=self.seed_normals(previous, solver))
+            print(f"Domain size {domain_size}: {solver.oracle_calls} oracle calls")
+            self.solvers[domain_size] = solver
+            previous = solver
+        return self.solvers
+
+    @staticmethod
+    def seed_normals(previous: AiStatsRmpSolver, solver: AiStatsRmpSolver):
+        """
+        :param previous: solved RMP for a smaller domain
+        :param solver: RMP to be solved
+        :return: facet normals of previous RMP scaled to limits of the solver, None if there is no previous RMP
+        """
+        if previous is None:
+            return None
+        facets = previous.facet_normals()
+        if len(facets) == 0:
+            return None
+        normals = aiu.scale_normals(facets, previous.limits, solver.limits)
+        normals = normals[(np.abs(normals) <= aiu.normal_bounds(solver.limits)).all(axis=1)]
+        return list(normals)
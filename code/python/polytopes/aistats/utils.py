@@ -1,3 +1,5 @@
+import math
+
 import numpy as np
 
 
@@ -13,6 +15,8 @@ def calculate_normal(points: np.ndarray) -> np.ndarray:
         return np.array([points[0, 1], -points[0, 0]])  # dtto
     elif points.ndim == 2:
         if points.shape[1] > 3:
+            if (points == np.round(points)).all():
+                return integer_normals(points[None, :, :])[0]  # 4D+ integer points - exact elimination
             return cross(points)  # 4D+ - generalized cross product
         elif points.shape[1] == 3:
             return np.cross(points[0, :], points[1, :])  # 3D - standard cross product
@@ -31,13 +35,78 @@ def cross(points: np.ndarray) -> np.ndarray:  # (n-1) x n
     return out
 
 
+def integer_normals(points: np.ndarray) -> np.ndarray:
+    """
+    Calculates exact normal vectors of batches of integer points by fraction-free Gauss-Jordan elimination
+    (Bareiss) with full pivoting. Intermediate values are minors of the input, they are computed in int64 while
+    Hadamard's bound allows it and in Python integers otherwise.
+    :param points: k x (n-1) x n array of integer points (n >= 2)
+    :return: k x n array of normals normalized as by normalize_vector, zero rows for dependent points
+    """
+    points = np.asarray(points)
+    if points.ndim != 3 or points.shape[2] != points.shape[1] + 1:
+        raise ValueError(f"Unsupported input shape, must be (k x (n-1) x n), but was {points.shape}")
+    batch, rows, cols = points.shape
+    largest = int(np.abs(points).max()) if points.size else 0
+    matrix = np.rint(points).astype(np.int64)
+    if rows ** rows * largest ** (2 * rows) >= 2 ** 62:  # products of two minors may overflow
+        matrix = matrix.astype(object)
+    items = np.arange(batch)
+    used = np.zeros((batch, cols), dtype=np.bool_)
+    pivot_cols = np.zeros((batch, rows), dtype=np.int64)
+    dependent = np.zeros(batch, dtype=np.bool_)
+    previous = np.ones(batch, dtype=matrix.dtype)
+    for step in range(rows):
+        candidates = np.abs(matrix[:, step:, :]).astype(np.float64)
+        candidates[np.broadcast_to(used[:, None, :], candidates.shape)] = -1
+        flat = candidates.reshape(batch, -1).argmax(axis=1)
+        p_row, p_col = flat // cols + step, flat % cols
+        dependent |= candidates.reshape(batch, -1)[items, flat] <= 0
+        swapped = matrix[items, p_row].copy()
+        matrix[items, p_row] = matrix[items, step]
+        matrix[items, step] = swapped
+        pivot = matrix[items, step, p_col]
+        pivot = np.where(dependent, 1, pivot).astype(matrix.dtype)
+        factors = matrix[items, :, p_col].copy()
+        factors[:, step] = 0
+        update = (pivot[:, None, None] * matrix - factors[:, :, None] * matrix[:, step:step + 1, :])
+        update = update // previous[:, None, None]
+        update[:, step, :] = matrix[:, step, :]
+        matrix = update
+        previous = pivot
+        used[items, p_col] = True
+        pivot_cols[:, step] = p_col
+    free = (~used).argmax(axis=1)
+    out = np.zeros((batch, cols), dtype=matrix.dtype)
+    out[items, free] = previous
+    out[items[:, None], pivot_cols] = -matrix[items[:, None], np.arange(rows)[None, :], free[:, None]]
+    out[dependent] = 0
+    return normalize_vectors(out)
+
+
+def normalize_vectors(vectors: np.ndarray) -> np.ndarray:
+    """
+    Exact normalize_vector for rows of an integer (int64 or Python int) matrix.
+    :param vectors: 2-D numpy array
+    :return: array of the same dtype
+    """
+    nzi = (vectors != 0).argmax(axis=1)
+    signs = np.sign(vectors[np.arange(len(vectors)), nzi])
+    gcds = np.gcd.reduce(vectors, axis=1) * signs
+    gcds[gcds == 0] = 1
+    return vectors // gcds[:, None]
+
+
 def normalize_vector(v) -> np.ndarray:
     """
     Normalizes input vector so the greatest common divisor of its elements is 1 and first non-zero element is
     positive
     :param v: 1-D numpy array
-    :return: numpy array casted to int64 type, gcd of all elements is 1 and first non-zero index is positive
+    :return: numpy array casted to int64 type (unless it contains Python integers), gcd of all elements is 1 and
+    first non-zero index is positive
     """
+    if v.dtype == object:
+        return normalize_vectors(v[None, :])[0]
     rounded = v.round().astype(np.int64)
     nzi = (rounded != 0).argmax(axis=0)  # find index of first non-zero element
     r_gcd = np.sign(rounded[nzi]) * np.gcd.reduce(rounded)
@@ -45,3 +114,37 @@ def normalize_vector(v) -> np.ndarray:
         return rounded
     else:
         return np.floor_divide(rounded, r_gcd)
+
+
+def normal_bounds(limits) -> np.ndarray:
+    """
+    Bounds on coefficients of primitive facet normals of a polytope with integer vertices in the box given by limits.
+    Every such normal is a cofactor vector of d-1 integer difference vectors bounded by limits, so its i-th
+    coefficient is bounded by Hadamard's bound of the minor without the i-th column.
+    :param limits: upper bounds of the box (lower bounds are zeros)
+    :return: numpy array (int64) with a bound for each coefficient
+    """
+    dims = len(limits)
+    out = np.empty(dims, dtype=np.int64)
+    for idx in range(dims):
+        prod = 1
+        for o_idx, lim in enumerate(limits):
+            if o_idx != idx:
+                prod *= int(lim)
+        out[idx] = math.isqrt((dims - 1) ** (dims - 1) * prod * prod)
+    return out
+
+
+def scale_normals(normals, limits, n_limits) -> np.ndarray:
+    """
+    Transforms normals of half-spaces when the space is scaled from limits to n_limits along each axis.
+    :param normals: matrix of integer normals (one per row)
+    :param limits: original limits
+    :param n_limits: new limits
+    :return: matrix of primitive integer normals
+    """
+    multiple = math.lcm(*(int(lim) for lim in n_limits))
+    factors = np.array([int(lim) * (multiple // int(n_lim)) for lim, n_lim in zip(limits, n_limits)], dtype=object)
+    out = np.array(normals, dtype=object) * factors
+    gcds = np.array([math.gcd(*row) for row in out], dtype=object)
+    return (out // gcds[:, None]).astype(np.int64)
@@ -0,0 +1,40 @@
+import argparse
+
+import time
+
+from itertools import islice
+
+from aistats.enumerator.naive_enumerator import NaiveEnumerator
+
+
+def per_combination(enumerator: NaiveEnumerator, limit: int) -> int:
+    return sum(1 for _ in islice(enumerator.generate_points(), limit))
+
+
+def batched(enumerator: NaiveEnumerator, limit: int, batch_size: int) -> int:
+    out = 0
+    for batch in enumerator.generate_point_batches(batch_size):
+        out += len(batch)
+        if out >= limit:
+            return limit
+    return out
+
+
+if __name__ == "__main__":
+    a_pars = argparse.ArgumentParser("Compares per-combination and batched enumeration of NaiveEnumerator.")
+    a_pars.add_argument("limits", help="Limits of the counts.", type=int, nargs="+")
+    a_pars.add_argument("-n", "--number", help="Number of independent point sets to enumerate.", type=int,
+                        default=100000)
+    a_pars.add_argument("-b", "--batch_size", help="Number of combinations in one batch.", type=int, default=4096)
+
+    args = a_pars.parse_args()
+    en = NaiveEnumerator(args.limits)
+    ntime = time.time()
+    points = per_combination(en, args.number)
+    loop_time = time.time() - ntime
+    print(f"Per combination: {points} point sets in {loop_time: 0.3f} s")
+    ntime = time.time()
+    points = batched(en, args.number, args.batch_size)
+    batch_time = time.time() - ntime
+    print(f"Batched: {points} point sets in {batch_time: 0.3f} s")
+    print(f"Speed-up: {loop_time / batch_time: 0.1f}x")
@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+
+import time
+
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+
+from aistats.oracle.forclift_callers import ForcliftClientCaller
+from aistats.oracle.forclift_server import ForcliftStandInServer
+from clauses.cnf import WeightedFormula
+from cnf_parser import CnfParser
+
+
+def load_test(caller: ForcliftClientCaller, domain_size: int, atoms, cnfs, requests: int, concurrency: int,
+              seed: int = 0) -> dict:
+    """
+    Sends requests with random weights from concurrency threads.
+    :return: throughput, latency percentiles (seconds) and number of failed requests
+    """
+    weights = np.random.default_rng(seed).normal(size=(requests, len(cnfs)))
+
+    def request(row):
+        n_cnfs = [WeightedFormula(w, cnf.formula) for w, cnf in zip(row, cnfs)]
+        ntime = time.perf_counter()
+        try:
+            caller.call_oracle(domain_size, atoms, n_cnfs)
+            failed = False
+        except ValueError:
+            failed = True
+        return time.perf_counter() - ntime, failed
+
+    ntime = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(request, weights))
+    elapsed = time.perf_counter() - ntime
+    latencies = np.array([latency for latency, _ in results])
+    return {"requests": requests, "failed": sum(failed for _, failed in results), "seconds": elapsed,
+            "throughput": requests / elapsed,
+            "latency": {f"p{q}": float(np.percentile(latencies, q)) for q in (50, 90, 99)} |
+                       {"max": float(latencies.max())}}
+
+
+if __name__ == "__main__":
+    a_pars = argparse.ArgumentParser("Load test of ForcliftClientCaller against the Python stand-in server "
+                                     "(or a running Forclift server).")
+    a_pars.add_argument("input_file", help="Path to input CNF file.")
+    a_pars.add_argument("domain_size", help="Domain size of MLN.", type=int)
+    a_pars.add_argument("-n", "--requests", help="Number of requests.", type=int, default=500)
+    a_pars.add_argument("-s", "--sockets", help="Numbers of client sockets.", type=int, nargs="+", default=[1, 4])
+    a_pars.add_argument("-c", "--concurrency", help="Number of threads sending requests (default: sockets).",
+                        type=int)
+    a_pars.add_argument("-l", "--latency", help="Latency added by the server (s).", type=float, default=0.005)
+    a_pars.add_argument("-j", "--jitter", help="Maximal random latency added by the server (s).", type=float,
+                        default=0.005)
+    a_pars.add_argument("-f", "--failure_rate", help="Probability of a failed calculation.", type=float,
+                        default=0.0)
+    a_pars.add_argument("-p", "--port", help="Port of a running server (the stand-in is started if not given).",
+                        type=int, default=-1)
+
+    args = a_pars.parse_args()
+    parser = CnfParser()
+    parser.read_file(args.input_file)
+    atoms = sorted(parser.predicates.values())
+    server = None
+    if args.port <= 0:
+        server = ForcliftStandInServer(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+                                       seed=0).start()
+    port = server.port if server is not None else args.port
+    results = []
+    for sockets in args.sockets:
+        caller = ForcliftClientCaller(port=port, sockets=sockets)
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            result = load_test(caller, args.domain_size, atoms, parser.formulas, args.requests,
+                               args.concurrency or sockets)
+        caller.shutdown()
+        result["sockets"] = sockets
+        results.append(result)
+        print(f"{sockets} sockets: {result['throughput']: 0.1f} requests/s, "
+              f"p50 {1000 * result['latency']['p50']: 0.2f} ms, p99 {1000 * result['latency']['p99']: 0.2f} ms, "
+              f"max {1000 * result['latency']['max']: 0.2f} ms, failed {result['failed']}")
+    if server is not None:
+        server.stop()
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,41 @@
+import argparse
+import os
+import random
+import tempfile
+
+import time
+
+from cnf_parser import CnfParser
+
+
+def random_mln(formulas: int, predicates: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    arities = [rng.randint(1, 2) for _ in range(predicates)]
+    lines = []
+    for _ in range(formulas):
+        literals = []
+        for _ in range(rng.randint(1, 4)):
+            p = rng.randrange(predicates)
+            args = ",".join(rng.choice("XYZ") for _ in range(arities[p]))
+            literals.append(f"{'NOT ' if rng.random() < 0.5 else ''}p{p}({args})")
+        lines.append(f"{rng.uniform(-3, 3):.3f} {' OR '.join(literals)}")
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    a_pars = argparse.ArgumentParser("Parsing throughput of CnfParser.")
+    a_pars.add_argument("-n", "--formulas", help="Number of weighted formulas.", type=int, default=50000)
+    a_pars.add_argument("-p", "--predicates", help="Number of predicates.", type=int, default=100)
+
+    args = a_pars.parse_args()
+    content = random_mln(args.formulas, args.predicates)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "mln.cnf")
+        with open(path, "w") as f:
+            f.write(content)
+        parser = CnfParser()
+        ntime = time.time()
+        parser.read_file(path)
+        etime = time.time() - ntime
+    print(f"{len(parser.formulas)} formulas ({len(content) / 1E6: 0.2f} MB) in {etime: 0.3f} s, "
+          f"{len(parser.formulas) / etime: 0.0f} formulas/s")
@@ -0,0 +1,146 @@
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+
+import time
+
+import gurobipy as g
+import numpy as np
+
+from contextlib import redirect_stdout
+from typing import Dict, List
+
+from clauses.cnf import MLN, Constant
+from cnf_parser import CnfParser
+from possible_world import PossibleWorld
+
+SIZES = ["variables", "general_constraints", "linear_constraints"]
+
+
+def build(mln: MLN, domain_size: int) -> g.Model:
+    pw = PossibleWorld([Constant(f"d_{i}") for i in range(domain_size)], mln.weighted_formulas, [])
+    return pw.satisfiable_model({ix: (0, 'ge') for ix in range(len(mln.weighted_formulas))})[0]
+
+
+def measure(mln: MLN, domain_size: int, solve: bool = False) -> Dict:
+    """
+    Builds (and optionally solves) the ILP of PossibleWorld.satisfiable for the domain size. Peak Python memory is
+    measured in a separate build, as tracemalloc slows the build down.
+    :return: sizes of the model, build time, peak Python memory and Gurobi memory, solve time
+    """
+    tracemalloc.start()
+    build(mln, domain_size).dispose()
+    python_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    ntime = time.perf_counter()
+    model = build(mln, domain_size)
+    build_time = time.perf_counter() - ntime
+    out = {"domain_size": domain_size, "variables": model.NumVars, "general_constraints": model.NumGenConstrs,
+           "linear_constraints": model.NumConstrs, "build_seconds": build_time,
+           "python_peak_mb": python_peak / 2 ** 20, "gurobi_mb": model.MaxMemUsed * 1024}
+    if solve:
+        ntime = time.perf_counter()
+        try:
+            model.optimize()
+            out["solve_seconds"] = time.perf_counter() - ntime
+            out["gurobi_mb"] = model.MaxMemUsed * 1024
+        except g.GurobiError as e:
+            out["solve_error"] = str(e)
+    model.dispose()
+    return out
+
+
+def fit_growth(domain_sizes: List[int], values: List[float]) -> Dict[str, float]:
+    """
+    Fits value ~ coefficient * n ** exponent by least squares in log-log scale.
+    :return: exponent and coefficient
+    """
+    points = [(n, v) for n, v in zip(domain_sizes, values) if n > 1 and v > 0]
+    if len(points) < 2:
+        return {"exponent": float("nan"), "coefficient": float("nan")}
+    log_n, log_v = np.log(np.array(points, dtype=np.float64)).T
+    exponent, intercept = np.polyfit(log_n, log_v, 1)
+    return {"exponent": float(exponent), "coefficient": float(np.exp(intercept))}
+
+
+def intractable_size(growth: Dict[str, float], limit: float) -> int:
+    """
+    :return: smallest domain size with the fitted value above the limit
+    """
+    if not growth["exponent"] > 0:
+        return -1
+    return int(np.floor((limit / growth["coefficient"]) ** (1 / growth["exponent"]))) + 1
+
+
+def regressions(baseline: Dict, report: Dict, time_factor: float, min_seconds: float = 0.05) -> List[str]:
+    """
+    :param min_seconds: smaller slow-downs are not reported (noise of short measurements)
+    :return: descriptions of model sizes larger than in the baseline and times slower than time_factor times
+    the baseline (and by at least min_seconds)
+    """
+    old = {row["domain_size"]: row for row in baseline["results"]}
+    out = []
+    for row in report["results"]:
+        base = old.get(row["domain_size"])
+        if base is None:
+            continue
+        for key in SIZES:
+            if row[key] > base[key]:
+                out.append(f"n={row['domain_size']}: {key} {base[key]} -> {row[key]}")
+        for key in ["build_seconds", "solve_seconds"]:
+            if key in row and key in base and row[key] > max(time_factor * base[key], base[key] + min_seconds):
+                out.append(f"n={row['domain_size']}: {key} {base[key]: 0.4f} -> {row[key]: 0.4f}")
+    return out
+
+
+if __name__ == "__main__":
+    a_pars = argparse.ArgumentParser("Growth of the PossibleWorld ILP with the domain size.")
+    a_pars.add_argument("input_file", help="Path to input CNF file.")
+    a_pars.add_argument("domain_sizes", help="Domain sizes.", type=int, nargs="+")
+    a_pars.add_argument("-s", "--solve", help="Solve the models too.", action="store_true")
+    a_pars.add_argument("-l", "--limit", help="Number of variables considered intractable.", type=float,
+                        default=1E6)
+    a_pars.add_argument("-b", "--baseline", help="JSON report of an earlier run, regressions are reported.")
+    a_pars.add_argument("-t", "--time_factor", help="Slow-down against the baseline reported as a regression.",
+                        type=float, default=1.5)
+    a_pars.add_argument("-m", "--min_seconds", help="Smallest slow-down (s) against the baseline reported as a "
+                                                    "regression.", type=float, default=0.05)
+    a_pars.add_argument("-o", "--output", help="Path of the JSON report (e.g. a new baseline).")
+
+    args = a_pars.parse_args()
+    g.setParam("OutputFlag", 0)
+    parser = CnfParser()
+    parser.read_file(args.input_file)
+    mln = MLN(parser.formulas)
+    results = []
+    for domain_size in sorted(args.domain_sizes):
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            row = measure(mln, domain_size, args.solve)
+        results.append(row)
+        solve = f", solve {row['solve_seconds']: 0.3f} s" if "solve_seconds" in row else \
+            f", solve failed: {row['solve_error']}" if "solve_error" in row else ""
+        print(f"n={domain_size}: {row['variables']} variables, {row['general_constraints']} general and "
+              f"{row['linear_constraints']} linear constraints, build {row['build_seconds']: 0.3f} s, "
+              f"{row['python_peak_mb']: 0.1f} MB{solve}")
+    sizes = [row["domain_size"] for row in results]
+    growth = {key: fit_growth(sizes, [row[key] for row in results])
+              for key in SIZES + ["build_seconds", "python_peak_mb"]}
+    for key, fit in growth.items():
+        print(f"{key} ~ {fit['coefficient']: 0.3g} * n^{fit['exponent']: 0.2f}")
+    limit_size = intractable_size(growth["variables"], args.limit)
+    print(f"More than {args.limit: 0.0f} variables from domain size {limit_size}")
+    report = {"input_file": os.path.basename(args.input_file), "results": results, "growth": growth,
+              "limit": args.limit, "intractable_domain_size": limit_size}
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(json.load(f), report, args.time_factor, args.min_seconds)
+        report["regressions"] = found
+        for line in found:
+            print(f"REGRESSION {line}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if report.get("regressions"):
+        sys.exit(1)
@@ -0,0 +1,165 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+
+import time
+
+import gurobipy as g
+import numpy as np
+
+from contextlib import redirect_stdout
+from itertools import islice
+from typing import Dict, Iterable, List
+
+from aistats.aistats import AiStatsRmpSolver
+from aistats.enumerator.magnitude_enumerator import MagnitudeEnumerator
+from aistats.enumerator.naive_enumerator import NaiveEnumerator
+from aistats.oracle.circuit import CircuitCaller
+from aistats.oracle.fo2_caller import Fo2WfomcCaller
+from aistats.oracle.forclift_callers import ForcliftV1
+from aistats.oracle.oracle_caller import OracleCaller
+from aistats.oracle.serializer import ForcliftSerializer
+from clauses.cnf import MLN, Constant, Formula, Predicate, WeightedFormula
+from clauses.grounding import Grounding
+from cnf_parser import CnfParser
+from possible_world import PossibleWorld
+
+PHASES = ["parse", "grounding", "ilp_build", "ilp_solve", "enumeration", "oracle", "reduction"]
+ENUMERATORS = {"magnitude": MagnitudeEnumerator, "naive": NaiveEnumerator}
+CNF_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cnfs")
+
+
+class StandInOracle(OracleCaller):
+    """
+    Deterministic replacement of Forclift - serializes the input and parses the output the same way as the
+    Forclift callers, the partition function is computed in-process (FO2 cells or compiled circuits).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.serializer = ForcliftSerializer()
+        self.exact = Fo2WfomcCaller(fallback=CircuitCaller())
+        self.sent_bytes = 0
+
+    def call_oracle(self, domain_size: int, atoms: Iterable[Predicate], cnfs: List[WeightedFormula]) -> float:
+        weights = np.array([[cnf.weight for cnf in cnfs]], dtype=np.float64)
+        return float(self.call_oracle_many(domain_size, atoms, [cnf.formula for cnf in cnfs], weights)[0])
+
+    def call_oracle_many(self, domain_size: int, atoms: Iterable[Predicate], formulas: List[Formula],
+                         weights: np.ndarray) -> np.ndarray:
+        atoms = list(atoms)
+        self.sent_bytes += sum(map(len, self.serializer.serialize_many(domain_size, atoms, formulas, weights)))
+        values = self.exact.call_oracle_many(domain_size, atoms, formulas, weights)
+        outputs = [f"Z = exp({value!r})\n" for value in values]
+        return np.array([float(ForcliftV1.OUTPUT_PATTERN.search(out).group(1)) for out in outputs])
+
+
+class Timer:
+
+    def __init__(self):
+        self.phases = {}  # type: Dict[str, float]
+
+    def __call__(self, phase: str, function, *args, **kwargs):
+        ntime = time.perf_counter()
+        out = function(*args, **kwargs)
+        self.phases[phase] = self.phases.get(phase, 0.0) + time.perf_counter() - ntime
+        return out
+
+
+def run_case(path: str, domain_size: int, normals: int, enumerator_cls=MagnitudeEnumerator) \
+        -> (Dict[str, float], Dict[str, int]):
+    """
+    Runs all phases for one MLN and domain size.
+    :return: (seconds per phase, sizes of intermediate results)
+    """
+    timer = Timer()
+    parser = CnfParser()
+    timer("parse", parser.read_file, path)
+    mln = MLN(parser.formulas)
+    formulas = [wf.formula for wf in mln.weighted_formulas]
+    grounding = timer("grounding", Grounding(formulas).ground, domain_size)
+    counts = {"atoms": grounding.atom_number(domain_size),
+              "groundings": sum(len(grounding.formula_groundings(ix, domain_size)) for ix in range(len(formulas)))}
+
+    pw = PossibleWorld([Constant(f"d_{i}") for i in range(domain_size)], mln.weighted_formulas, [])
+    model, _ = timer("ilp_build", pw.satisfiable_model, {ix: (0, 'ge') for ix in range(len(formulas))}, 0,
+                     g.GRB.MAXIMIZE)
+    counts["ilp_variables"], counts["ilp_constraints"] = model.NumVars, model.NumConstrs + model.NumGenConstrs
+    timer("ilp_solve", model.optimize)
+
+    solver = AiStatsRmpSolver(mln, domain_size, enumerator_cls=enumerator_cls, oracle_caller=StandInOracle())
+    found = timer("enumeration", lambda: list(islice(solver.generate_normals(), normals)))
+    bounds = timer("oracle", solver.support_bounds, found)
+    constraints = [(normal, bound) for normal, bound in zip(found, bounds) if bound is not None]
+    timer("reduction", solver.find_min_set, constraints)
+    counts["normals"], counts["oracle_calls"] = len(found), solver.oracle_calls
+    counts["oracle_bytes"] = solver.oracle_caller.sent_bytes
+    counts["facets"] = len(solver.rmp.b)
+    return timer.phases, counts
+
+
+def compare(baseline: Dict, report: Dict) -> None:
+    """
+    Prints ratios of phase times of the report to the baseline (> 1 is slower) for cases present in both.
+    """
+    old = {(r["cnf"], r["domain_size"]): r["phases"] for r in baseline["results"]}
+    print(f"Compared to {baseline.get('commit')}:", file=sys.stderr)
+    for result in report["results"]:
+        phases = old.get((result["cnf"], result["domain_size"]))
+        if phases is None:
+            continue
+        ratios = [f"{phase} {result['phases'][phase] / phases[phase]: 0.2f}x" for phase in PHASES
+                  if phases.get(phase)]
+        print(f"{result['cnf']} n={result['domain_size']}: " + ", ".join(ratios), file=sys.stderr)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    a_pars = argparse.ArgumentParser("End-to-end benchmark of parsing, grounding, ILP and oracle phases.")
+    a_pars.add_argument("cnfs", help="Input CNF files (default: all files in cnfs).", nargs="*")
+    a_pars.add_argument("-d", "--domain_sizes", help="Domain sizes.", type=int, nargs="+", default=[2, 3])
+    a_pars.add_argument("-n", "--normals", help="Number of enumerated normals sent to the oracle.", type=int,
+                        default=50)
+    a_pars.add_argument("-e", "--enumerator", help="Enumerator of normals.", choices=sorted(ENUMERATORS),
+                        default="magnitude")
+    a_pars.add_argument("-r", "--repeat", help="Number of runs of each case, the fastest time of each phase is "
+                                               "reported.", type=int, default=3)
+    a_pars.add_argument("-o", "--output", help="Path of JSON results (default: standard output).")
+    a_pars.add_argument("-c", "--compare", help="JSON results of an earlier run to compare with.")
+
+    args = a_pars.parse_args()
+    g.setParam("OutputFlag", 0)
+    results = []
+    for path in args.cnfs or sorted(glob.glob(os.path.join(CNF_DIR, "*.cnf"))):
+        for domain_size in args.domain_sizes:
+            runs = []
+            for _ in range(args.repeat):
+                with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                    runs.append(run_case(path, domain_size, args.normals, ENUMERATORS[args.enumerator]))
+            phases = {phase: min(run[0][phase] for run in runs) for phase in PHASES}
+            results.append({"cnf": os.path.basename(path), "domain_size": domain_size, "phases": phases,
+                            "counts": runs[0][1]})
+            print(f"{os.path.basename(path)} n={domain_size}: " +
+                  ", ".join(f"{phase} {phases[phase]: 0.4f} s" for phase in PHASES), file=sys.stderr)
+    report = {"commit": git_commit(), "python": platform.python_version(),
+              "gurobi": ".".join(map(str, g.gurobi.version())),
+              "repeat": args.repeat, "normals": args.normals, "enumerator": args.enumerator, "results": results}
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
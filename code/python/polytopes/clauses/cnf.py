@@ -1,18 +1,76 @@
+import abc
+import hashlib
+import itertools
+import weakref
+
 from functools import total_ordering
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Tuple
+
+# canonical forms of formulas with more variables are not minimized over all permutations of variables
+MAX_CANONICAL_VARS = 8
+
+
+class Interned(abc.ABC):
+    # immutable objects with __slots__, equal structures share one instance (hash-consing) - constructor arguments
+    # are turned into a key by _key, instances are initialized in _setup
+
+    __slots__ = ("__weakref__", "_args")
+    _instances = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._instances = weakref.WeakValueDictionary()
+
+    def __new__(cls, *args):
+        key = cls._key(*args)
+        instance = cls._instances.get(key)
+        if instance is None:
+            instance = super().__new__(cls)
+            object.__setattr__(instance, "_args", args)
+            instance._setup(*args)
+            cls._instances[key] = instance
+        return instance
+
+    @classmethod
+    def _key(cls, *args):
+        return args
+
+    @abc.abstractmethod
+    def _setup(self, *args) -> None:
+        pass
 
+    def _set(self, **values) -> None:
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
 
-class Term:
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
 
-    def __init__(self, name: str):
-        self.name = name
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return type(self), self._args
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class Term(Interned):
+
+    __slots__ = ("name", )
+
+    def _setup(self, name: str) -> None:
+        self._set(name=name)
 
 
 @total_ordering
 class Constant(Term):
 
-    def __init__(self, name: str):
-        super().__init__(name)
+    __slots__ = ()
 
     def __str__(self):
         return self.name
@@ -35,8 +93,7 @@ class Constant(Term):
 @total_ordering
 class Variable(Term):
 
-    def __init__(self, name: str):
-        super().__init__(name)
+    __slots__ = ()
 
     def __str__(self):
         return self.name.lower()
@@ -57,11 +114,12 @@ class Variable(Term):
 
 
 @total_ordering
-class Predicate:
+class Predicate(Interned):
 
-    def __init__(self, name: str, arity: int):
-        self.name = name
-        self.arity = arity
+    __slots__ = ("name", "arity")
+
+    def _setup(self, name: str, arity: int) -> None:
+        self._set(name=name, arity=arity)
 
     def __str__(self):
         return f"{self.name}/{self.arity}"
@@ -84,14 +142,23 @@ class Predicate:
         return f"{self.name}({','.join(domain for _ in range(self.arity))})"
 
 
-class Atom:
-    # predicate with bound variables
+class Atom(Interned):
+    # predicate with bound variables, atoms are equal if they differ only by names of variables
+
+    __slots__ = ("predicate", "variables", "renamed_vars", "distinct_vars", "distinct_const", "_vars", "_hash")
 
-    def __init__(self, predicate: Predicate, variables: List[Term]):
-        self.predicate = predicate
-        self.variables = variables
-        self.renamed_vars, self.distinct_vars, self.distinct_const = self._rename_vars()
-        assert(len(variables) == self.predicate.arity)
+    @classmethod
+    def _key(cls, predicate: Predicate, variables: List[Term]):
+        return predicate, tuple((type(v), v.name) for v in variables)
+
+    def _setup(self, predicate: Predicate, variables: List[Term]) -> None:
+        variables = tuple(variables)
+        assert(len(variables) == predicate.arity)
+        self._set(_args=(predicate, variables))
+        renamed_vars, distinct_vars, distinct_const = self._rename_vars(variables)
+        self._set(predicate=predicate, variables=variables, renamed_vars=renamed_vars, distinct_vars=distinct_vars,
+                  distinct_const=distinct_const, _vars=tuple(sorted({v.name for v in variables})),
+                  _hash=hash((predicate, renamed_vars)))
 
     def renamed_str(self) -> str:
         vlist = ",".join(v.name for v in self.renamed_vars)
@@ -101,11 +168,12 @@ class Atom:
         vlist = ",".join(assignment[v.name].name if isinstance(v, Variable) else v.name for v in self.variables)
         return f"{self.predicate.name}({vlist})"
 
-    def _rename_vars(self) -> (List[Term], int, int):
+    @staticmethod
+    def _rename_vars(variables) -> (tuple, int, int):
         mapping = {}
-        i, dv, dc = 0, 0, 0
+        dv, dc = 0, 0
         nvlist = []
-        for v in self.variables:
+        for v in variables:
             if v not in mapping:
                 if isinstance(v, Variable):
                     mapping[v] = Variable("X_{ord}".format(ord=dv))
@@ -116,38 +184,40 @@ class Atom:
                 else:
                     raise Exception("Non-term object in atom.")
             nvlist.append(mapping[v])
-        return nvlist, dv, dc
+        return tuple(nvlist), dv, dc
 
     def __str__(self):
         vlist = ",".join(v.name.lower() for v in self.variables)
         return f"{self.predicate.name}({vlist})"
 
     def __repr__(self):
-        return f"Atom(predicate={self.predicate.name}, variables={self.variables}, renamed={self.renamed_vars}))"
+        return f"Atom(predicate={self.predicate.name}, variables={list(self.variables)}, " \
+               f"renamed={list(self.renamed_vars)}))"
 
     def __eq__(self, other):
         if isinstance(other, Atom):
-            if self.predicate != other.predicate:
-                return False
-            for i, term in enumerate(self.renamed_vars):
-                if term != other.renamed_vars[i]:
-                    return False
-            return True
+            return self is other or (self.predicate == other.predicate and self.renamed_vars == other.renamed_vars)
         return False
 
+    def __hash__(self):
+        return self._hash
+
     def get_vars(self) -> List[str]:
-        dist = set()
-        for variable in self.variables:
-            dist.add(variable.name)
-        return list(dist)
+        return list(self._vars)
 
 
-class Literal:
+class Literal(Interned):
     #  atom or its negation
 
-    def __init__(self, atom: Atom, positive: bool = True):
-        self.atom = atom
-        self.positive = positive
+    __slots__ = ("atom", "positive")
+
+    @classmethod
+    def _key(cls, atom: Atom, positive: bool = True):
+        # atoms are interned and kept alive by the literal, so their identity is a key as long as the literal lives
+        return id(atom), bool(positive)
+
+    def _setup(self, atom: Atom, positive: bool = True) -> None:
+        self._set(atom=atom, positive=positive)
 
     def __str__(self):
         if self.positive:
@@ -163,76 +233,159 @@ class Literal:
             return self.positive == other.positive and self.atom == other.atom
         return False
 
+    def __hash__(self):
+        return hash((self.positive, self.atom))
+
     def get_vars(self) -> List[str]:
         return self.atom.get_vars()
 
 
-class Clause:
+class Clause(Interned):
     #  disjunction of literals
 
-    def __init__(self, literals: List[Literal]):
-        self.literals = literals
+    __slots__ = ("literals", "_literal_set")
+
+    @classmethod
+    def _key(cls, literals: List[Literal]):
+        return tuple(id(lit) for lit in literals)
+
+    def _setup(self, literals: List[Literal]) -> None:
+        self._set(literals=tuple(literals), _literal_set=frozenset(literals), _args=(tuple(literals), ))
 
     def __str__(self):
         return " v ".join(f"{lit}" for lit in self.literals)
 
     def __repr__(self):
-        return f"Clause(literals={self.literals})"
+        return f"Clause(literals={list(self.literals)})"
 
     def __eq__(self, other):
         if isinstance(other, Clause):
-            for lit in self.literals:
-                if lit not in other.literals:
-                    return False
-            return True
+            return self._literal_set == other._literal_set
         return False
 
+    def __hash__(self):
+        return hash(self._literal_set)
+
 
 # TODO Currently only works for CNF
 class Formula:
 
+    __slots__ = ("clauses", "_predicates", "_atoms", "_distinct_atoms", "_vars", "_canonical_key")
+
     def __init__(self, clauses: List[Clause]):
-        self.clauses = clauses  # TODO
+        self.clauses = tuple(clauses)  # TODO
+        self._predicates = None
+        self._atoms = None
+        self._distinct_atoms = None
+        self._vars = None
+        self._canonical_key = None
 
     def __str__(self):
         return " ^ ".join(f"({clause})" for clause in self.clauses)
 
     def __repr__(self):
-        return f"Formula[CNF](clauses={self.clauses})"
+        return f"Formula[CNF](clauses={list(self.clauses)})"
+
+    def __getstate__(self):
+        return list(self.clauses)
+
+    def __setstate__(self, state):
+        Formula.__init__(self, state)
 
     def get_distinct_predicates(self) -> Set[Predicate]:
-        p_set = set()
-        for clause in self.clauses:
-            for literal in clause.literals:
-                p_set.add(literal.atom.predicate)
-        return p_set
+        if self._predicates is None:
+            self._predicates = frozenset(lit.atom.predicate for clause in self.clauses for lit in clause.literals)
+        return set(self._predicates)
 
     def get_atoms(self) -> Dict[str, Atom]:
-        p_dict = {}
-        for clause in self.clauses:
-            for literal in clause.literals:
-                p_dict[str(literal.atom)] = literal.atom
-        return p_dict
+        if self._atoms is None:
+            self._atoms = {str(lit.atom): lit.atom for clause in self.clauses for lit in clause.literals}
+        return dict(self._atoms)
 
     def get_distinct_atoms(self) -> Dict[str, Atom]:
-        p_dict = {}
-        for clause in self.clauses:
-            for literal in clause.literals:
-                p_dict[literal.atom.renamed_str()] = literal.atom
-        return p_dict
+        if self._distinct_atoms is None:
+            self._distinct_atoms = {lit.atom.renamed_str(): lit.atom for clause in self.clauses
+                                    for lit in clause.literals}
+        return dict(self._distinct_atoms)
 
     def get_distinct_vars(self) -> List[str]:
-        distinct_vars = set()
-        for clause in self.clauses:
-            for literal in clause.literals:
-                for variable in literal.get_vars():
-                    distinct_vars.add(variable)
-        return list(distinct_vars)
+        """
+        :return: names of variables of the formula in sorted order
+        """
+        if self._vars is None:
+            self._vars = tuple(sorted({v for clause in self.clauses for lit in clause.literals
+                                       for v in lit.get_vars()}))
+        return list(self._vars)
+
+    def canonical_key(self) -> Tuple:
+        """
+        Key equal for formulas differing only by names of variables, order of literals and order of clauses (or
+        repeated literals and clauses). Variables are renamed across the whole formula to the order giving the
+        smallest key, for formulas with more than MAX_CANONICAL_VARS variables the order of the first appearance
+        in sorted literals is used, so equivalent formulas of this size may get different keys.
+        :return: sorted tuple of clauses, clause is a sorted tuple of literals (predicate name, arity, arguments,
+        negated), an argument is (0, index of variable) or (1, name of constant)
+        """
+        if self._canonical_key is None:
+            names = sorted({t.name for clause in self.clauses for lit in clause.literals
+                            for t in lit.atom.variables if isinstance(t, Variable)})
+            if len(names) <= MAX_CANONICAL_VARS:
+                orders = itertools.permutations(range(len(names)))
+            else:
+                orders = [self._appearance_order(names)]
+            self._canonical_key = min(self._key_for(dict(zip(names, order))) for order in orders)
+        return self._canonical_key
+
+    def _key_for(self, mapping: Dict[str, int]) -> Tuple:
+        def arg(term):
+            return (0, mapping[term.name]) if isinstance(term, Variable) else (1, term.name)
+
+        return tuple(sorted({tuple(sorted({(lit.atom.predicate.name, lit.atom.predicate.arity,
+                                            tuple(arg(t) for t in lit.atom.variables), not lit.positive)
+                                           for lit in clause.literals}))
+                             for clause in self.clauses}))
+
+    def _appearance_order(self, names: List[str]) -> Tuple[int, ...]:
+        # variables ordered by the first appearance in literals sorted with all variables considered equal
+        def masked(lit):
+            args = tuple((0, "") if isinstance(t, Variable) else (1, t.name) for t in lit.atom.variables)
+            return lit.atom.predicate.name, lit.atom.predicate.arity, args, not lit.positive
+
+        order = {}
+        for lit in sorted((lit for clause in self.clauses for lit in clause.literals), key=masked):
+            for t in lit.atom.variables:
+                if isinstance(t, Variable) and t.name not in order:
+                    order[t.name] = len(order)
+        return tuple(order[name] for name in names)
+
+    def canonical(self) -> "Formula":
+        """
+        :return: formula with clauses and literals in the order of canonical_key and variables X_0, X_1, ...
+        """
+        clauses = []
+        for c_key in self.canonical_key():
+            literals = []
+            for name, arity, args, negated in c_key:
+                terms = [Variable(f"X_{value}") if kind == 0 else Constant(value) for kind, value in args]
+                literals.append(Literal(Atom(Predicate(name, arity), terms), not negated))
+            clauses.append(Clause(literals))
+        return type(self)(clauses)
+
+    def structural_hash(self) -> str:
+        """
+        :return: hex digest of canonical_key, stable across processes
+        """
+        return hashlib.sha1(repr(self.canonical_key()).encode("utf-8")).hexdigest()
+
+    def equivalent(self, other: "Formula") -> bool:
+        return self.canonical_key() == other.canonical_key()
 
 
 class CNF(Formula):
     #  conjunction of clauses
 
+    __slots__ = ()
+
     def __init__(self, clauses: List[Clause]):
         super().__init__(clauses)
 
@@ -240,7 +393,7 @@ class CNF(Formula):
         return " ^ ".join(f"({clause})" for clause in self.clauses)
 
     def __repr__(self):
-        return f"CNF(clauses={self.clauses})"
+        return f"CNF(clauses={list(self.clauses)})"
 
 
 class WeightedFormula:
@@ -260,6 +413,15 @@ class WeightedFormula:
             return self.weight == other.weight and self.formula == other.formula
         return False
 
+    def canonical(self) -> "WeightedFormula":
+        return WeightedFormula(self.weight, self.formula.canonical())
+
+    def structural_hash(self) -> str:
+        """
+        :return: structural hash of the formula, the weight is not included
+        """
+        return self.formula.structural_hash()
+
 
 class MLN:
 
@@ -272,3 +434,18 @@ class MLN:
 
     def __repr__(self):
         return f"MLN({self.weighted_formulas})"
+
+    def merge_equivalent(self) -> "MLN":
+        """
+        Equivalent formulas have the same number of satisfied groundings in every world, so they are replaced by
+        the first of them weighted by the sum of their weights.
+        :return: MLN without equivalent formulas
+        """
+        merged = {}  # type: Dict[str, WeightedFormula]
+        for wf in self.weighted_formulas:
+            key = wf.structural_hash()
+            if key in merged:
+                merged[key] = WeightedFormula(merged[key].weight + wf.weight, merged[key].formula)
+            else:
+                merged[key] = wf
+        return MLN(list(merged.values()))
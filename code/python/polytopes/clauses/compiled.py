@@ -0,0 +1,94 @@
+import numpy as np
+
+from typing import Dict, List
+
+from clauses.cnf import Constant, Formula, MLN, Predicate, Variable
+
+
+class CompiledMLN:
+    """
+    Formulas of an MLN in flat arrays. Formula f has clauses formula_offsets[f]:formula_offsets[f + 1], clause c
+    has literals clause_offsets[c]:clause_offsets[c + 1]. A literal is given by its predicate id, sign and argument
+    slots (padded by PAD) - a non-negative slot is the index of a variable in the sorted names of distinct variables
+    of the formula, a negative slot -k - 1 is the k-th constant.
+    """
+
+    PAD = np.iinfo(np.int64).min
+
+    def __init__(self, formulas: List[Formula], weights: List[float] = None):
+        self.formulas = formulas
+        self.weights = np.array([1.0 for _ in formulas] if weights is None else weights, dtype=np.float64)
+        self.predicates = sorted({p for formula in formulas for p in formula.get_distinct_predicates()})
+        self.predicate_ids = {p: ix for ix, p in enumerate(self.predicates)}  # type: Dict[Predicate, int]
+        self.arities = np.array([p.arity for p in self.predicates], dtype=np.int64)
+        self.constants = []  # type: List[Constant]
+        self.variables = [sorted({term.name for clause in formula.clauses for literal in clause.literals
+                                  for term in literal.atom.variables if isinstance(term, Variable)})
+                          for formula in formulas]  # type: List[List[str]]
+        self.variable_counts = np.array([len(v) for v in self.variables], dtype=np.int64)
+        max_arity = int(self.arities.max()) if len(self.arities) else 0
+        formula_offsets, clause_offsets = [0], [0]
+        literal_predicates, literal_signs, literal_slots = [], [], []
+        constant_ids = {}
+        for formula, variables in zip(formulas, self.variables):
+            slots = {v: ix for ix, v in enumerate(variables)}
+            for clause in formula.clauses:
+                for literal in clause.literals:
+                    literal_predicates.append(self.predicate_ids[literal.atom.predicate])
+                    literal_signs.append(literal.positive)
+                    row = [self.PAD] * max_arity
+                    for ix, term in enumerate(literal.atom.variables):
+                        if isinstance(term, Variable):
+                            row[ix] = slots[term.name]
+                        else:
+                            if term not in constant_ids:
+                                constant_ids[term] = len(self.constants)
+                                self.constants.append(term)
+                            row[ix] = -constant_ids[term] - 1
+                    literal_slots.append(row)
+                clause_offsets.append(len(literal_predicates))
+            formula_offsets.append(len(clause_offsets) - 1)
+        self.formula_offsets = np.array(formula_offsets, dtype=np.int64)
+        self.clause_offsets = np.array(clause_offsets, dtype=np.int64)
+        self.literal_predicates = np.array(literal_predicates, dtype=np.int64)
+        self.literal_signs = np.array(literal_signs, dtype=np.bool_)
+        self.literal_slots = np.array(literal_slots, dtype=np.int64).reshape(len(literal_predicates), max_arity)
+
+    @staticmethod
+    def from_mln(mln: MLN) -> "CompiledMLN":
+        return CompiledMLN([wf.formula for wf in mln.weighted_formulas], [wf.weight for wf in mln.weighted_formulas])
+
+    @property
+    def formula_number(self) -> int:
+        return len(self.formula_offsets) - 1
+
+    def literal_range(self, ix: int) -> (int, int):
+        """
+        :param ix: index of formula
+        :return: range of literals of the formula
+        """
+        return (int(self.clause_offsets[self.formula_offsets[ix]]),
+                int(self.clause_offsets[self.formula_offsets[ix + 1]]))
+
+    def clause_ids(self, ix: int) -> np.ndarray:
+        """
+        :param ix: index of formula
+        :return: index of clause (relative to the formula) for each literal of the formula
+        """
+        offsets = self.clause_offsets[self.formula_offsets[ix]:self.formula_offsets[ix + 1] + 1]
+        return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+    def ground_arguments(self, ix: int, assignments: np.ndarray) -> np.ndarray:
+        """
+        Substitutes assignments of variables into arguments of all literals of a formula.
+        :param ix: index of formula
+        :param assignments: matrix (assignments x variables of the formula) of domain elements
+        :return: array (assignments x literals x max arity), constants keep their negative slots and missing
+        arguments are PAD
+        """
+        start, end = self.literal_range(ix)
+        slots = self.literal_slots[start:end]
+        values = np.column_stack((assignments, np.zeros(len(assignments), dtype=np.int64)))
+        out = values[:, np.where(slots >= 0, slots, values.shape[1] - 1)]
+        out[:, slots < 0] = slots[slots < 0]
+        return out
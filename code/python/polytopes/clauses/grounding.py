@@ -0,0 +1,132 @@
+import itertools
+
+import numpy as np
+
+from typing import Dict, List, Tuple
+
+from clauses.cnf import Formula, Predicate
+from clauses.compiled import CompiledMLN
+
+
+class Grounding:
+    """
+    Ground atoms and groundings of formulas over domain {0, ..., n - 1}. A ground formula is a tuple of clauses,
+    a clause is a sorted tuple of literals - atom index + 1, negative for negated atoms. Groundings (and atoms) are
+    ordered by the greatest constant they use, so the groundings for a smaller domain are a prefix of the
+    groundings for a larger one and the grounding can be extended domain by domain. Arguments of atoms are domain
+    elements, constants of formulas are negative (-k - 1 for the k-th constant of the compiled MLN).
+    """
+
+    def __init__(self, formulas: List[Formula], reflexive: bool = True, compiled: CompiledMLN = None):
+        self.formulas = formulas
+        self.reflexive = reflexive
+        self.compiled = compiled or CompiledMLN(formulas)
+        self.domain_size = 0
+        self.atoms = []  # type: List[Tuple[Predicate, Tuple[int, ...]]]
+        self.atom_ids = {}  # type: Dict[Tuple[int, ...], int]
+        self.groundings = [[] for _ in formulas]  # type: List[List[Tuple[Tuple[int, ...], ...]]]
+        self.assignments = [[] for _ in formulas]  # type: List[List[Tuple[int, ...]]]
+        self.variables = self.compiled.variables
+        self.offsets = [[0 for _ in formulas]]
+        self.atom_offsets = [0]
+
+    def ground(self, domain_size: int) -> "Grounding":
+        """
+        Extends the grounding to the given domain size.
+        :param domain_size:
+        :return: self
+        """
+        while self.domain_size < domain_size:
+            constant = self.domain_size
+            for ix in range(len(self.formulas)):
+                assignments = list(self._new_assignments(len(self.variables[ix]), constant))
+                if assignments:
+                    self.groundings[ix].extend(self._ground_formula(ix, assignments))
+                    self.assignments[ix].extend(assignments)
+            self.domain_size += 1
+            self.offsets.append([len(g) for g in self.groundings])
+            self.atom_offsets.append(len(self.atoms))
+        return self
+
+    def formula_groundings(self, ix: int, domain_size: int) -> List[Tuple[Tuple[int, ...], ...]]:
+        """
+        :param ix: index of formula
+        :param domain_size:
+        :return: ground formulas of ix-th formula for the domain size
+        """
+        self.ground(domain_size)
+        return self.groundings[ix][:self.offsets[domain_size][ix]]
+
+    def atom_number(self, domain_size: int) -> int:
+        """
+        :param domain_size:
+        :return: number of atoms appearing in groundings for the domain size (their indices are 0..number-1)
+        """
+        self.ground(domain_size)
+        return self.atom_offsets[domain_size]
+
+    def atom_name(self, atom_id: int, constants: List = None) -> str:
+        predicate, args = self.atoms[atom_id]
+        names = [self.compiled.constants[-arg - 1] if arg < 0 else arg if constants is None else constants[arg]
+                 for arg in args]
+        return f"{predicate.name}({','.join(str(name) for name in names)})"
+
+    def _new_assignments(self, arity: int, constant: int):
+        for assignment in itertools.product(range(constant + 1), repeat=arity):
+            if constant not in assignment:
+                continue
+            if not self.reflexive and len(set(assignment)) != arity:
+                continue
+            yield assignment
+
+    def _ground_formula(self, ix: int, assignments: List[Tuple[int, ...]]) -> List[Tuple[Tuple[int, ...], ...]]:
+        """
+        :param ix: index of formula
+        :param assignments: assignments of domain elements to variables of the formula
+        :return: ground formula for each assignment
+        """
+        compiled = self.compiled
+        start, end = compiled.literal_range(ix)
+        args = compiled.ground_arguments(ix, np.array(assignments, dtype=np.int64).reshape(len(assignments), -1))
+        predicates = np.broadcast_to(compiled.literal_predicates[start:end, None], args.shape[:2] + (1, ))
+        rows = np.concatenate((predicates, args), axis=2).reshape(-1, args.shape[2] + 1)
+        # atoms get their indices in the order of the first appearance
+        _, first, inverse = np.unique(self._row_keys(rows), return_index=True, return_inverse=True)
+        ids = np.empty(len(first), dtype=np.int64)
+        for u_ix in np.argsort(first, kind="stable"):
+            ids[u_ix] = self._atom_id(tuple(rows[first[u_ix]].tolist()))
+        literals = (ids[inverse.ravel()] + 1).reshape(len(assignments), end - start)
+        literals = np.where(compiled.literal_signs[start:end], literals, -literals).tolist()
+        clause_ids = compiled.clause_ids(ix).tolist()
+        out = []
+        if clause_ids[-1] == 0:
+            for row in literals:
+                clause = set(row)
+                out.append(() if any(-lit in clause for lit in clause) else (tuple(sorted(clause)), ))
+            return out
+        for row in literals:
+            clauses = [set() for _ in range(clause_ids[-1] + 1)]
+            for clause_id, lit in zip(clause_ids, row):
+                clauses[clause_id].add(lit)
+            out.append(tuple(sorted({tuple(sorted(c)) for c in clauses if not any(-lit in c for lit in c)})))
+        return out
+
+    def _row_keys(self, rows: np.ndarray) -> np.ndarray:
+        """
+        :param rows: matrix of (predicate id, arguments), arguments are at most self.domain_size
+        :return: one integer per row if the rows fit into int64, rows as void scalars otherwise
+        """
+        shift = len(self.compiled.constants) + 1
+        radix = self.domain_size + shift + 2
+        if len(self.compiled.predicates) * radix ** (rows.shape[1] - 1) < 2 ** 62:
+            digits = np.where(rows[:, 1:] == CompiledMLN.PAD, 0, rows[:, 1:] + shift + 1)
+            return rows[:, 0] * radix ** (rows.shape[1] - 1) + digits @ radix ** np.arange(rows.shape[1] - 1)
+        rows = np.ascontiguousarray(rows)
+        return rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+
+    def _atom_id(self, key: Tuple[int, ...]) -> int:
+        if key not in self.atom_ids:
+            predicate = self.compiled.predicates[key[0]]
+            self.atom_ids[key] = len(self.atoms)
+            self.atoms.append((predicate, key[1:predicate.arity + 1]))
+        return self.atom_ids[key]
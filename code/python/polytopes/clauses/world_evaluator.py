@@ -0,0 +1,137 @@
+import numpy as np
+
+from functools import reduce
+from typing import Dict, List, Union
+
+from clauses.cnf import MLN, Predicate
+from clauses.compiled import CompiledMLN
+
+_LETTERS = "acdefghijklmnopqrstuvwxyzACDEFGHIJKLMNOPQRSTUVWXYZ"  # b is the axis of worlds
+
+
+class WorldEvaluator:
+    """
+    Satisfaction counts of formulas in possible worlds over domain {0, ..., n - 1}. A world is a list of boolean
+    tensors, one per predicate of the compiled MLN (in its order) with one axis of size n + number of constants
+    per argument, constants of formulas are the elements n, n + 1, ... A batch of worlds has an extra first axis.
+    A literal is a view of its predicate tensor (diagonals for repeated variables, fixed indices for constants)
+    broadcast over the variables of the formula, so clauses and formulas are evaluated for all assignments of
+    variables and all worlds of the batch at once.
+    """
+
+    def __init__(self, compiled: CompiledMLN, domain_size: int, reflexive: bool = True):
+        """
+        :param compiled: formulas to count
+        :param domain_size: number of domain elements the variables range over
+        :param reflexive: count also assignments of one element to several variables of a formula
+        """
+        self.compiled = compiled
+        self.domain_size = domain_size
+        self.reflexive = reflexive
+        self.size = domain_size + len(compiled.constants)
+        self.shapes = [(self.size, ) * int(arity) for arity in compiled.arities]
+        self.atom_offsets = np.cumsum([0] + [self.size ** int(arity) for arity in compiled.arities])
+        self._masks = {}  # type: Dict[int, np.ndarray]
+
+    @staticmethod
+    def from_mln(mln: MLN, domain_size: int, reflexive: bool = True) -> "WorldEvaluator":
+        return WorldEvaluator(CompiledMLN.from_mln(mln), domain_size, reflexive)
+
+    @property
+    def atom_number(self) -> int:
+        return int(self.atom_offsets[-1])
+
+    def split(self, bits: np.ndarray) -> List[np.ndarray]:
+        """
+        :param bits: matrix (worlds x atom_number) of truth values, atoms of each predicate in C order
+        :return: batch of worlds (views of bits)
+        """
+        bits = np.asarray(bits, dtype=np.bool_).reshape(-1, self.atom_number)
+        return [bits[:, start:end].reshape((len(bits), ) + shape)
+                for start, end, shape in zip(self.atom_offsets[:-1], self.atom_offsets[1:], self.shapes)]
+
+    def random_worlds(self, batch: int, rng: np.random.Generator = None, probability: float = 0.5) \
+            -> List[np.ndarray]:
+        """
+        :return: batch of worlds with atoms true independently with the probability
+        """
+        rng = rng or np.random.default_rng()
+        return self.split(rng.random((batch, self.atom_number)) < probability)
+
+    def tensors(self, world: Dict[Predicate, np.ndarray]) -> List[np.ndarray]:
+        """
+        :param world: predicate -> tensor (or batch of tensors)
+        :return: tensors in the order of predicates of the compiled MLN
+        """
+        return [np.asarray(world[p], dtype=np.bool_) for p in self.compiled.predicates]
+
+    def evaluate(self, world: Union[List[np.ndarray], Dict[Predicate, np.ndarray]]) -> np.ndarray:
+        """
+        :param world: one possible world
+        :return: number of satisfied groundings of each formula
+        """
+        if isinstance(world, dict):
+            world = self.tensors(world)
+        return self.evaluate_many([np.asarray(t)[None] for t in world])[0]
+
+    def evaluate_many(self, worlds: Union[List[np.ndarray], Dict[Predicate, np.ndarray]]) -> np.ndarray:
+        """
+        :param worlds: batch of possible worlds
+        :return: matrix (worlds x formulas) of numbers of satisfied groundings
+        """
+        if isinstance(worlds, dict):
+            worlds = self.tensors(worlds)
+        worlds = [np.asarray(t, dtype=np.bool_) for t in worlds]
+        batch = len(worlds[0]) if worlds else 0
+        out = np.empty((batch, self.compiled.formula_number), dtype=np.int64)
+        for ix in range(self.compiled.formula_number):
+            out[:, ix] = self._count(ix, worlds, batch)
+        return out
+
+    def log_weights(self, worlds) -> np.ndarray:
+        """
+        :return: unnormalized log-probability (sum of weights of satisfied groundings) of each world
+        """
+        return self.evaluate_many(worlds) @ self.compiled.weights
+
+    def _count(self, ix: int, worlds: List[np.ndarray], batch: int) -> np.ndarray:
+        compiled = self.compiled
+        variables = int(compiled.variable_counts[ix])
+        start, end = compiled.literal_range(ix)
+        clause_ids = compiled.clause_ids(ix)
+        clauses = [[] for _ in range(int(clause_ids[-1]) + 1)] if len(clause_ids) else []
+        for lit, clause_id in zip(range(start, end), clause_ids):
+            clauses[clause_id].append(self._literal(lit, worlds, variables))
+        satisfied = reduce(np.logical_and, (reduce(np.logical_or, literals) for literals in clauses),
+                           np.ones((batch, ) + (1, ) * variables, dtype=np.bool_))
+        shape = (batch, ) + (self.domain_size, ) * variables
+        satisfied = np.broadcast_to(satisfied, shape)
+        if not self.reflexive and variables > 1:
+            satisfied = satisfied & self._distinct_mask(variables)
+        return satisfied.sum(axis=tuple(range(1, variables + 1)))
+
+    def _literal(self, lit: int, worlds: List[np.ndarray], variables: int) -> np.ndarray:
+        """
+        :return: truth values of the literal - tensor (batch, n or 1 per variable of the formula)
+        """
+        compiled = self.compiled
+        predicate = int(compiled.literal_predicates[lit])
+        slots = compiled.literal_slots[lit, :int(compiled.arities[predicate])].tolist()
+        index = tuple(self.domain_size - slot - 1 if slot < 0 else slice(0, self.domain_size) for slot in slots)
+        tensor = worlds[predicate][(slice(None), ) + index]
+        inputs = "".join(_LETTERS[slot] for slot in slots if slot >= 0)
+        used = sorted({slot for slot in slots if slot >= 0})
+        tensor = np.einsum(f"b{inputs}->b{''.join(_LETTERS[slot] for slot in used)}", tensor)
+        tensor = tensor.reshape((len(tensor), ) + tuple(self.domain_size if v in used else 1
+                                                        for v in range(variables)))
+        return tensor if compiled.literal_signs[lit] else ~tensor
+
+    def _distinct_mask(self, variables: int) -> np.ndarray:
+        if variables not in self._masks:
+            grids = np.indices((self.domain_size, ) * variables)
+            mask = np.ones((self.domain_size, ) * variables, dtype=np.bool_)
+            for a in range(variables):
+                for b in range(a + 1, variables):
+                    mask &= grids[a] != grids[b]
+            self._masks[variables] = mask
+        return self._masks[variables]
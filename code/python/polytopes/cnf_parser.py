@@ -1,12 +1,31 @@
+import logging
 import re
 import clauses.cnf as ccnf
 
+from typing import Iterable, List
+
+logger = logging.getLogger(__name__)
+
+KEYWORDS = {"AND", "OR", "NOT"}
+TOKEN_RE = re.compile(r"""
+    (?P<number>[-+]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?(?=\s))
+    |(?P<name>\w+)
+    |(?P<lpar>\()
+    |(?P<rpar>\))
+    |(?P<comma>,)
+    |(?P<space>\s+)
+    |(?P<error>.)
+""", re.VERBOSE)
+
 
 class CnfParser:
 
     def __init__(self):
         self.predicates = {}
+        self.variables = {}
+        self.atoms = {}
         self.formulas = []
+        self.line_number = 0
 
     def read_file(self, input_file: str):
         # INPUT FORMAT:
@@ -16,60 +35,91 @@ class CnfParser:
         # AND HAS PRECEDENCE OVER OR THERE! also bracketing of clauses is also ignored...
         # A(X) OR B(X) AND C(X) -> clauses A(X) OR B(X), C(X)
         # A(X) OR (B(X) AND C(X)) -> same as above
+        # one (optionally weighted) formula per line, blank lines are skipped
         with open(input_file) as file:
-            for line in file:
-                self.read_cnf(line)
+            self.read_lines(file)
+
+    def read_lines(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            self.read_cnf(line)
 
     def read_cnf(self, cnf: str) -> None:
-        print(f"Parsing CNF: {cnf}")
-        weight_re = re.search(r"^\s*([-+]?\d*\.\d+|\d+)\s+", cnf)
+        self.line_number += 1
+        if not cnf.strip():
+            return
+        logger.debug("Parsing CNF: %s", cnf.rstrip())
+        tokens = [(m.lastgroup, m.group(), m.start()) for m in TOKEN_RE.finditer(cnf) if m.lastgroup != "space"]
         weight = 1.0
-        if weight_re is not None:
-            weight = float(weight_re.group(1))
-            cnf = cnf[weight_re.end(1):]
-        clauses = re.split(r"\s*AND\s+", cnf)
-        cnf_known_vars = {}
-        cnf_clauses = []
-        for clause in clauses:
-            literals = re.split(r"\s*OR\s+", clause)
-            cnf_literals = []
-            for literal in literals:
-                while literal.startswith("("):
-                    literal = literal[1:]
-                neg_match = re.match(r"^\s*NOT\s+", literal)
-                positive = neg_match is None
-                atom = literal
-                if not positive:
-                    atom = literal[neg_match.end():]
-                split_atom = re.split(r"\(", atom)
-                if len(split_atom) != 2:
-                    raise ValueError(f"More than one left bracket encountered in {atom}")
-                atom_name = split_atom[0].strip()
-                variables = split_atom[1]
-                vars_here = []
-                for v in re.split(r"\s*,\s*", variables):
-                    b = re.search(r"\w+", v)
-                    v = b.group(0)
-                    v = v.strip()
-                    if v not in cnf_known_vars:
-                        cnf_known_vars[v] = ccnf.Variable(v)
-                    vars_here.append(cnf_known_vars[v])
-                if atom_name not in self.predicates:
-                    self.predicates[atom_name] = ccnf.Predicate(atom_name, len(vars_here))
-                cnf_predicate = self.predicates[atom_name]
-                if cnf_predicate.arity != len(vars_here):
-                    raise ValueError(f"{cnf_predicate} is already defined with arity {cnf_predicate.arity} but "
-                                     f"now the arity is {len(vars_here)}")
-                cnf_atom = ccnf.Atom(cnf_predicate, vars_here)
-                cnf_literal = ccnf.Literal(cnf_atom, positive)
-                cnf_literals.append(cnf_literal)
-            cnf_clause = ccnf.Clause(cnf_literals)
-            cnf_clauses.append(cnf_clause)
-        formula = ccnf.Formula(cnf_clauses)
-        self.formulas.append(ccnf.WeightedFormula(weight, formula))
+        if tokens[0][0] == "number":
+            weight = float(tokens[0][1])
+            tokens = tokens[1:]
+        self.formulas.append(ccnf.WeightedFormula(weight, ccnf.Formula(self._clauses(tokens, cnf))))
+
+    def _clauses(self, tokens, cnf: str) -> List[ccnf.Clause]:
+        cnf_clauses, cnf_literals = [], []
+        ix = 0
+        while ix < len(tokens):
+            while ix < len(tokens) and tokens[ix][0] == "lpar":
+                ix += 1
+            positive = True
+            if ix < len(tokens) and tokens[ix][1] == "NOT":
+                positive = False
+                ix += 1
+            literal, ix = self._literal(tokens, ix, positive, cnf)
+            cnf_literals.append(literal)
+            while ix < len(tokens) and tokens[ix][0] == "rpar":
+                ix += 1
+            if ix == len(tokens) or tokens[ix][1] == "AND":
+                cnf_clauses.append(ccnf.Clause(cnf_literals))
+                cnf_literals = []
+            elif tokens[ix][1] != "OR":
+                self._error(f"expected AND or OR, got '{tokens[ix][1]}'", tokens[ix], cnf)
+            ix += 1
+        if cnf_literals or not cnf_clauses:
+            self._error("unexpected end of formula", None, cnf)
+        return cnf_clauses
+
+    def _literal(self, tokens, ix: int, positive: bool, cnf: str) -> (ccnf.Literal, int):
+        if ix >= len(tokens) or tokens[ix][0] != "name" or tokens[ix][1] in KEYWORDS:
+            self._error("expected predicate name", tokens[ix] if ix < len(tokens) else None, cnf)
+        atom_name = tokens[ix][1]
+        if ix + 1 >= len(tokens) or tokens[ix + 1][0] != "lpar":
+            self._error(f"expected '(' after {atom_name}", tokens[ix], cnf)
+        ix += 2
+        vars_here = []
+        while True:
+            if ix >= len(tokens) or tokens[ix][0] != "name" or tokens[ix][1] in KEYWORDS:
+                self._error(f"expected variable in {atom_name}", tokens[ix] if ix < len(tokens) else None, cnf)
+            name = tokens[ix][1]
+            if name not in self.variables:
+                self.variables[name] = ccnf.Variable(name)
+            vars_here.append(self.variables[name])
+            ix += 1
+            if ix < len(tokens) and tokens[ix][0] == "comma":
+                ix += 1
+                continue
+            if ix < len(tokens) and tokens[ix][0] == "rpar":
+                ix += 1
+                break
+            self._error(f"expected ',' or ')' in {atom_name}", tokens[ix] if ix < len(tokens) else None, cnf)
+        if atom_name not in self.predicates:
+            self.predicates[atom_name] = ccnf.Predicate(atom_name, len(vars_here))
+        cnf_predicate = self.predicates[atom_name]
+        if cnf_predicate.arity != len(vars_here):
+            raise ValueError(f"Line {self.line_number}: {cnf_predicate} is already defined with arity "
+                             f"{cnf_predicate.arity} but now the arity is {len(vars_here)}")
+        key = (atom_name, tuple(v.name for v in vars_here))
+        if key not in self.atoms:
+            self.atoms[key] = ccnf.Atom(cnf_predicate, vars_here)
+        return ccnf.Literal(self.atoms[key], positive), ix
+
+    def _error(self, message: str, token, cnf: str):
+        column = len(cnf.rstrip()) if token is None else token[2]
+        raise ValueError(f"Line {self.line_number}, column {column + 1}: {message} in '{cnf.strip()}'")
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
     parser = CnfParser()
     parser.read_cnf("A(X,Y) OR B(Y,X) OR A(Y,Z)")
     parser.read_cnf("A(X,Y) AND B(Y,X) AND NOT A(Y,Z)")
@@ -80,4 +130,3 @@ if __name__ == "__main__":
     print(parser.predicates)
     print(parser.formulas)
     parser.read_cnf("Z(Z,Z,Z)")
-
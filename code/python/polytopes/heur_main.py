@@ -9,6 +9,7 @@ import argparse
 
 import time
 
+import tracing
 from possible_world import PossibleWorld
 
 if __name__ == "__main__":
@@ -18,6 +19,14 @@ if __name__ == "__main__":
     a_parser.add_argument("-a", "--alpha", help="Alpha (> 0 - heuristic)", type=float, default=-1.0)
     a_parser.add_argument("-m", "--method", help="Solver type", type=str, choices=['qhull', 'ilp'],
                           default='ilp')
+    a_parser.add_argument("-s", "--seeds", help="Number of random directions of local search seeding the convex "
+                                                "hull (qhull)", type=int, default=16)
+    a_parser.add_argument("-l", "--lp_directions", help="Number of random directions of the LP outer approximation, "
+                                                        "ILPs are run only for facets not tight in it (qhull)",
+                          type=int, default=0)
+    a_parser.add_argument("--seed", help="Seed of local search and random directions (qhull)", type=int)
+    a_parser.add_argument("-t", "--trace", help="Write Chrome trace of solver phases to this path and print a "
+                                                "summary of phases")
     args = a_parser.parse_args()
     parser = CnfParser()
     parser.read_file(args.input_file)
@@ -29,6 +38,8 @@ if __name__ == "__main__":
     pw = PossibleWorld([Constant(f"d_{i}") for i in range(domain_size)], mln.weighted_formulas, [])
     a_solver = HeuristicSolver(mln, domain_size, reflexive=False)
 
+    if args.trace:
+        tracing.enable()
     ntime = time.time()
     if 1.0 > args.alpha > 0.0:
         print(f"Use relaxation with parameter {args.alpha}")
@@ -37,10 +48,14 @@ if __name__ == "__main__":
         a_solver.solve(relaxation=args.alpha)
     else:
         print("Run exact solver.")
-        a_solver.solve(method=args.method)
+        a_solver.solve(method=args.method, seeds=args.seeds, lp_directions=args.lp_directions,
+                       seed=args.seed)
 
     etime = time.time()
     print(f"Took {etime - ntime: 0.3f} s")
+    if args.trace:
+        print(tracing.TRACER.summary())
+        tracing.TRACER.write_chrome_trace(args.trace)
 
     if args.method == 'qhull' and len(mln.weighted_formulas) == 2:
         import matplotlib.pyplot as plt
@@ -1,19 +1,133 @@
 import gurobipy as g
-import itertools as itt
+import numpy as np
+import tracing
 
 from typing import List, Dict, Tuple
 
-from clauses.cnf import Formula, Atom, Constant, WeightedFormula
+from clauses.cnf import Atom, Constant, WeightedFormula
+from clauses.compiled import CompiledMLN
+from clauses.grounding import Grounding
 
 
 class PossibleWorld:
 
-    def __init__(self, domain: List[Constant], formulas: List[WeightedFormula], constraints: List[Atom], reflexive: bool = True):
+    def __init__(self, domain: List[Constant], formulas: List[WeightedFormula], constraints: List[Atom], reflexive: bool = True,
+                 compiled: CompiledMLN = None):
         self.domain = domain
         self.formulas = formulas
         self.constraints = constraints
         self.reflexive = reflexive
         self.directive_map = {'eq': g.GRB.EQUAL, 'ge': g.GRB.GREATER_EQUAL, 'le': g.GRB.LESS_EQUAL}
+        self.compiled = compiled or CompiledMLN([wf.formula for wf in formulas], [wf.weight for wf in formulas])
+        self.grounding = Grounding(self.compiled.formulas, reflexive, self.compiled)
+        self._relaxation = None
+
+    def add_groundings(self, mod: g.Model) -> (List[List[g.Var]], Dict[str, g.Var]):
+        """
+        Adds a binary variable (and its negation) for every ground atom and an indicator of satisfaction for every
+        grounding of every formula.
+        :param mod: model to extend
+        :return: (indicators of groundings of each formula, mapping from (negated) ground atom names to variables)
+        """
+        grounding = self.grounding.ground(len(self.domain))
+        names = [c.name for c in self.domain]
+        opt_variable_mapping = {}  # key - ground atom, ~ground atom
+        p_vars, n_vars = [], []
+        for atom_id in range(grounding.atom_number(len(self.domain))):
+            pos_code = grounding.atom_name(atom_id, names)
+            neg_code = f"~{pos_code}"
+            p_var = mod.addVar(vtype=g.GRB.BINARY, name=pos_code)
+            n_var = mod.addVar(vtype=g.GRB.BINARY, name=neg_code)
+            mod.addConstr(1 - p_var == n_var)
+            opt_variable_mapping[pos_code] = p_var
+            opt_variable_mapping[neg_code] = n_var
+            p_vars.append(p_var)
+            n_vars.append(n_var)
+        grand_d = []
+        a_count = 0
+        d_count = 0
+        for i in range(len(self.formulas)):
+            ds = []
+            for clauses in grounding.formula_groundings(i, len(self.domain)):
+                # D indicates that whole formula is satisfied in current assignment
+                # D = {min A}  (see below), tautological clauses are left out of the grounding
+                D = mod.addVar(lb=0.0, ub=1.0, name="D_{}".format(d_count))
+                d_count += 1
+                ds.append(D)
+                avars = []
+                for clause in clauses:
+                    # A indicates that a clause is satisfied in current assignment
+                    # A = max{variables for each literal}
+                    A = mod.addVar(lb=0.0, ub=1.0, name="A_{}".format(a_count))
+                    avars.append(A)
+                    a_count += 1
+                    mod.addGenConstrMax(A, [p_vars[lit - 1] if lit > 0 else n_vars[-lit - 1] for lit in clause], 0.0)
+                mod.addGenConstrMin(D, avars, 1.0)
+            grand_d.append(ds)
+        return grand_d, opt_variable_mapping
+
+    def add_relaxed_groundings(self, mod: g.Model) -> List[List[g.Var]]:
+        """
+        Adds the LP relaxation of add_groundings - atoms are continuous in [0, 1], max and min of the indicators are
+        replaced by their linear bounds (A >= literal, A <= sum of literals, D <= A, D >= sum of A - clauses + 1).
+        :param mod: model to extend
+        :return: indicators of groundings of each formula
+        """
+        grounding = self.grounding.ground(len(self.domain))
+        p_vars = [mod.addVar(lb=0.0, ub=1.0, name=grounding.atom_name(atom_id, [c.name for c in self.domain]))
+                  for atom_id in range(grounding.atom_number(len(self.domain)))]
+        grand_d = []
+        for i in range(len(self.formulas)):
+            ds = []
+            for clauses in grounding.formula_groundings(i, len(self.domain)):
+                D = mod.addVar(lb=0.0, ub=1.0)
+                ds.append(D)
+                avars = []
+                for clause in clauses:
+                    A = mod.addVar(lb=0.0, ub=1.0)
+                    avars.append(A)
+                    literals = [p_vars[lit - 1] if lit > 0 else 1 - p_vars[-lit - 1] for lit in clause]
+                    for literal in literals:
+                        mod.addLConstr(A, g.GRB.GREATER_EQUAL, literal)
+                    mod.addLConstr(A, g.GRB.LESS_EQUAL, g.quicksum(literals))
+                    mod.addLConstr(D, g.GRB.LESS_EQUAL, A)
+                mod.addLConstr(D, g.GRB.GREATER_EQUAL, g.quicksum(avars) - len(avars) + 1)
+            grand_d.append(ds)
+        return grand_d
+
+    def relaxation_model(self) -> (g.Model, List[g.Var]):
+        """
+        Builds the LP relaxation of satisfaction counts, its projection to the counts contains the RMP.
+        :return: (model, variables of satisfaction counts of formulas)
+        """
+        mod = g.Model()
+        grand_d = self.add_relaxed_groundings(mod)
+        formulas_satisfaction_count = []
+        for i, ds in enumerate(grand_d):
+            f_sat_count = mod.addVar(lb=0.0, name=f"F_{i}")
+            formulas_satisfaction_count.append(f_sat_count)
+            mod.addLConstr(f_sat_count, g.GRB.EQUAL, g.quicksum(ds))
+        mod.update()
+        return mod, formulas_satisfaction_count
+
+    def relaxed_bounds(self, directions) -> np.ndarray:
+        """
+        Upper bounds of direction * counts over the RMP given by the LP relaxation, the model is built once and only
+        its objective changes.
+        :param directions: matrix of directions (one per row)
+        :return: bound for each direction (inf if the LP is not solved to optimality)
+        """
+        if self._relaxation is None:
+            with tracing.span("model build", relaxed=True):
+                self._relaxation = self.relaxation_model()
+        mod, formulas_satisfaction_count = self._relaxation
+        out = []
+        for direction in np.asarray(directions, dtype=np.float64).reshape(-1, len(self.formulas)):
+            mod.setObjective(g.quicksum(float(w) * v for w, v in zip(direction, formulas_satisfaction_count)),
+                             g.GRB.MAXIMIZE)
+            self._optimize(mod)
+            out.append(mod.ObjVal if mod.status == g.GRB.OPTIMAL else np.inf)
+        return np.array(out)
 
     def satisfiable(self, satisfaction_count: Dict[int, Tuple[int, str]], write: bool = False,
                     write_name: str = "model.lp", opt_var_idx: int = -1, sense = g.GRB.MINIMIZE) \
@@ -24,96 +138,61 @@ class PossibleWorld:
         mode - 'eq', 'gt, 'lt'
         :param write: write model to file
         :param write_name: name of file to write
-        :param opt_var_idx: index of formula which should be maximized/minimized
+        :param opt_var_idx: index of formula which should be maximized/minimized, -1 - feasibility only
         :return: tuple (feasibility, satisfaction count list for each formula - i. e. a possible world in
         specified boundaries)
         """
+        with tracing.span("model build"):
+            mod, formulas_satisfaction_count = self.satisfiable_model(satisfaction_count, opt_var_idx, sense)
+        if write:
+            mod.write(write_name)
+        self._optimize(mod)
+        if mod.status != g.GRB.INFEASIBLE:
+            print("Constraints are FEASIBLE")
+        else:
+            print("Constraints are INFEASIBLE")
+        out_list = [] if mod.status == g.GRB.INFEASIBLE else [v.x for v in formulas_satisfaction_count]
+        return mod.status != g.GRB.INFEASIBLE, out_list
+
+    def satisfiable_model(self, satisfaction_count: Dict[int, Tuple[int, str]], opt_var_idx: int = -1,
+                          sense=g.GRB.MINIMIZE) -> (g.Model, List[g.Var]):
+        """
+        Builds the ILP of satisfiable without solving it.
+        :return: (model, variables of satisfaction counts of formulas)
+        """
         # create ILP
         # returns satisfiability + assignment?
         mod = g.Model()
         mod = mod.feasibility()
-        # find all atoms in CNFs
-        # create opt. variable for all possible assignments of constants to variables for each atom...
-        opt_variable_mapping = {}  # key (predicate, [domain elements])
-        a_count = 0
-        d_count = 0
-        grand_d = []
-        grand_a = []
+        grand_d, opt_variable_mapping = self.add_groundings(mod)
         formulas_satisfaction_count = []
-        for i, wf in enumerate(self.formulas):  # Right now - every formula contains one clause
-            cnf = wf.formula
+        for i, ds in enumerate(grand_d):
             target_satisfaction_count, target_mode = satisfaction_count[i]
-            distinct_vars = cnf.get_distinct_vars()
-            ds = []
             f_sat_count = mod.addVar(lb=0.0, name=f"F_{i}")
             formulas_satisfaction_count.append(f_sat_count)
-            #print(cnf)
-            assignment_generator = itt.permutations(self.domain, len(distinct_vars))
-            if self.reflexive:
-                assignment_generator = itt.product(self.domain, repeat=len(distinct_vars))
-            for assignment in assignment_generator:
-                assgnmt_dir = {a: b for a, b in zip(distinct_vars, assignment)}
-                # D indicates that whole formula is satisfied in current assignment
-                # D = {min A}  (see below)
-                D = mod.addVar(lb=0.0, name="D_{}".format(d_count))
-                grand_d.append(D)
-                d_count += 1
-                ds.append(D)
-                avars = []
-                #print("Start")
-                for clause in cnf.clauses:
-                    # A indicates that a clause is satisfied in current assignment
-                    # A = max{variables for each literal}
-                    A = mod.addVar(lb=0.0, ub=1.0, name="A_{}".format(a_count))
-                    avars.append(A)
-                    grand_a.append(A)
-                    a_count += 1
-                    cl_literals = []
-                    for literal in clause.literals:
-                        pos_code = literal.atom.assignment_name(assgnmt_dir)
-                        neg_code = f"~{pos_code}"
-                        a_code = pos_code if literal.positive else neg_code
-                        if a_code in opt_variable_mapping:
-                            opt_var = opt_variable_mapping[a_code]
-                            #print("Found")
-                        else:
-                            p_var = mod.addVar(vtype=g.GRB.BINARY, name=pos_code)
-                            n_var = mod.addVar(vtype=g.GRB.BINARY, name=neg_code)
-                            mod.addConstr(1 - p_var == n_var)
-                            opt_variable_mapping[pos_code] = p_var
-                            opt_variable_mapping[neg_code] = n_var
-                            opt_var = p_var if literal.positive else n_var
-                            #print("Not found")
-                        cl_literals.append(opt_var)
-                    mod.addGenConstrMax(A, cl_literals, 0.0)
-                mod.addGenConstrMin(D, avars, 1.0)
-            mod.addConstr(g.quicksum(ds), self.directive_map[target_mode], target_satisfaction_count)
+            mod.addLConstr(g.quicksum(ds), self.directive_map[target_mode], target_satisfaction_count,
+                           name=f"count_{i}")
             mod.addConstr(f_sat_count == g.quicksum(ds))
         # add always holding ground truths:
         for crn in self.constraints:  # obsolete
             name = crn.assignment_name({})
             optvar = opt_variable_mapping[name]
-            mod.addConstr(optvar, g.GRB.EQUAL, 1)
-        if write:
-            mod.write(write_name)
-        if opt_var_idx > 0:
+            mod.addLConstr(optvar, g.GRB.EQUAL, 1)
+        if opt_var_idx >= 0:
             mod.setObjective(formulas_satisfaction_count[opt_var_idx], sense)
         else:
             mod.setObjective(0)
-        mod.optimize()
-        if mod.status != g.GRB.INFEASIBLE:
-            print("Constraints are FEASIBLE")
-            #if len(self.domain) < 7:
-            #    for v in opt_variable_mapping.values():
-            #        print(v.x, v.varname)
-                # for v in grand_d:
-                #     print(v.x, v.varname)
-                # for v in grand_a:
-                #     print(v.x, v.varname)
-        else:
-            print("Constraints are INFEASIBLE")
-        out_list = [] if mod.status == g.GRB.INFEASIBLE else [v.x for v in formulas_satisfaction_count]
-        return mod.status != g.GRB.INFEASIBLE, out_list
+        mod.update()
+        return mod, formulas_satisfaction_count
+
+    @staticmethod
+    def _optimize(mod: g.Model) -> None:
+        tracing.count("variables", mod.NumVars)
+        tracing.count("constraints", mod.NumConstrs + mod.NumGenConstrs)
+        with tracing.span("optimize") as span:
+            mod.optimize()
+            span.set(status=mod.status)
+        tracing.count("nodes explored", mod.NodeCount)
 
     def create_assignments(self, opt_var_map: Dict, var_map: Dict):
         pass
@@ -129,72 +208,43 @@ class PossibleWorld:
         :param write_file:
         :return:
         """
+        with tracing.span("model build"):
+            mod, tar_vars, greatest_distance = self.furthest_model(var_limits, facet_eq)
+        if write:
+            mod.write(write_file)
+        self._optimize(mod)
+
+        if mod.status == g.GRB.OPTIMAL:  # TODO not in INFEASIBLE, UNBOUNDED,
+            print(mod.status)
+            print("Found optimal solution")
+        else:
+            print("Constraints are INFEASIBLE")
+            print("inf or unb", g.GRB.INF_OR_UNBD == mod.status)
+            print("unb", g.GRB.UNBOUNDED == mod.status)
+            print("infis", g.GRB.INFEASIBLE == mod.status)
+
+        out_list = [] if mod.status != g.GRB.OPTIMAL else [v.x for v in tar_vars]
+        gdx = greatest_distance.x if mod.status == g.GRB.OPTIMAL else -1
+        return mod.status == g.GRB.OPTIMAL, out_list, gdx
+
+    def furthest_model(self, var_limits, facet_eq) -> (g.Model, List[g.Var], g.Var):
+        """
+        Builds the ILP of furthest_from_hull without solving it.
+        :return: (model, variables of satisfaction counts of formulas, distance from the facet)
+        """
         # create ILP
         # returns satisfiability + point + objective
         mod = g.Model()
-        # find all atoms in CNFs
-        # create opt. variable for all possible assignments of constants to variables for each atom...
-        opt_variable_mapping = {}  # key (predicate, [domain elements])
         greatest_distance = mod.addVar(lb=0.0, name="maxDist")
+        grand_d, opt_variable_mapping = self.add_groundings(mod)
         tar_vars = []
-        a_count = 0
-        d_count = 0
-        grand_d = []
-        grand_a = []
-        for i, wf in enumerate(self.formulas):  # Right now - every formula contains one clause
-            cnf = wf.formula
-            distinct_vars = cnf.get_distinct_vars()
+        for i, ds in enumerate(grand_d):
             tar_var = mod.addVar(lb=0, ub=var_limits[i], vtype=g.GRB.INTEGER, name=f"Xf_{i}")
             tar_vars.append(tar_var)
-            ds = []
-            # print(cnf)
-            assignment_generator = itt.permutations(self.domain, len(distinct_vars))
-            if self.reflexive:
-                assignment_generator = itt.product(self.domain, repeat=len(distinct_vars))
-            for assignment in assignment_generator:
-                assgnmt_dir = {a: b for a, b in zip(distinct_vars, assignment)}
-                # D indicates that whole formula is satisfied in current assignment
-                # D = {min A}  (see below)
-                D = mod.addVar(lb=0.0, ub=1.0, name="D_{}".format(d_count))
-                grand_d.append(D)
-                d_count += 1
-                ds.append(D)
-                avars = []
-                # print("Start")
-                for clause in cnf.clauses:
-                    # A indicates that a clause is satisfied in current assignment
-                    # A = max{variables for each literal}
-                    A = mod.addVar(lb=0.0, ub=1.0, name="A_{}".format(a_count))
-                    avars.append(A)
-                    grand_a.append(A)
-                    a_count += 1
-                    cl_literals = []
-                    for literal in clause.literals:
-                        pos_code = literal.atom.assignment_name(assgnmt_dir)
-                        neg_code = f"~{pos_code}"
-                        a_code = pos_code if literal.positive else neg_code
-                        if a_code in opt_variable_mapping:
-                            opt_var = opt_variable_mapping[a_code]
-                            # print("Found")
-                        else:
-                            p_var = mod.addVar(vtype=g.GRB.BINARY, name=pos_code)
-                            n_var = mod.addVar(vtype=g.GRB.BINARY, name=neg_code)
-                            mod.addConstr(1 - p_var == n_var)
-                            opt_variable_mapping[pos_code] = p_var
-                            opt_variable_mapping[neg_code] = n_var
-                            opt_var = p_var if literal.positive else n_var
-                            # print("Not found")
-                        cl_literals.append(opt_var)
-                    mod.addGenConstrMax(A, cl_literals, 0.0)
-                mod.addGenConstrMin(D, avars, 1.0)
             mod.addConstr(g.quicksum(ds) == tar_var)
 
-
-        poly_lines, columns = qhull.equations.shape
-        dist_vars = []
-        indicators = []
+        columns = len(facet_eq)
         # Selected inequality must not hold
-        #for ix in range(poly_lines):
         # Use inequality for chosen edge
         # qhull uses Ax + b < 0
         line = facet_eq[0:columns-1]
@@ -205,26 +255,5 @@ class PossibleWorld:
         mod.addConstr(g.quicksum([w * v for w, v in zip(line, tar_vars)]) + b == dst)
         mod.addConstr(greatest_distance == g.abs_(dst))
         mod.setObjective(greatest_distance, g.GRB.MAXIMIZE)
-        if write:
-            mod.write(write_file)
-        mod.optimize()
-
-        if mod.status == g.GRB.OPTIMAL:  # TODO not in INFEASIBLE, UNBOUNDED,
-            print(mod.status)
-            print("Found optimal solution")
-            # if len(self.domain) < 7:
-            #    for v in opt_variable_mapping.values():
-            #        print(v.x, v.varname)
-            # for v in grand_d:
-            #     print(v.x, v.varname)
-            # for v in grand_a:
-            #     print(v.x, v.varname)
-        else:
-            print("Constraints are INFEASIBLE")
-            print("inf or unb", g.GRB.INF_OR_UNBD == mod.status)
-            print("unb", g.GRB.UNBOUNDED == mod.status)
-            print("infis", g.GRB.INFEASIBLE == mod.status)
-
-        out_list = [] if mod.status != g.GRB.OPTIMAL else [v.x for v in tar_vars]
-        gdx = greatest_distance.x if mod.status == g.GRB.OPTIMAL else -1
-        return mod.status == g.GRB.OPTIMAL, out_list, gdx
+        mod.update()
+        return mod, tar_vars, greatest_distance
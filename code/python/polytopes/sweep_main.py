@@ -0,0 +1,37 @@
+import argparse
+
+import time
+
+from aistats.oracle.circuit import CircuitCaller
+from aistats.oracle.fo2_caller import Fo2WfomcCaller
+from aistats.oracle.forclift_callers import ForcliftV1
+from aistats.sweep import DomainSweep
+from clauses.cnf import MLN
+from cnf_parser import CnfParser
+
+
+if __name__ == "__main__":
+    a_pars = argparse.ArgumentParser("Runner for WFOMC based solver over several domain sizes.")
+    a_pars.add_argument("input_file", help="Path to input CNF file.")
+    a_pars.add_argument("domain_sizes", help="Domain sizes of MLN.", type=int, nargs="+")
+    a_pars.add_argument("-f", "--forclift_path", help="Path to forclift (fallback outside of the FO2 fragment, "
+                                                      "compiled circuits are used if not given)")
+    a_pars.add_argument("-c", "--cache_dir", help="Directory for compiled circuits.")
+    a_pars.add_argument("-m", "--merge", help="Merge equivalent formulas (their weights are summed)",
+                        action="store_true")
+
+    args = a_pars.parse_args()
+    parser = CnfParser()
+    parser.read_file(args.input_file)
+    mln = MLN(parser.formulas)
+    if args.merge:
+        mln = mln.merge_equivalent()
+    fallback = ForcliftV1(args.forclift_path) if args.forclift_path else CircuitCaller(cache_dir=args.cache_dir)
+    sweep = DomainSweep(mln, args.domain_sizes, oracle_caller=Fo2WfomcCaller(fallback=fallback), tolerance=1E-2)
+    ntime = time.time()
+    solvers = sweep.run()
+    etime = time.time()
+    print(f"Took {etime - ntime: 0.3f} s")
+    for domain_size, solver in solvers.items():
+        print(f"DOMAIN SIZE: {domain_size}, oracle calls: {solver.oracle_calls}")
+        print(solver.rmp)
@@ -0,0 +1,72 @@
+import pickle
+
+from unittest import TestCase
+
+from clauses.cnf import MLN, Atom, Clause, Constant, Literal, Predicate, Variable
+from cnf_parser import CnfParser
+
+
+class TestCnf(TestCase):
+
+    def test_interning(self):
+        self.assertIs(Variable("X"), Variable("X"))
+        self.assertIsNot(Variable("X"), Constant("X"))
+        friends = Predicate("friends", 2)
+        atom = Atom(friends, [Variable("X"), Variable("Y")])
+        self.assertIs(atom, Atom(Predicate("friends", 2), (Variable("X"), Variable("Y"))))
+        self.assertIs(Literal(atom, False), Literal(atom, False))
+        self.assertIs(pickle.loads(pickle.dumps(Clause([Literal(atom)]))), Clause([Literal(atom)]))
+
+    def test_hash(self):
+        friends = Predicate("friends", 2)
+        xy = Atom(friends, [Variable("X"), Variable("Y")])
+        yz = Atom(friends, [Variable("Y"), Variable("Z")])
+        xx = Atom(friends, [Variable("X"), Variable("X")])
+        self.assertEqual(xy, yz)
+        self.assertNotEqual(xy, xx)
+        self.assertEqual(len({xy, yz, xx}), 2)
+        self.assertEqual(Clause([Literal(xx), Literal(xy, False)]), Clause([Literal(xy, False), Literal(xx)]))
+        self.assertNotEqual(Clause([Literal(xx)]), Clause([Literal(xx), Literal(xy, False)]))
+        self.assertEqual(hash(Clause([Literal(xx), Literal(xy, False)])),
+                         hash(Clause([Literal(xy, False), Literal(xx)])))
+
+    def test_immutable(self):
+        with self.assertRaises(AttributeError):
+            Variable("X").name = "Y"
+        with self.assertRaises(AttributeError):
+            Predicate("p", 1).extra = 1
+
+    def test_cached_vars(self):
+        parser = CnfParser()
+        parser.read_cnf("NOT friends(Y,X) OR smokes(Z) OR smokes(X)")
+        formula = parser.formulas[0].formula
+        self.assertEqual(formula.get_distinct_vars(), ["X", "Y", "Z"])
+        formula.get_distinct_vars().append("W")
+        self.assertEqual(formula.get_distinct_vars(), ["X", "Y", "Z"])
+        self.assertEqual(formula.get_distinct_predicates(), {Predicate("friends", 2), Predicate("smokes", 1)})
+
+    def test_canonical(self):
+        parser = CnfParser()
+        parser.read_cnf("NOT friends(X,Y) OR friends(Y,X)")
+        parser.read_cnf("friends(B,A) OR NOT friends(A,B)")
+        parser.read_cnf("friends(A,B) OR NOT friends(A,B)")
+        parser.read_cnf("smokes(X) AND NOT friends(X,Y) OR smokes(Y) OR smokes(Y)")
+        parser.read_cnf("NOT friends(Z,X) OR smokes(X) AND smokes(Z)")
+        first, second, third, fourth, fifth = [wf.formula for wf in parser.formulas]
+        self.assertTrue(first.equivalent(second))
+        self.assertFalse(first.equivalent(third))
+        self.assertEqual(first.structural_hash(), second.structural_hash())
+        self.assertEqual(fourth.structural_hash(), fifth.structural_hash())
+        self.assertEqual(str(fifth.canonical()), "(!friends(x_0,x_1) v smokes(x_1)) ^ (smokes(x_0))")
+        self.assertEqual(fifth.canonical().structural_hash(), fifth.structural_hash())
+        constant = Atom(Predicate("smokes", 1), [Constant("Bob")])
+        self.assertFalse(fifth.equivalent(fifth.__class__([Clause([Literal(constant)])] + list(fifth.clauses[1:]))))
+
+    def test_merge_equivalent(self):
+        parser = CnfParser()
+        parser.read_cnf("0.5 NOT friends(X,Y) OR friends(Y,X)")
+        parser.read_cnf("1.5 smokes(X)")
+        parser.read_cnf("2 friends(B,A) OR NOT friends(A,B)")
+        merged = MLN(parser.formulas).merge_equivalent()
+        self.assertEqual([wf.weight for wf in merged.weighted_formulas], [2.5, 1.5])
+        self.assertIs(merged.weighted_formulas[0].formula, parser.formulas[0].formula)
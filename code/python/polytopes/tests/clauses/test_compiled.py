@@ -0,0 +1,63 @@
+import numpy as np
+
+from unittest import TestCase
+
+from clauses.cnf import Atom, Clause, Constant, Formula, Literal, Predicate, Variable
+from clauses.compiled import CompiledMLN
+from clauses.grounding import Grounding
+from cnf_parser import CnfParser
+
+
+class TestCompiledMLN(TestCase):
+
+    def setUp(self):
+        parser = CnfParser()
+        parser.read_cnf("0.5 NOT smokes(X) OR NOT friends(X,Y) OR smokes(Y)")
+        parser.read_cnf("-1.5 smokes(X) AND NOT friends(X,X)")
+        self.formulas = [wf.formula for wf in parser.formulas]
+        self.compiled = CompiledMLN(self.formulas, [wf.weight for wf in parser.formulas])
+
+    def test_layout(self):
+        compiled = self.compiled
+        self.assertEqual([p.name for p in compiled.predicates], ["friends", "smokes"])
+        self.assertEqual(compiled.arities.tolist(), [2, 1])
+        self.assertEqual(compiled.weights.tolist(), [0.5, -1.5])
+        self.assertEqual(compiled.variables, [["X", "Y"], ["X"]])
+        self.assertEqual(compiled.formula_offsets.tolist(), [0, 1, 3])
+        self.assertEqual(compiled.clause_offsets.tolist(), [0, 3, 4, 5])
+        self.assertEqual(compiled.literal_predicates.tolist(), [1, 0, 1, 1, 0])
+        self.assertEqual(compiled.literal_signs.tolist(), [False, False, True, True, False])
+        pad = CompiledMLN.PAD
+        self.assertEqual(compiled.literal_slots.tolist(), [[0, pad], [0, 1], [1, pad], [0, pad], [0, 0]])
+        self.assertEqual(compiled.literal_range(1), (3, 5))
+        self.assertEqual(compiled.clause_ids(1).tolist(), [0, 1])
+
+    def test_ground_arguments(self):
+        args = self.compiled.ground_arguments(0, np.array([[2, 5], [1, 1]]))
+        self.assertEqual(args.shape, (2, 3, 2))
+        self.assertEqual(args[0, :, 0].tolist(), [2, 2, 5])
+        self.assertEqual(args[1, 1].tolist(), [1, 1])
+        self.assertTrue((args[:, [0, 2], 1] == CompiledMLN.PAD).all())
+
+    def test_constants(self):
+        likes = Predicate("likes", 2)
+        atom = Atom(likes, [Variable("X"), Constant("Bob")])
+        compiled = CompiledMLN([Formula([Clause([Literal(atom)])])])
+        self.assertEqual(compiled.constants, [Constant("Bob")])
+        self.assertEqual(compiled.literal_slots.tolist(), [[0, -1]])
+        self.assertEqual(compiled.ground_arguments(0, np.array([[3]])).tolist(), [[[3, -1]]])
+        grounding = Grounding(compiled.formulas, compiled=compiled).ground(2)
+        self.assertEqual([grounding.atom_name(ix, ["a", "b"]) for ix in range(2)], ["likes(a,Bob)", "likes(b,Bob)"])
+
+    def test_grounding(self):
+        grounding = Grounding(self.formulas, compiled=self.compiled).ground(2)
+        names = [grounding.atom_name(ix) for ix in range(grounding.atom_number(2))]
+        self.assertEqual(names[:2], ["smokes(0)", "friends(0,0)"])
+        self.assertEqual(len(names), 6)
+        # smokes(0) v !friends(0,0) v !smokes(0) is a tautology
+        self.assertEqual(grounding.formula_groundings(0, 1), [()])
+        self.assertEqual(grounding.formula_groundings(1, 1), [((-2, ), (1, ))])
+        self.assertEqual(len(grounding.formula_groundings(0, 2)), 4)
+        non_reflexive = Grounding(self.formulas, reflexive=False, compiled=self.compiled).ground(3)
+        self.assertEqual(len(non_reflexive.formula_groundings(0, 3)), 6)
+        self.assertEqual(len(non_reflexive.formula_groundings(1, 3)), 3)
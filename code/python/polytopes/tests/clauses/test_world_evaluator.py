@@ -0,0 +1,66 @@
+import numpy as np
+
+from unittest import TestCase
+
+from clauses.cnf import Atom, Clause, Constant, Formula, Literal, MLN, Predicate, Variable
+from clauses.compiled import CompiledMLN
+from clauses.grounding import Grounding
+from clauses.world_evaluator import WorldEvaluator
+from cnf_parser import CnfParser
+
+
+class TestWorldEvaluator(TestCase):
+
+    @staticmethod
+    def grounded_counts(grounding: Grounding, evaluator: WorldEvaluator, world) -> list:
+        # counts from the groundings, atoms of the grounding looked up in the tensors
+        n = evaluator.domain_size
+        grounding.ground(n)
+        values = [bool(world[evaluator.compiled.predicate_ids[p]][tuple(n - a - 1 if a < 0 else a for a in args)])
+                  for p, args in grounding.atoms]
+        out = []
+        for ix in range(len(grounding.formulas)):
+            out.append(sum(all(any(values[abs(lit) - 1] == (lit > 0) for lit in clause) for clause in ground)
+                           for ground in grounding.formula_groundings(ix, n)))
+        return out
+
+    def test_against_grounding(self):
+        parser = CnfParser()
+        parser.read_cnf("0.5 NOT smokes(X) OR NOT friends(X,Y) OR smokes(Y)")
+        parser.read_cnf("-1.5 smokes(X) AND NOT friends(X,X)")
+        parser.read_cnf("1.0 friends(X,Y) OR NOT friends(Y,X) OR NOT friends(Y,Z)")
+        likes = Atom(Predicate("friends", 2), [Variable("X"), Constant("Bob")])
+        formulas = [wf.formula for wf in parser.formulas] + [Formula([Clause([Literal(likes, False)])])]
+        compiled = CompiledMLN(formulas)
+        rng = np.random.default_rng(0)
+        for reflexive in [True, False]:
+            evaluator = WorldEvaluator(compiled, 3, reflexive)
+            self.assertEqual(evaluator.shapes, [(4, 4), (4, )])
+            grounding = Grounding(formulas, reflexive, compiled)
+            worlds = evaluator.random_worlds(20, rng)
+            counts = evaluator.evaluate_many(worlds)
+            self.assertEqual(counts.shape, (20, 4))
+            for wx in range(20):
+                world = [t[wx] for t in worlds]
+                self.assertEqual(counts[wx].tolist(), self.grounded_counts(grounding, evaluator, world))
+                self.assertEqual(evaluator.evaluate(world).tolist(), counts[wx].tolist())
+
+    def test_exhaustive_pairs(self):
+        # calc_a of misc/figures_rmp.py - a(X,Y) v !a(Y,X), domain size 3, unique names, all 2^6 worlds as bits
+        parser = CnfParser()
+        parser.read_cnf("a(X,Y)")
+        parser.read_cnf("a(X,Y) OR NOT a(Y,X)")
+        evaluator = WorldEvaluator.from_mln(MLN(parser.formulas), 3, reflexive=False)
+        off_diagonal = ~np.eye(3, dtype=np.bool_).ravel()
+        bits = np.zeros((64, 9), dtype=np.bool_)
+        bits[:, off_diagonal] = (np.arange(64)[:, None] >> np.arange(6)) & 1
+        pairs = {tuple(row) for row in evaluator.evaluate_many(evaluator.split(bits)).tolist()}
+        self.assertEqual(pairs, {(0, 6), (1, 5), (2, 4), (2, 6), (3, 3), (3, 5), (4, 4), (4, 6), (5, 5), (6, 6)})
+
+    def test_log_weights(self):
+        parser = CnfParser()
+        parser.read_cnf("2.0 smokes(X)")
+        evaluator = WorldEvaluator.from_mln(MLN(parser.formulas), 2)
+        smokes = Predicate("smokes", 1)
+        self.assertEqual(evaluator.evaluate({smokes: [True, False]}).tolist(), [1])
+        self.assertEqual(evaluator.log_weights({smokes: [[True, True], [False, False]]}).tolist(), [4.0, 0.0])
@@ -0,0 +1,55 @@
+import os
+import tempfile
+
+import numpy as np
+
+from unittest import TestCase
+
+from aistats.oracle.circuit import Circuit, CircuitCaller
+from aistats.oracle.ground_caller import GroundWmcCaller
+from cnf_parser import CnfParser
+
+
+class TestCircuitCaller(TestCase):
+
+    def test_against_ground(self):
+        parser = self.parse(["0.69 NOT friend(X,Y) OR NOT friend(X,Z) OR friend(Y,Z)",
+                             "1.22 NOT stress(X) OR smokes(X)", "2.08 NOT friend(X,Y) OR NOT smokes(X) OR smokes(Y)"])
+        predicates = set(parser.predicates.values())
+        formulas = [wf.formula for wf in parser.formulas]
+        weights = np.random.default_rng(0).normal(scale=5.0, size=(20, 3))
+        ground = GroundWmcCaller().call_oracle_many(3, predicates, formulas, weights)
+        caller = CircuitCaller()
+        self.assertTrue(np.allclose(caller.call_oracle_many(3, predicates, formulas, weights), ground, atol=1E-9))
+        self.assertAlmostEqual(caller.call_oracle(3, predicates, parser.formulas),
+                               GroundWmcCaller().call_oracle(3, predicates, parser.formulas), delta=1E-9)
+        self.assertEqual(len(caller.circuits), 1)
+
+    def test_save_load(self):
+        parser = self.parse(["NOT friends(X,Y) OR friends(Y,X)", "smokes(X) OR NOT friends(X,Y)"])
+        predicates = set(parser.predicates.values())
+        formulas = [wf.formula for wf in parser.formulas]
+        weights = np.array([[1.0, -1.0], [0.0, 0.0], [30.0, 2.0]])
+        with tempfile.TemporaryDirectory() as td:
+            circuit = CircuitCaller(cache_dir=td).circuit(3, predicates, formulas)
+            self.assertEqual(len(os.listdir(td)), 1)
+            loaded = CircuitCaller(cache_dir=td).circuit(3, predicates, formulas)
+            self.assertTrue(np.allclose(loaded.evaluate(weights), circuit.evaluate(weights)))
+        self.assertAlmostEqual(circuit.evaluate(np.zeros((1, 2)))[0], 12 * np.log(2), delta=1E-9)
+
+    def test_max_nodes(self):
+        parser = self.parse(["0.69 NOT friend(X,Y) OR NOT friend(X,Z) OR friend(Y,Z)"])
+        predicates = set(parser.predicates.values())
+        formulas = [wf.formula for wf in parser.formulas]
+        caller = CircuitCaller(max_nodes=10)
+        with self.assertRaises(ValueError):
+            caller.circuit(3, predicates, formulas)
+        self.assertTrue(np.isnan(caller.call_oracle_many(3, predicates, formulas, np.ones((2, 1)))).all())
+        self.assertTrue(np.isnan(caller.call_oracle(3, predicates, parser.formulas)))
+
+    @staticmethod
+    def parse(lines):
+        parser = CnfParser()
+        for line in lines:
+            parser.read_cnf(line)
+        return parser
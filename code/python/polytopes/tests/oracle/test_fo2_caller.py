@@ -0,0 +1,82 @@
+import itertools
+import math
+
+import numpy as np
+
+from unittest import TestCase
+
+from scipy.special import logsumexp
+
+from aistats.oracle.fo2_caller import Fo2WfomcCaller, compositions, in_fo2
+from clauses.cnf import WeightedFormula
+from cnf_parser import CnfParser
+
+
+def brute_force(domain_size, predicates, cnfs) -> float:
+    # sums weights of all possible worlds
+    constants = list(range(domain_size))
+    atoms = [(p.name, args) for p in sorted(predicates) for args in itertools.product(constants, repeat=p.arity)]
+    terms = []
+    for values in itertools.product([False, True], repeat=len(atoms)):
+        world = dict(zip(atoms, values))
+        log_weight = 0.0
+        for cnf in cnfs:
+            variables = cnf.formula.get_distinct_vars()
+            for assignment in itertools.product(constants, repeat=len(variables)):
+                mapping = dict(zip(variables, assignment))
+                satisfied = all(
+                    any(world[(lit.atom.predicate.name, tuple(mapping[v.name] for v in lit.atom.variables))]
+                        == lit.positive for lit in clause.literals)
+                    for clause in cnf.formula.clauses)
+                log_weight += cnf.weight if satisfied else 0.0
+        terms.append(log_weight)
+    return logsumexp(terms)
+
+
+class TestFo2WfomcCaller(TestCase):
+
+    def test_compositions(self):
+        out = np.concatenate(list(compositions(4, 3, 5)))
+        self.assertEqual(len(out), math.comb(6, 2))
+        self.assertTrue((out.sum(axis=1) == 4).all())
+        self.assertEqual(len({tuple(r) for r in out}), len(out))
+
+    def test_in_fo2(self):
+        parser = self.parse(["NOT friends(X,Y) OR friends(Y,X)", "NOT friends(X,Y) OR NOT friends(X,Z) OR friends(Y,Z)"])
+        self.assertTrue(in_fo2([parser.formulas[0].formula]))
+        self.assertFalse(in_fo2([parser.formulas[1].formula]))
+
+    def test_against_brute_force(self):
+        parser = self.parse(["1.2 NOT stress(X) OR smokes(X)", "-0.7 NOT friend(X,Y) OR NOT smokes(X) OR smokes(Y)",
+                             "0.3 friend(X,X)", "2 friend(X,Y) AND friend(Y,X)"])
+        predicates = set(parser.predicates.values())
+        caller = Fo2WfomcCaller()
+        for domain_size in [1, 2]:
+            expected = brute_force(domain_size, predicates, parser.formulas)
+            self.assertAlmostEqual(caller.call_oracle(domain_size, predicates, parser.formulas), expected, delta=1E-9)
+
+    def test_many(self):
+        parser = self.parse(["1 likes(X,Y) OR NOT knows(X,Y)", "3 NOT knows(X,Y) OR NOT likes(X,Y) OR friends(X,Y)"])
+        predicates = set(parser.predicates.values())
+        formulas = [wf.formula for wf in parser.formulas]
+        weights = np.array([[1.0, 3.0], [-2.0, 0.5], [40.0, -40.0]])
+        out = Fo2WfomcCaller().call_oracle_many(2, predicates, formulas, weights)
+        for row, value in zip(weights, out):
+            cnfs = [WeightedFormula(w, f) for w, f in zip(row, formulas)]
+            self.assertAlmostEqual(value, brute_force(2, predicates, cnfs), delta=1E-9)
+
+    def test_fallback(self):
+        parser = self.parse(["NOT friends(X,Y) OR NOT friends(X,Z) OR friends(Y,Z)"])
+        fallback = Fo2WfomcCaller()
+        fallback.call_oracle = lambda *args: 42.0
+        caller = Fo2WfomcCaller(fallback=fallback)
+        self.assertEqual(caller.call_oracle(3, set(parser.predicates.values()), parser.formulas), 42.0)
+        self.assertRaises(ValueError, Fo2WfomcCaller().call_oracle, 3, set(parser.predicates.values()),
+                          parser.formulas)
+
+    @staticmethod
+    def parse(lines):
+        parser = CnfParser()
+        for line in lines:
+            parser.read_cnf(line)
+        return parser
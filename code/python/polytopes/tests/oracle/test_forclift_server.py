@@ -0,0 +1,69 @@
+import socket
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from aistats.oracle.forclift_callers import ForcliftClientCaller
+from aistats.oracle.forclift_server import ForcliftStandInServer, parse_forclift_input
+from aistats.oracle.ground_caller import GroundWmcCaller
+from aistats.oracle.serializer import ForcliftSerializer
+from cnf_parser import CnfParser
+
+
+class TestForcliftStandInServer(TestCase):
+
+    def setUp(self):
+        self.parser = CnfParser()
+        self.parser.read_cnf("0.69 NOT friends(X,Y) OR NOT friends(X,Z) OR friends(Y,Z)")
+        self.parser.read_cnf("-1.2 NOT smokes(X) OR cancer(X) AND smokes(X)")
+        self.atoms = sorted(self.parser.predicates.values())
+
+    def test_parse(self):
+        formulas = [wf.formula for wf in self.parser.formulas]
+        content = ForcliftSerializer().serialize(3, self.atoms, formulas, [0.69, -1.2]).decode("utf-8")
+        domain_size, atoms, cnfs = parse_forclift_input(content)
+        self.assertEqual(domain_size, 3)
+        self.assertEqual(atoms, self.atoms)
+        self.assertEqual([cnf.weight for cnf in cnfs], [0.69, -1.2])
+        for cnf, formula in zip(cnfs, formulas):
+            self.assertTrue(cnf.formula.equivalent(formula))
+        with self.assertRaises(ValueError):
+            parse_forclift_input(content.replace("smokes(dom)\n", ""))
+
+    def test_client(self):
+        expected = GroundWmcCaller().call_oracle(2, self.atoms, self.parser.formulas)
+        with ForcliftStandInServer() as server:
+            caller = ForcliftClientCaller(port=server.port, sockets=2)
+            self.assertAlmostEqual(caller.call_oracle(2, self.atoms, self.parser.formulas), expected, delta=1E-9)
+            with ThreadPoolExecutor(4) as executor:
+                values = list(executor.map(lambda _: caller.call_oracle(2, self.atoms, self.parser.formulas),
+                                           range(8)))
+            self.assertTrue(all(abs(v - expected) < 1E-9 for v in values))
+            self.assertEqual(server.requests, 9)
+            caller.shutdown()
+
+    def test_failures(self):
+        with ForcliftStandInServer(failure_rate=1.0) as server:
+            caller = ForcliftClientCaller(port=server.port)
+            with self.assertRaises(ValueError):
+                caller.call_oracle(2, self.atoms, self.parser.formulas)
+            with self.assertRaises(ValueError):
+                caller.send_input("/nonexistent/input.mln")
+            caller.shutdown()
+
+    def test_protocol(self):
+        server = ForcliftStandInServer().start()
+        with socket.create_connection(("127.0.0.1", server.port)) as sock:
+            stream = sock.makefile("rwb")
+            for message, expected in [(b"\n", b"NO_FILE_GIVEN\n"), (b"/nonexistent\n", b"CALC_ERR\n"),
+                                      (b"CLOSE\n", b"CLOSED\n")]:
+                stream.write(message)
+                stream.flush()
+                self.assertEqual(stream.readline(), expected)
+            self.assertEqual(stream.readline(), b"")
+        with socket.create_connection(("127.0.0.1", server.port)) as sock:
+            sock.sendall(b"SHUTDOWN\n")
+            self.assertEqual(sock.makefile("rb").readline(), b"SHUTTING_DOWN\n")
+        server.thread.join(5)
+        self.assertFalse(server.thread.is_alive())
+        server.server_close()
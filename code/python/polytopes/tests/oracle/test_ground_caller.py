@@ -0,0 +1,60 @@
+import numpy as np
+
+from unittest import TestCase
+
+from aistats.oracle.fo2_caller import Fo2WfomcCaller
+from aistats.oracle.ground_caller import GroundWmcCaller, components
+from clauses.grounding import Grounding
+from cnf_parser import CnfParser
+from tests.oracle.test_fo2_caller import brute_force
+
+
+class TestGroundWmcCaller(TestCase):
+
+    def test_grounding_prefix(self):
+        parser = self.parse(["NOT friends(X,Y) OR NOT friends(X,Z) OR friends(Y,Z)", "smokes(X)"])
+        small = Grounding([wf.formula for wf in parser.formulas]).ground(2)
+        large = Grounding([wf.formula for wf in parser.formulas]).ground(3)
+        self.assertEqual(len(large.formula_groundings(0, 3)), 27)
+        self.assertEqual(large.formula_groundings(0, 2), small.formula_groundings(0, 2))
+        self.assertEqual(large.atom_number(2), small.atom_number(2))
+        self.assertEqual(large.atom_number(3), 12)
+
+    def test_components(self):
+        factors = ((0, ((1, 2),)), (0, ((3, -4),)), (1, ((-2, 5),)))
+        self.assertEqual(len(components(factors)), 2)
+
+    def test_equivalent_formulas_share_grounding(self):
+        first = self.parse(["0.5 NOT friends(X,Y) OR friends(Y,X)"]).formulas
+        second = self.parse(["-1.5 friends(B,A) OR NOT friends(A,B)"]).formulas
+        caller = GroundWmcCaller()
+        self.assertIs(caller.grounding([wf.formula for wf in first]), caller.grounding([wf.formula for wf in second]))
+        predicates = {wf.formula.clauses[0].literals[0].atom.predicate for wf in first}
+        self.assertAlmostEqual(caller.call_oracle(2, predicates, second), brute_force(2, predicates, second),
+                               delta=1E-9)
+
+    def test_against_brute_force(self):
+        parser = self.parse(["0.69 NOT friend(X,Y) OR NOT friend(X,Z) OR friend(Y,Z)",
+                             "-1.22 NOT stress(X) OR smokes(X)", "2.08 NOT friend(X,Y) OR NOT smokes(X) OR smokes(Y)"])
+        predicates = set(parser.predicates.values())
+        caller = GroundWmcCaller()
+        for domain_size in [1, 2]:
+            expected = brute_force(domain_size, predicates, parser.formulas)
+            self.assertAlmostEqual(caller.call_oracle(domain_size, predicates, parser.formulas), expected, delta=1E-9)
+
+    def test_against_fo2(self):
+        parser = self.parse(["1 likes(X,Y) OR NOT knows(X,Y)", "3 NOT knows(X,Y) OR NOT likes(X,Y) OR friends(X,Y)",
+                             "-0.5 friends(X,Y) AND friends(Y,X)"])
+        predicates = set(parser.predicates.values())
+        formulas = [wf.formula for wf in parser.formulas]
+        weights = np.array([[1.0, 3.0, -0.5], [-20.0, 7.0, 2.5]])
+        ground = GroundWmcCaller().call_oracle_many(3, predicates, formulas, weights)
+        lifted = Fo2WfomcCaller().call_oracle_many(3, predicates, formulas, weights)
+        self.assertTrue(np.allclose(ground, lifted, atol=1E-9))
+
+    @staticmethod
+    def parse(lines):
+        parser = CnfParser()
+        for line in lines:
+            parser.read_cnf(line)
+        return parser
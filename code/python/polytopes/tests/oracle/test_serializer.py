@@ -0,0 +1,41 @@
+import numpy as np
+
+from unittest import TestCase
+
+from aistats.oracle.serializer import ForcliftSerializer, format_weights
+from cnf_parser import CnfParser
+
+
+class TestForcliftSerializer(TestCase):
+
+    def setUp(self):
+        parser = CnfParser()
+        parser.read_cnf("0.69 NOT friends(X,Y) OR friends(Y,X)")
+        parser.read_cnf("-1.25 smokes(X)")
+        self.atoms = sorted(parser.predicates.values())
+        self.formulas = [wf.formula for wf in parser.formulas]
+
+    def test_serialize(self):
+        serializer = ForcliftSerializer()
+        content = serializer.serialize(3, self.atoms, self.formulas, [0.1 + 0.2, -1.25])
+        expected = "dom = { 1, ..., 3 }\nfriends(dom,dom)\nsmokes(dom)\n" \
+                   f"{0.1 + 0.2} {self.formulas[0]}\n-1.25 {self.formulas[1]}\n"
+        self.assertEqual(content, expected.encode("utf-8"))
+        self.assertEqual(float(content.split(b"\n")[3].split(b" ")[0]), 0.1 + 0.2)
+        self.assertEqual(len(serializer.templates), 1)
+        serializer.serialize(3, self.atoms, self.formulas, [2.0, 1.0])
+        serializer.serialize(4, self.atoms, self.formulas, [2.0, 1.0])
+        self.assertEqual(len(serializer.templates), 2)
+
+    def test_serialize_many(self):
+        serializer = ForcliftSerializer(precision=4)
+        weights = np.array([[1 / 3, 2.0], [1E-7, -123456.0]])
+        contents = serializer.serialize_many(2, self.atoms, self.formulas, weights)
+        self.assertEqual([c.split(b"\n")[3].split(b" ")[0] for c in contents], [b"0.3333", b"1e-07"])
+        self.assertEqual(contents[1].split(b"\n")[4].split(b" ")[0], b"-1.235e+05")
+        self.assertEqual(contents[0], serializer.serialize(2, self.atoms, self.formulas, weights[0]))
+
+    def test_format_weights(self):
+        self.assertEqual(format_weights(np.array([1.5, 2.0])), [b"1.5", b"2.0"])
+        with self.assertRaises(ValueError):
+            format_weights([float("nan")])
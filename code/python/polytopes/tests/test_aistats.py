@@ -1,8 +1,36 @@
 from unittest import TestCase
 from unittest.mock import Mock, MagicMock
 
+import numpy as np
+from scipy.special import logsumexp
+
 from aistats.aistats import AiStatsRmpSolver
+from aistats.enumerator.magnitude_enumerator import MagnitudeEnumerator
+from aistats.enumerator.naive_enumerator import NaiveEnumerator
+from aistats.oracle.oracle_caller import OracleCaller
 from clauses.cnf import WeightedFormula, MLN, Predicate
+from cnf_parser import CnfParser
+
+
+class PointSetOracle(OracleCaller):
+    # partition function of a world per each of given count vectors
+
+    def __init__(self, points):
+        super().__init__()
+        self.points = np.array(points, dtype=np.float64)
+
+    def call_oracle(self, domain_size, atoms, cnfs) -> float:
+        weights = np.array([cnf.weight for cnf in cnfs])
+        return logsumexp(self.points @ weights)
+
+
+class FailingUnitOracle(PointSetOracle):
+    # fails (NaN) whenever only one formula has a non-zero weight
+
+    def call_oracle(self, domain_size, atoms, cnfs) -> float:
+        if sum(cnf.weight != 0 for cnf in cnfs) == 1:
+            return float("nan")
+        return super().call_oracle(domain_size, atoms, cnfs)
 
 
 class TestAiStatsRmpSolver(TestCase):
@@ -15,6 +43,81 @@ class TestAiStatsRmpSolver(TestCase):
         self.assertAlmostEqual(rmp.omega_size_log, 13.8155106, delta=1E-6)
         self.assertEqual(rmp.predicates, {Predicate("A", 1), Predicate("B", 1), Predicate("C", 2), Predicate("D", 3)})
 
+    def test_adaptive_2d(self):
+        mln = self.create_mln(["smokes(X)", "friends(X,Y)"])
+        points = [[0, 0], [0, 1], [1, 0], [2, 1], [2, 4], [1, 4]]
+        exhaustive = AiStatsRmpSolver(mln, 2, enumerator_cls=NaiveEnumerator, oracle_caller=PointSetOracle(points))
+        exhaustive.solve()
+        adaptive = AiStatsRmpSolver(mln, 2, enumerator_cls=NaiveEnumerator, oracle_caller=PointSetOracle(points))
+        adaptive.solve(adaptive=True)
+        self.assertTrue(adaptive.rmp == exhaustive.rmp)
+        self.assertLess(adaptive.oracle_calls, exhaustive.oracle_calls)
+
+    def test_adaptive_3d(self):
+        mln = self.create_mln(["smokes(X)", "friends(X,Y)", "stress(X)"])
+        points = [[0, 0, 0], [2, 0, 1], [0, 4, 2], [1, 3, 0], [2, 4, 2], [1, 1, 1]]
+        exhaustive = AiStatsRmpSolver(mln, 2, enumerator_cls=NaiveEnumerator, oracle_caller=PointSetOracle(points))
+        exhaustive.solve()
+        adaptive = AiStatsRmpSolver(mln, 2, enumerator_cls=NaiveEnumerator, oracle_caller=PointSetOracle(points))
+        adaptive.solve(adaptive=True)
+        self.assertTrue(adaptive.rmp == exhaustive.rmp)
+        self.assertLess(adaptive.oracle_calls, exhaustive.oracle_calls)
+
+    def test_adaptive_oracle_failures(self):
+        # the oracle fails for the unit normals, so no queried facet passes through the corners of the box
+        mln = self.create_mln(["smokes(X)", "friends(X,Y)", "stress(X)"])
+        points = [[0, 0, 0], [2, 0, 1], [0, 4, 2], [1, 3, 0], [2, 4, 2], [1, 1, 1]]
+        exhaustive = AiStatsRmpSolver(mln, 2, enumerator_cls=NaiveEnumerator, oracle_caller=PointSetOracle(points))
+        exhaustive.solve()
+        failing = AiStatsRmpSolver(mln, 2, enumerator_cls=NaiveEnumerator,
+                                   oracle_caller=FailingUnitOracle(points))
+        with np.errstate(all="raise"):
+            failing.solve(adaptive=True)
+        self.assertTrue(exhaustive.rmp <= failing.rmp)
+        self.assertGreater(failing.oracle_calls, 6)
+
+    def test_magnitude_order(self):
+        mln = self.create_mln(["smokes(X)", "friends(X,Y)"])
+        points = [[0, 0], [0, 1], [1, 0], [2, 1], [2, 4], [1, 4]]
+        exhaustive = AiStatsRmpSolver(mln, 2, enumerator_cls=NaiveEnumerator, oracle_caller=PointSetOracle(points))
+        exhaustive.solve()
+        magnitude = AiStatsRmpSolver(mln, 2, enumerator_cls=MagnitudeEnumerator, oracle_caller=PointSetOracle(points))
+        magnitude.solve()
+        self.assertTrue(magnitude.rmp == exhaustive.rmp)
+        partial = AiStatsRmpSolver(mln, 2, enumerator_cls=MagnitudeEnumerator, oracle_caller=PointSetOracle(points))
+        partial.solve(max_oracle_calls=6)
+        self.assertEqual(partial.oracle_calls, 6)
+        self.assertTrue(exhaustive.rmp <= partial.rmp)
+        odd = AiStatsRmpSolver(mln, 2, enumerator_cls=MagnitudeEnumerator, oracle_caller=PointSetOracle(points))
+        odd.solve(max_oracle_calls=5)
+        self.assertEqual(odd.oracle_calls, 5)
+
+    def test_seed_normals(self):
+        mln = self.create_mln(["smokes(X)", "friends(X,Y)"])
+        points = [[0, 0], [0, 1], [1, 0], [2, 1], [2, 4], [1, 4]]
+        exhaustive = AiStatsRmpSolver(mln, 2, enumerator_cls=NaiveEnumerator, oracle_caller=PointSetOracle(points))
+        exhaustive.solve()
+        seeded = AiStatsRmpSolver(mln, 2, enumerator_cls=NaiveEnumerator, oracle_caller=PointSetOracle(points))
+        seeded.solve(seed_normals=[np.array([1, -1]), np.array([-1, 2]), np.array([3, -1])])
+        self.assertTrue(seeded.rmp == exhaustive.rmp)
+        self.assertEqual(seeded.oracle_calls, exhaustive.oracle_calls)
+
+    def test_distinct_normals(self):
+        mln = self.create_mln(["smokes(X)", "friends(X,Y)", "stress(X)"])
+        solver = AiStatsRmpSolver(mln, 2, enumerator_cls=NaiveEnumerator)
+        repeated = [tuple(n) for n in solver.enumerator.generate_normals()]
+        normals = [tuple(n) for n in solver.generate_normals()]
+        self.assertGreater(len(repeated), len(set(repeated)))
+        self.assertEqual(len(normals), len(set(repeated)))
+        self.assertEqual(set(normals), set(repeated))
+
+    @staticmethod
+    def create_mln(lines):
+        parser = CnfParser()
+        for line in lines:
+            parser.read_cnf(line)
+        return MLN(parser.formulas)
+
     def create_mock_mln(self):
         formula1 = MagicMock()
         formula1.get_distinct_vars = Mock(return_value=["X"])
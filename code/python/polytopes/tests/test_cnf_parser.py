@@ -0,0 +1,28 @@
+from unittest import TestCase
+
+from clauses.cnf import Predicate
+from cnf_parser import CnfParser
+
+
+class TestCnfParser(TestCase):
+
+    def test_read_cnf(self):
+        parser = CnfParser()
+        parser.read_lines(["1.2 NOT friends(X,Y) OR NOT friends(X,Z) OR friends(Y,Z)\n", "\n",
+                           "A(X,Y) AND (B(Y,X) OR A(Y,Z))", "-2e-1 NOT B(X , Y)"])
+        self.assertEqual(len(parser.formulas), 3)
+        self.assertEqual([wf.weight for wf in parser.formulas], [1.2, 1.0, -0.2])
+        self.assertEqual(str(parser.formulas[0].formula), "(!friends(x,y) v !friends(x,z) v friends(y,z))")
+        self.assertEqual(str(parser.formulas[1].formula), "(A(x,y)) ^ (B(y,x) v A(y,z))")
+        self.assertEqual(parser.predicates["B"], Predicate("B", 2))
+        atoms = [lit.atom for clause in parser.formulas[1].formula.clauses for lit in clause.literals]
+        self.assertIs(atoms[0].variables[0], atoms[1].variables[1])  # interned
+
+    def test_errors(self):
+        parser = CnfParser()
+        parser.read_lines(["A(X,Y)", ""])
+        for line, message in [("A(X)", "Line 3: A/2"), ("B(X", "Line 4, column 4"), ("B(X) OR", "Line 5"),
+                              ("B(X) XOR C(X)", "Line 6, column 6")]:
+            with self.assertRaises(ValueError) as context:
+                parser.read_cnf(line)
+            self.assertTrue(str(context.exception).startswith(message), str(context.exception))
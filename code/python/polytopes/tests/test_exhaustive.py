@@ -0,0 +1,56 @@
+import numpy as np
+
+from unittest import TestCase
+
+from aistats.aistats import AiStatsRmpSolver
+from aistats.enumerator.naive_enumerator import NaiveEnumerator
+from aistats.exhaustive import ExhaustiveRmp
+from clauses.cnf import MLN
+from cnf_parser import CnfParser
+from tests.test_aistats import PointSetOracle
+
+
+class TestExhaustiveRmp(TestCase):
+
+    @staticmethod
+    def create_mln(lines):
+        parser = CnfParser()
+        for line in lines:
+            parser.read_cnf(line)
+        return MLN(parser.formulas)
+
+    def test_box(self):
+        exhaustive = ExhaustiveRmp(self.create_mln(["smokes(X)", "friends(X,Y)"]), 2, chunk_size=5)
+        self.assertEqual(exhaustive.world_number, 64)
+        points = exhaustive.points()
+        self.assertEqual(len(points), 15)
+        self.assertEqual(points[[0, -1]].tolist(), [[0, 0], [2, 4]])
+        self.assertEqual(sorted(map(tuple, exhaustive.vertices().tolist())), [(0, 0), (0, 4), (2, 0), (2, 4)])
+
+    def test_chunks_and_processes(self):
+        mln = self.create_mln(["NOT smokes(X) OR NOT friends(X,Y) OR smokes(Y)", "friends(X,Y) OR NOT friends(Y,X)",
+                               "smokes(X)"])
+        single = ExhaustiveRmp(mln, 2).points()
+        chunked = ExhaustiveRmp(mln, 2, chunk_size=7, processes=2).points()
+        self.assertEqual(single.tolist(), chunked.tolist())
+        # count vectors of the worlds one by one
+        exhaustive = ExhaustiveRmp(mln, 2)
+        evaluator = exhaustive.evaluator
+        found = set()
+        for code in range(exhaustive.world_number):
+            bits = np.zeros(evaluator.atom_number, dtype=np.bool_)
+            bits[exhaustive.atoms] = [(code >> ix) & 1 for ix in range(len(exhaustive.atoms))]
+            found.add(tuple(evaluator.evaluate([t[0] for t in evaluator.split(bits)]).tolist()))
+        self.assertEqual(found, set(map(tuple, single.tolist())))
+
+    def test_ground_truth_of_aistats(self):
+        mln = self.create_mln(["smokes(X) OR NOT friends(X,Y)", "friends(X,Y)"])
+        exhaustive = ExhaustiveRmp(mln, 2)
+        solver = AiStatsRmpSolver(mln, 2, enumerator_cls=NaiveEnumerator,
+                                  oracle_caller=PointSetOracle(exhaustive.points()))
+        solver.solve()
+        self.assertTrue(solver.rmp == exhaustive.polytope())
+
+    def test_too_many_atoms(self):
+        with self.assertRaises(ValueError):
+            ExhaustiveRmp(self.create_mln(["friends(X,Y)"]), 6)
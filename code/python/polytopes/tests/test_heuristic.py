@@ -0,0 +1,70 @@
+import os
+import tempfile
+
+from unittest import TestCase
+
+import gurobipy as g
+import numpy as np
+
+import tracing
+
+from aistats.exhaustive import ExhaustiveRmp
+from aistats.heuristic import HeuristicSolver
+from clauses.cnf import MLN
+from cnf_parser import CnfParser
+from possible_world import PossibleWorld
+
+
+class TestHeuristicSolver(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        g.setParam("OutputFlag", 0)
+        parser = CnfParser()
+        for line in ["a(X,Y)", "a(X,Y) OR NOT a(Y,X)"]:
+            parser.read_cnf(line)
+        cls.mln = MLN(parser.formulas)
+        cls.exact = {tuple(v) for v in ExhaustiveRmp(cls.mln, 3, reflexive=False).vertices().tolist()}
+
+    def setUp(self):
+        # the solver writes its LP files to lps/ of the working directory
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        os.makedirs(os.path.join("lps", "qhull"))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def solve(self, **kwargs) -> HeuristicSolver:
+        solver = HeuristicSolver(self.mln, 3, reflexive=False)
+        solver.solve(method="qhull", **kwargs)
+        return solver
+
+    def test_qhull_vertices(self):
+        solver = self.solve(seeds=4, seed=0)
+        self.assertEqual(set(solver.vertices), self.exact)
+        # local search points inside the RMP are not vertices
+        self.assertTrue(solver.samples - self.exact)
+
+    def test_seed(self):
+        self.assertEqual(self.solve(seeds=4, seed=1).samples, self.solve(seeds=4, seed=1).samples)
+
+    def test_lp_outer_approximation(self):
+        tracer = tracing.enable()
+        try:
+            solver = self.solve(seeds=4, lp_directions=8, seed=0)
+        finally:
+            tracing.disable()
+        hull = solver.convex_hull
+        self.assertEqual({tuple(int(x) for x in p) for p in hull.points[hull.vertices]}, self.exact)
+        self.assertGreaterEqual(tracer.counters.get("skipped facets", 0), 1)
+
+    def test_facet_is_tight(self):
+        solver = HeuristicSolver(self.mln, 3, reflexive=False)
+        pw = PossibleWorld(solver.domain_constants, self.mln.weighted_formulas, [], False, compiled=solver.compiled)
+        solver.lp_outer_approximation(pw, 4, seed=0)
+        # the upper edge of the RMP is tight, below the edge from (0, 6) to (6, 6) lies the vertex (3, 3)
+        self.assertTrue(solver.facet_is_tight(pw, np.array([0.0, 1.0, -6.0])))
+        self.assertFalse(solver.facet_is_tight(pw, np.array([0.0, -1.0, 6.0])))
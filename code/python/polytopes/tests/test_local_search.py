@@ -0,0 +1,48 @@
+import numpy as np
+
+from unittest import TestCase
+
+from aistats.exhaustive import ExhaustiveRmp
+from aistats.local_search import LocalSearchSampler
+from clauses.cnf import MLN
+from clauses.compiled import CompiledMLN
+from cnf_parser import CnfParser
+
+
+class TestLocalSearchSampler(TestCase):
+
+    def setUp(self):
+        parser = CnfParser()
+        for line in ["NOT smokes(X) OR NOT friends(X,Y) OR smokes(Y)", "friends(X,Y)", "smokes(X)"]:
+            parser.read_cnf(line)
+        self.mln = MLN(parser.formulas)
+        self.compiled = CompiledMLN.from_mln(self.mln)
+
+    def test_incremental_counts(self):
+        sampler = LocalSearchSampler(self.compiled, 3, seed=0)
+        exhaustive = ExhaustiveRmp(self.mln, 3)
+        evaluator = exhaustive.evaluator
+        rng = np.random.default_rng(1)
+        for atom in rng.integers(0, sampler.atom_number, 50):
+            delta = sampler.flip_delta(atom)
+            before = sampler.counts.copy()
+            sampler.flip(atom)
+            self.assertEqual((sampler.counts - before).tolist(), delta.tolist())
+            # atoms of the sampler and of the exhaustive enumeration are both numbered by the grounding
+            bits = np.zeros(evaluator.atom_number, dtype=np.bool_)
+            bits[exhaustive.atoms] = sampler.values
+            self.assertEqual(evaluator.evaluate([t[0] for t in evaluator.split(bits)]).tolist(),
+                             sampler.counts.tolist())
+
+    def test_extreme_points(self):
+        sampler = LocalSearchSampler(self.compiled, 2, seed=0)
+        points = np.array(ExhaustiveRmp(self.mln, 2).points())
+        found = sampler.extreme_points(sampler.directions(8))
+        self.assertTrue(found <= set(map(tuple, points.tolist())))
+        for direction in sampler.directions(8):
+            best, _ = sampler.maximize(direction)
+            self.assertAlmostEqual(direction @ best, (points @ direction).max())
+
+    def test_reflexive(self):
+        sampler = LocalSearchSampler(self.compiled, 3, reflexive=False, seed=0)
+        self.assertEqual(max(p[1] for p in sampler.extreme_points(sampler.directions(0))), 6)
@@ -0,0 +1,34 @@
+from unittest import TestCase
+
+import numpy as np
+
+import aistats.utils as aiu
+
+from aistats.enumerator.magnitude_enumerator import MagnitudeEnumerator
+from aistats.enumerator.naive_enumerator import NaiveEnumerator
+
+
+class TestMagnitudeEnumerator(TestCase):
+
+    def test_order(self):
+        for norm, measure in [("l1", lambda n: np.abs(n).sum()), ("linf", lambda n: np.abs(n).max())]:
+            normals = list(MagnitudeEnumerator([2, 3, 2], norm).generate_normals())
+            sizes = [measure(n) for n in normals]
+            self.assertEqual(sizes, sorted(sizes))
+            self.assertEqual(len({tuple(n) for n in normals}), len(normals))
+
+    def test_same_as_naive(self):
+        limits = [2, 1, 2]
+        naive = {tuple(n) for n in NaiveEnumerator(limits).generate_normals()}
+        magnitude = {tuple(n) for n in MagnitudeEnumerator(limits).generate_normals()}
+        self.assertEqual(naive, magnitude)
+        for normal in magnitude:
+            self.assertEqual(np.gcd.reduce(normal), 1)
+            self.assertGreater(normal[np.flatnonzero(normal)[0]], 0)
+
+    def test_points(self):
+        enumerator = MagnitudeEnumerator([2, 3, 1], "linf")
+        for points, normal in zip(enumerator.generate_points(), enumerator.generate_normals()):
+            self.assertEqual(points.shape, (2, 3))
+            self.assertTrue((np.abs(points) <= [2, 3, 1]).all())
+            self.assertEqual(aiu.normalize_vector(aiu.calculate_normal(points)).tolist(), normal.tolist())
@@ -1,6 +1,8 @@
 from unittest import TestCase
 
-from aistats.enumerator.naive_enumerator import CenterEnumerator
+import aistats.utils as aiu
+
+from aistats.enumerator.naive_enumerator import CenterEnumerator, Enumerator2D, NaiveEnumerator
 
 import numpy as np
 
@@ -13,3 +15,35 @@ class TestCenterEnumerator(TestCase):
             print(bp)
             non_zero_bps = -2 * np.sign(bp) + 1
             print(non_zero_bps)
+
+
+class TestNaiveEnumerator(TestCase):
+
+    def test_unrank_combinations(self):
+        en = NaiveEnumerator([2, 3, 1])
+        indices = np.arange(24)
+        expected = np.array([en.unrank_combination(ix) for ix in indices])
+        np.testing.assert_array_equal(en.unrank_combinations(indices), expected)
+
+    def test_point_batches(self):
+        en = NaiveEnumerator([2, 1, 2])
+        expected = np.array(list(en.generate_points()))
+        batches = list(en.generate_point_batches(batch_size=50))
+        self.assertGreater(len(batches), 1)
+        np.testing.assert_array_equal(np.concatenate(batches), expected)
+
+    def test_independence_of_large_points(self):
+        # the Gram determinant of these rows is lost in floating point
+        a = 10 ** 4
+        differences = np.array([[[a, a + 1, 0], [a + 1, a + 2, 0]], [[a, a + 1, 3], [2 * a, 2 * a + 2, 6]],
+                                [[1, 2, 3], [2, 4, 6]]], dtype=np.float64)
+        self.assertEqual(NaiveEnumerator._check_independence_batch(differences).tolist(), [True, False, False])
+
+
+class TestEnumerator2D(TestCase):
+
+    def test_generate_normals(self):
+        en = Enumerator2D([3, 2])
+        normals = {tuple(n) for n in en.generate_normals()}
+        expected = {tuple(aiu.normalize_vector(aiu.calculate_normal(p))) for p in en.generate_points()}
+        self.assertEqual(normals, expected)
@@ -0,0 +1,51 @@
+import os
+import tempfile
+
+from unittest import TestCase
+
+import numpy as np
+
+from aistats.normal_store import NormalStore
+
+
+class TestNormalStore(TestCase):
+
+    def test_against_set(self):
+        rng = np.random.default_rng(7)
+        store = NormalStore([5, 7, 3], capacity=16)
+        expected = set()
+        for _ in range(20):
+            normals = rng.integers(-6, 7, size=(200, 3))
+            new = store.add_many(normals)
+            for normal, is_new in zip(normals, new):
+                self.assertEqual(is_new, tuple(normal) not in expected)
+                expected.add(tuple(normal))
+            self.assertEqual(len(store), len(expected))
+        queries = rng.integers(-8, 9, size=(500, 3))
+        np.testing.assert_array_equal(store.contains_many(queries), [tuple(q) in expected for q in queries])
+        self.assertEqual({tuple(n) for n in store.normals()}, expected)
+
+    def test_single(self):
+        store = NormalStore([2, 2])
+        self.assertTrue(store.add(np.array([1, -2])))
+        self.assertFalse(store.add(np.array([1, -2])))
+        self.assertIn(np.array([1, -2]), store)
+        self.assertNotIn(np.array([-1, 2]), store)
+
+    def test_unpacked(self):
+        store = NormalStore([2 ** 40, 2 ** 40])
+        self.assertTrue(store.add(np.array([3, 4])))
+        self.assertFalse(store.add(np.array([3, 4])))
+        self.assertEqual(len(store), 1)
+
+    def test_memmap(self):
+        rng = np.random.default_rng(3)
+        normals = rng.integers(-50, 51, size=(3000, 2))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "normals.npy")
+            store = NormalStore([50, 50], capacity=16, path=path)
+            store.add_many(normals)
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(len(store), len({tuple(n) for n in normals}))
+            self.assertTrue(store.contains_many(normals).all())
+            del store
@@ -0,0 +1,42 @@
+import gurobipy as g
+import numpy as np
+
+from unittest import TestCase
+
+from aistats.exhaustive import ExhaustiveRmp
+from clauses.cnf import MLN, Constant
+from cnf_parser import CnfParser
+from possible_world import PossibleWorld
+
+
+class TestPossibleWorld(TestCase):
+
+    def setUp(self):
+        g.setParam("OutputFlag", 0)
+        parser = CnfParser()
+        for line in ["NOT smokes(X) OR NOT friends(X,Y) OR smokes(Y)", "friends(X,Y)",
+                     "smokes(X) AND NOT friends(X,X)"]:
+            parser.read_cnf(line)
+        self.mln = MLN(parser.formulas)
+        self.pw = PossibleWorld([Constant(f"d_{i}") for i in range(2)], self.mln.weighted_formulas, [])
+
+    def test_relaxed_bounds(self):
+        units = np.eye(3)
+        directions = np.row_stack((units, -units, np.random.default_rng(0).normal(size=(20, 3))))
+        bounds = self.pw.relaxed_bounds(directions)
+        exact = (ExhaustiveRmp(self.mln, 2).points() @ directions.T).max(axis=0)
+        self.assertTrue((bounds >= exact - 1E-6).all())
+        # counts of single formulas are bounded exactly
+        self.assertTrue(np.allclose(bounds[:6], exact[:6]))
+        self.assertEqual(self.pw.relaxed_bounds([0, 1, 0]).tolist(), [4.0])
+
+    def test_objective(self):
+        # groundings with X = Y are tautologies, the other two cannot be both violated
+        constraints = {ix: (0, 'ge') for ix in range(3)}
+        for sense, expected in [(g.GRB.MAXIMIZE, 4), (g.GRB.MINIMIZE, 3)]:
+            model, counts = self.pw.satisfiable_model(constraints, 0, sense)
+            model.optimize()
+            self.assertEqual(model.ModelSense, sense)
+            self.assertAlmostEqual(counts[0].x, expected)
+        model, _ = self.pw.satisfiable_model(constraints)
+        self.assertEqual(model.getObjective().size(), 0)
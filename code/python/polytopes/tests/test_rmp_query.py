@@ -0,0 +1,69 @@
+from unittest import TestCase
+
+import gurobipy as g
+import numpy as np
+
+from aistats.aistats import AiStatsRmpSolver
+from aistats.enumerator.naive_enumerator import NaiveEnumerator
+from aistats.rmp_query import RmpQuery
+from clauses.cnf import MLN
+from cnf_parser import CnfParser
+from tests.test_aistats import PointSetOracle
+
+
+class TestRmpQuery(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        g.setParam("OutputFlag", 0)
+        parser = CnfParser()
+        for line in ["smokes(X)", "friends(X,Y)"]:
+            parser.read_cnf(line)
+        cls.mln = MLN(parser.formulas)
+
+    def box_query(self, limits=(2, 4)):
+        A = np.array([[1, 0], [0, 1], [-1, 0], [0, -1]])
+        return RmpQuery(A, np.array([limits[0], limits[1], 0, 0]), self.mln, 2)
+
+    def test_contains_many(self):
+        query = self.box_query()
+        points = np.array([[1, 2], [0.5, 3.5], [3, 1], [2, 4.5], [-0.1, 0]])
+        self.assertEqual(query.contains_many(points).tolist(), [True, True, False, False, False])
+        self.assertEqual(query.ilp_calls, 0)
+
+    def test_boundary(self):
+        query = self.box_query()
+        self.assertTrue(query.contains([2, 4]))
+        self.assertTrue(query.contains([1.5, 0]))
+        self.assertEqual(query.ilp_calls, 0)
+        # points on the boundary are contained even if unrealizable
+        query = self.box_query((3, 4))
+        self.assertEqual(query.contains_many(np.array([[3, 1], [3, 0.5], [2, 1]])).tolist(), [True, True, True])
+        self.assertFalse(query.realizable([3, 1]))
+        self.assertEqual(query.ilp_calls, 1)
+
+    def test_rescue(self):
+        # rounded bounds leave integer points just outside, the ILP keeps the realizable ones
+        query = self.box_query((2 - 1E-7, 4))
+        self.assertEqual(query.contains_many(np.array([[2, 4], [2, 4.5], [2 + 1E-8, 3.5]])).tolist(),
+                         [True, False, False])
+        self.assertEqual(query.ilp_calls, 1)
+        query = self.box_query((3 - 1E-7, 4))
+        self.assertFalse(query.contains([3, 1]))
+        self.assertEqual(query.ilp_calls, 1)
+
+    def test_realizable_many(self):
+        query = self.box_query()
+        points = np.array([[1, 2], [1.5, 2], [3, 1], [0, 0], [1, 2]])
+        self.assertEqual(query.realizable_many(points).tolist(), [True, False, False, True, True])
+        self.assertEqual(query.ilp_calls, 2)
+        self.assertEqual(query.cache, {(1, 2): True, (0, 0): True})
+
+    def test_from_aistats(self):
+        points = [[0, 0], [0, 1], [1, 0], [2, 1], [2, 4], [1, 4]]
+        solver = AiStatsRmpSolver(self.mln, 2, enumerator_cls=NaiveEnumerator, oracle_caller=PointSetOracle(points))
+        solver.solve()
+        query = RmpQuery.from_aistats(solver)
+        self.assertEqual(query.contains_many(np.array([[1, 1], [0, 3], [2, 0.5], [1.5, 0.5]])).tolist(),
+                         [True, False, False, True])
+        self.assertTrue(query.contains_many(np.array(points, dtype=np.float64)).all())
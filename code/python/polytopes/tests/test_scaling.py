@@ -0,0 +1,44 @@
+from unittest import TestCase
+
+from benchmarks.scaling import fit_growth, intractable_size, regressions
+
+
+class TestScaling(TestCase):
+
+    def test_fit_growth(self):
+        growth = fit_growth([2, 4, 8, 16], [3 * n ** 2 for n in [2, 4, 8, 16]])
+        self.assertAlmostEqual(2, growth["exponent"])
+        self.assertAlmostEqual(3, growth["coefficient"])
+
+    def test_fit_growth_too_few_points(self):
+        # domain size 1 and zero values cannot be fitted in log-log scale
+        growth = fit_growth([1, 2, 3], [5, 4, 0])
+        self.assertNotEqual(growth["exponent"], growth["exponent"])
+
+    def test_intractable_size(self):
+        growth = {"exponent": 2.0, "coefficient": 1.0}
+        self.assertEqual(11, intractable_size(growth, 100))
+        self.assertEqual(11, intractable_size(growth, 120))
+        self.assertEqual(-1, intractable_size({"exponent": 0.0, "coefficient": 1.0}, 100))
+        self.assertEqual(-1, intractable_size(fit_growth([1], [1]), 100))
+
+    def test_regressions(self):
+        baseline = {"results": [{"domain_size": 2, "variables": 10, "general_constraints": 4,
+                                 "linear_constraints": 3, "build_seconds": 0.001, "solve_seconds": 1.0}]}
+        same = {"results": [dict(baseline["results"][0])]}
+        self.assertEqual([], regressions(baseline, same, 1.5))
+
+        # relative slow-down of a tiny time is noise
+        noise = {"results": [dict(baseline["results"][0], build_seconds=0.01)]}
+        self.assertEqual([], regressions(baseline, noise, 1.5))
+        self.assertEqual(1, len(regressions(baseline, noise, 1.5, min_seconds=0)))
+
+        slower = {"results": [dict(baseline["results"][0], solve_seconds=2.0, variables=11)]}
+        found = regressions(baseline, slower, 1.5)
+        self.assertEqual(2, len(found))
+        self.assertTrue(any("variables" in r for r in found))
+        self.assertTrue(any("solve_seconds" in r for r in found))
+
+        # domain sizes missing in the baseline are not compared
+        other = {"results": [dict(baseline["results"][0], domain_size=3, variables=100)]}
+        self.assertEqual([], regressions(baseline, other, 1.5))
@@ -0,0 +1,46 @@
+import os
+import tempfile
+
+from itertools import combinations
+from unittest import TestCase
+
+import numpy as np
+
+from aistats.enumerator.naive_enumerator import NaiveEnumerator
+from aistats.enumerator.sharding import ShardedEnumeration, _run_shard, combination_blocks, unrank_lex_combination
+from aistats.enumerator.symmetric_enumerator import SymmetricEnumerator
+from aistats.utils import integer_normals
+
+
+class TestSharding(TestCase):
+
+    def test_unrank(self):
+        for rank, combination in enumerate(combinations(range(7), 3)):
+            self.assertEqual(unrank_lex_combination(rank, 7, 3), combination)
+
+    def test_blocks(self):
+        expected = list(combinations(range(8), 3))
+        for start, stop in [(0, 56), (5, 40), (17, 18), (55, 56)]:
+            out = np.concatenate(list(combination_blocks(8, 3, start, stop, 4)))
+            np.testing.assert_array_equal(out, np.array(expected[start:stop]))
+
+    def test_sharded_normals(self):
+        limits = [2, 1, 2]
+        batches = NaiveEnumerator(limits).generate_point_batches()
+        expected = np.unique(np.concatenate([integer_normals(points) for points in batches]), axis=0)
+        with tempfile.TemporaryDirectory() as directory:
+            out = ShardedEnumeration(limits, directory, shards=3, batch_size=100).run(processes=2)
+            np.testing.assert_array_equal(out, expected)
+
+    def test_resume(self):
+        limits = [3, 2]
+        with tempfile.TemporaryDirectory() as directory:
+            sharded = ShardedEnumeration(limits, directory, shards=2, enumerator_cls=SymmetricEnumerator,
+                                         batch_size=10, checkpoint_every=1)
+            start, stop = sharded.ranges()[0]
+            _run_shard(SymmetricEnumerator, limits, 0, start, stop, directory, 10, 1, max_batches=2)
+            self.assertTrue(os.path.exists(os.path.join(directory, "shard-0000.json")))
+            resumed = sharded.run(processes=1)
+        with tempfile.TemporaryDirectory() as directory:
+            fresh = ShardedEnumeration(limits, directory, shards=2, enumerator_cls=SymmetricEnumerator).run(1)
+        np.testing.assert_array_equal(resumed, fresh)
@@ -0,0 +1,45 @@
+from unittest import TestCase
+
+import numpy as np
+from scipy.special import logsumexp
+
+from aistats.aistats import AiStatsRmpSolver
+from aistats.oracle.oracle_caller import OracleCaller
+from aistats.sweep import DomainSweep
+from clauses.cnf import MLN
+from cnf_parser import CnfParser
+
+
+class SmokersOracle(OracleCaller):
+    # count vectors of smokes(X) and smokes(X) AND friends(X,Y) - t groundings of the second formula are
+    # possible whenever t <= s * n
+
+    def call_oracle(self, domain_size, atoms, cnfs) -> float:
+        weights = np.array([cnf.weight for cnf in cnfs])
+        points = np.array([[s, t] for s in range(domain_size + 1) for t in range(s * domain_size + 1)])
+        return logsumexp(points @ weights)
+
+
+class TestDomainSweep(TestCase):
+
+    def test_sweep(self):
+        parser = CnfParser()
+        parser.read_cnf("smokes(X)")
+        parser.read_cnf("smokes(X) AND friends(X,Y)")
+        mln = MLN(parser.formulas)
+        sweep = DomainSweep(mln, [3, 2, 4], oracle_caller=SmokersOracle())
+        solvers = sweep.run()
+        self.assertEqual(list(solvers), [2, 3, 4])
+        for domain_size in [3, 4]:
+            single = AiStatsRmpSolver(mln, domain_size, oracle_caller=SmokersOracle())
+            single.solve(adaptive=True)
+            self.assertTrue(solvers[domain_size].rmp == single.rmp)
+            self.assertLess(solvers[domain_size].oracle_calls, single.oracle_calls)
+
+    def test_facet_normals(self):
+        parser = CnfParser()
+        parser.read_cnf("smokes(X)")
+        parser.read_cnf("smokes(X) AND friends(X,Y)")
+        solver = AiStatsRmpSolver(MLN(parser.formulas), 2, oracle_caller=SmokersOracle())
+        solver.solve(adaptive=True)
+        self.assertEqual({tuple(n) for n in solver.facet_normals()}, {(0, -1), (1, 0), (-2, 1)})
@@ -0,0 +1,33 @@
+from unittest import TestCase
+
+import numpy as np
+
+from aistats.enumerator.naive_enumerator import NaiveEnumerator
+from aistats.enumerator.symmetric_enumerator import SymmetricEnumerator
+from aistats.utils import integer_normals
+
+
+class TestSymmetricEnumerator(TestCase):
+
+    def test_same_normals(self):
+        for limits in [[3, 2], [2, 1, 2], [1, 1, 1, 1]]:
+            naive = {tuple(n) for points in NaiveEnumerator(limits).generate_point_batches()
+                     for n in integer_normals(points)}
+            symmetric = {tuple(n) for points in SymmetricEnumerator(limits).generate_point_batches()
+                         for n in integer_normals(points)}
+            self.assertEqual(symmetric, naive)
+
+    def test_fewer_sets(self):
+        limits = [4, 3, 2]
+        naive = sum(len(points) for points in NaiveEnumerator(limits).generate_point_batches())
+        symmetric = sum(len(points) for points in SymmetricEnumerator(limits).generate_point_batches())
+        self.assertLess(5 * symmetric, naive)
+
+    def test_independence_of_large_vectors(self):
+        # the third vector is the sum of the first two, their Gram determinant is ~3e7 in floating point
+        en = SymmetricEnumerator([1, 1, 1, 1])
+        en.limits = [40000] * 4
+        en.vectors = np.array([[3329, 3459, 5797, 5110], [6924, 8912, 8770, 7755], [10253, 12371, 14567, 12865],
+                               [0, 0, 1, 0]], dtype=np.int64)
+        points = en.combination_points(np.array([[0, 1, 2], [0, 1, 3]]))
+        self.assertEqual(points.tolist(), [en.vectors[[0, 1, 3]].tolist()])
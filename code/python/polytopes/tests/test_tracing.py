@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+
+from unittest import TestCase
+
+import tracing
+from tracing import Tracer
+
+
+class TestTracing(TestCase):
+
+    def test_disabled(self):
+        tracer = Tracer()
+        with tracer.span("cut", cut=[1]) as span:
+            span.set(status=2)
+        tracer.count("variables", 10)
+        self.assertIs(tracer.span("a"), tracer.span("b"))
+        self.assertEqual(tracer.events, [])
+        self.assertEqual(tracer.counters, {})
+
+    def test_spans(self):
+        tracer = Tracer(enabled=True)
+        with tracer.span("cut", cut=[1, 2]):
+            for status in range(3):
+                with tracer.span("optimize") as span:
+                    span.set(status=status)
+                tracer.count("nodes explored", 2)
+        cut = [e for e in tracer.events if e["name"] == "cut"][0]
+        optimize = [e for e in tracer.events if e["name"] == "optimize"]
+        self.assertEqual(len(optimize), 3)
+        self.assertEqual([e["args"]["status"] for e in optimize], [0, 1, 2])
+        for event in optimize:
+            self.assertLessEqual(cut["ts"], event["ts"])
+            self.assertLessEqual(event["ts"] + event["dur"], cut["ts"] + cut["dur"])
+        self.assertEqual(tracer.counters, {"nodes explored": 6})
+        self.assertEqual(tracer.span_totals()["optimize"][0], 3)
+        summary = tracer.summary()
+        self.assertEqual(summary.splitlines()[1].split()[0], "cut")
+        self.assertIn("nodes explored", summary)
+
+    def test_chrome_trace(self):
+        tracer = Tracer(enabled=True)
+        with tracer.span("oracle call", normals=4):
+            tracer.count("oracle calls", 4)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.json")
+            tracer.write_chrome_trace(path)
+            with open(path) as f:
+                trace = json.load(f)
+        self.assertEqual({e["ph"] for e in trace["traceEvents"]}, {"X", "C"})
+        self.assertEqual([e["args"] for e in trace["traceEvents"] if e["ph"] == "C"], [{"oracle calls": 4}])
+
+    def test_global(self):
+        tracer = tracing.enable()
+        try:
+            with tracing.span("hull update"):
+                tracing.count("oracle calls")
+            self.assertEqual(len(tracer.events), 2)
+        finally:
+            tracing.disable()
+        with tracing.span("hull update"):
+            pass
+        self.assertEqual(len(tracer.events), 2)
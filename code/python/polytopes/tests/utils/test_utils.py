@@ -2,7 +2,7 @@ import numpy as np
 
 from unittest import TestCase
 
-from aistats.utils import calculate_normal, cross, normalize_vector
+from aistats.utils import calculate_normal, cross, integer_normals, normalize_vector
 
 
 class TestUtils(TestCase):
@@ -70,3 +70,22 @@ class TestUtils(TestCase):
     @staticmethod
     def arr_eq(a1, a2):
         return np.alltrue(a1 == a2)
+
+    def test_integer_normals(self):
+        points = np.array([
+            [[1, 5, 2, -9, -3], [2, 1, 5, 2, -8], [0, 7, 1, 8, 1], [0, 0, 3, -9, 0]],
+            [[1, 0, 0, 0, 0], [2, 0, 0, 0, 0], [0, 1, 0, 0, 0], [0, 0, 1, 0, 0]],
+            [[4, 0, 0, 0, 0], [0, 6, 0, 0, 0], [0, 0, 8, 0, 0], [0, 0, 0, -2, 0]],
+        ])
+        out = integer_normals(points)
+        self.assertEqual(out.dtype, np.int64)
+        self.assertTrue(self.arr_eq(out[0], normalize_vector(cross(points[0]))))
+        self.assertTrue(self.arr_eq(out[1], np.zeros(5)))
+        self.assertTrue(self.arr_eq(out[2], np.array([0, 0, 0, 0, 1])))
+
+    def test_integer_normals_large(self):
+        points = np.array([[[10 ** 9, 1, 3, 0], [7, 10 ** 9, 0, 5], [0, 2, 1, 10 ** 9]]])
+        out = integer_normals(points)
+        self.assertEqual(out.dtype, object)
+        self.assertTrue(self.arr_eq(points[0].astype(object) @ out[0], np.zeros(3)))
+        self.assertEqual(np.gcd.reduce(out[0]), 1)
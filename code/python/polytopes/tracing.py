@@ -0,0 +1,150 @@
+import json
+import os
+import threading
+
+import time
+
+from typing import Dict, List
+
+
+class _NullSpan:
+    # shared by all spans of a disabled tracer
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def set(self, **args) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        end = time.perf_counter_ns()
+        self.tracer.events.append({"name": self.name, "ph": "X", "ts": (self.start - self.tracer.origin) / 1000,
+                                   "dur": (end - self.start) / 1000, "pid": os.getpid(),
+                                   "tid": threading.get_ident(), "args": self.args})
+        return False
+
+    def set(self, **args) -> None:
+        """
+        Adds arguments known only inside of the span (e.g. result of optimization).
+        """
+        self.args.update(args)
+
+
+class Tracer:
+    """
+    Collects nested spans (durations of named phases) and counters. Spans are recorded as Chrome trace-event
+    complete events, so nesting follows from their times. A disabled tracer returns one shared no-op span and
+    ignores counters.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.origin = time.perf_counter_ns()
+        self.events = []  # type: List[Dict]
+        self.counters = {}  # type: Dict[str, float]
+
+    def span(self, name: str, **args):
+        """
+        :param name: name of the phase
+        :param args: arguments shown with the span
+        :return: context manager measuring the phase
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def count(self, name: str, value: float = 1) -> None:
+        """
+        Adds value to the counter, the running total is recorded as a counter event.
+        """
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + value
+        self.events.append({"name": name, "ph": "C", "ts": (time.perf_counter_ns() - self.origin) / 1000,
+                            "pid": os.getpid(), "tid": threading.get_ident(), "args": {name: self.counters[name]}})
+
+    def clear(self) -> None:
+        self.origin = time.perf_counter_ns()
+        self.events = []
+        self.counters = {}
+
+    def chrome_trace(self) -> Dict:
+        """
+        :return: trace in Chrome trace-event format (chrome://tracing, Perfetto)
+        """
+        return {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def span_totals(self) -> Dict[str, List[float]]:
+        """
+        :return: name of span -> [number of spans, total seconds, longest span in seconds]
+        """
+        out = {}
+        for event in self.events:
+            if event["ph"] != "X":
+                continue
+            stats = out.setdefault(event["name"], [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += event["dur"] / 1E6
+            stats[2] = max(stats[2], event["dur"] / 1E6)
+        return out
+
+    def summary(self) -> str:
+        """
+        :return: table of spans (sorted by total time) and counters
+        """
+        lines = [f"{'span':<24}{'calls':>8}{'total [s]':>12}{'mean [s]':>12}{'max [s]':>12}"]
+        totals = sorted(self.span_totals().items(), key=lambda item: -item[1][1])
+        for name, (calls, total, longest) in totals:
+            lines.append(f"{name:<24}{calls:>8}{total:>12.4f}{total / calls:>12.6f}{longest:>12.6f}")
+        if self.counters:
+            lines.append(f"{'counter':<24}{'value':>8}")
+            lines.extend(f"{name:<24}{value:>8g}" for name, value in sorted(self.counters.items()))
+        return "\n".join(lines)
+
+
+TRACER = Tracer()
+
+
+def span(name: str, **args):
+    return TRACER.span(name, **args)
+
+
+def count(name: str, value: float = 1) -> None:
+    TRACER.count(name, value)
+
+
+def enable() -> Tracer:
+    TRACER.enabled = True
+    TRACER.clear()
+    return TRACER
+
+
+def disable() -> None:
+    TRACER.enabled = False